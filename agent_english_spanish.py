@@ -1,35 +1,30 @@
-import anthropic
+from typing import List
 
+from claude_client import call_claude_agent, async_call_claude_agent
+from batch_translation import translate_batch, DEFAULT_BATCH_SIZE
 
-def call_claude_agent(prompt: str, system_prompt: str, api_key: str) -> str:
+
+AGENT_NAME = "english_spanish"
+SYSTEM_PROMPT = "You are a translation agent. Your ONLY task is to translate from English to Spanish. Output ONLY the translated Spanish text with no explanations, comments, or additional text whatsoever."
+
+
+def english_spanish_translator(text: str, api_key: str) -> str:
     """
-    Helper function to call Claude API with a specific system prompt and user prompt.
+    Agent 2: Translates text from English to Spanish.
 
     Args:
-        prompt: The user message/prompt to send to Claude
-        system_prompt: The system prompt that defines the agent's role
+        text: English text to translate
         api_key: Claude API key
 
     Returns:
-        The text response from Claude
+        Spanish translation
     """
-    client = anthropic.Anthropic(api_key=api_key)
-
-    message = client.messages.create(
-        model="claude-3-haiku-20240307",
-        max_tokens=1024,
-        system=system_prompt,
-        messages=[
-            {"role": "user", "content": prompt}
-        ]
-    )
-
-    return message.content[0].text
+    return call_claude_agent(text, SYSTEM_PROMPT, api_key, cache=True, agent=AGENT_NAME)
 
 
-def english_spanish_translator(text: str, api_key: str) -> str:
+async def english_spanish_translator_async(text: str, api_key: str) -> str:
     """
-    Agent 2: Translates text from English to Spanish.
+    Agent 2 (async): Translates text from English to Spanish without blocking the event loop.
 
     Args:
         text: English text to translate
@@ -38,5 +33,21 @@ def english_spanish_translator(text: str, api_key: str) -> str:
     Returns:
         Spanish translation
     """
-    system_prompt = "You are a translation agent. Your ONLY task is to translate from English to Spanish. Output ONLY the translated Spanish text with no explanations, comments, or additional text whatsoever."
-    return call_claude_agent(text, system_prompt, api_key)
+    return await async_call_claude_agent(text, SYSTEM_PROMPT, api_key, cache=True, agent=AGENT_NAME)
+
+
+def english_spanish_translator_batch(texts: List[str], api_key: str, batch_size: int = DEFAULT_BATCH_SIZE) -> List[str]:
+    """
+    Agent 2 (batched): Translates many texts from English to Spanish, `batch_size` per request.
+
+    Misaligned batches are re-split, down to single-sentence calls if needed.
+
+    Args:
+        texts: English texts to translate
+        api_key: Claude API key
+        batch_size: Number of texts packed into each request
+
+    Returns:
+        Spanish translations, aligned one-to-one with `texts`
+    """
+    return translate_batch(texts, SYSTEM_PROMPT, api_key, english_spanish_translator, batch_size, AGENT_NAME)
@@ -1,8 +1,27 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from sentence_transformers import SentenceTransformer
-from typing import List, Tuple
-from scipy.spatial.distance import cosine
+from typing import Dict, List, Optional, Sequence, Tuple
+from embedding_store import Encoder, embedding_model_id, get_embedding_model, encode_sentences, report_embedding_store
+from embedding_server import get_embedding_client
+from streaming_evaluation import cosine_distances as compute_cosine_distances, IncrementalEvaluator
+from pipeline_profiler import cpu_stage
+from evaluation_plots import plot_distance_summary, should_aggregate, summarize_distances
+
+
+def report_embedding_cache() -> None:
+    """
+    Print the embedding cache counters where the encoding happened.
+
+    This process's store is reported only if it encoded locally; a running
+    embedding server owns the store for its clients, so its /health counters
+    are reported instead.
+    """
+    report_embedding_store()
+    client = get_embedding_client()
+    health = client.health() if client is not None else None
+    if health is not None and health.get('store') is not None:
+        store = health['store']
+        print(f"Embedding cache (server at {client.address}): {store['hits']} hits, {store['misses']} misses "
+              f"({store['hit_rate']:.1%} hit rate), {store['entries']} stored vectors")
 
 
 def evaluate_translation_quality(translation_results: List[Tuple[str, str]]):
@@ -28,37 +47,36 @@ def evaluate_translation_quality(translation_results: List[Tuple[str, str]]):
     print("=== Evaluation Agent: Translation Quality Analysis ===\n")
 
     # Step 1: Vectorization (Embeddings)
-    print("Step 1: Loading embedding model and generating sentence vectors...")
+    print(f"Step 1: Loading embedding model ({embedding_model_id()}) and generating sentence vectors...")
 
-    # Load pre-trained sentence transformer model
-    # 'all-MiniLM-L6-v2' is a high-quality, efficient model for semantic similarity
-    model = SentenceTransformer('all-MiniLM-L6-v2')
+    # A running embedding server (embedding_server.py) already holds the model warm;
+    # otherwise the pre-trained sentence transformer is loaded once per process and kept resident
+    client = get_embedding_client()
+    if client is not None:
+        print(f"Using embedding server at {client.address}")
+    else:
+        get_embedding_model()
 
     # Extract original and re-translated sentences
     original_sentences = [result[0] for result in translation_results]
     retranslated_sentences = [result[1] for result in translation_results]
 
-    # Generate embeddings for all sentences
+    # Generate embeddings for all sentences (previously seen sentences come from the embedding cache)
     print(f"Encoding {len(original_sentences)} original sentences...")
-    original_embeddings = model.encode(original_sentences, convert_to_numpy=True)
+    original_embeddings = encode_sentences(original_sentences)
 
     print(f"Encoding {len(retranslated_sentences)} re-translated sentences...")
-    retranslated_embeddings = model.encode(retranslated_sentences, convert_to_numpy=True)
+    retranslated_embeddings = encode_sentences(retranslated_sentences)
 
-    print("✓ Embeddings generated successfully\n")
+    print("✓ Embeddings generated successfully")
+    report_embedding_cache()
+    print()
 
     # Step 2: Distance Measurement and Statistics
     print("Step 2: Calculating cosine distances...")
 
-    cosine_distances = []
-
-    for i in range(len(original_embeddings)):
-        # Calculate cosine distance between original and re-translated embeddings
-        distance = cosine(original_embeddings[i], retranslated_embeddings[i])
-        cosine_distances.append(distance)
-
-    # Convert to numpy array for statistical calculations
-    cosine_distances = np.array(cosine_distances)
+    # Cosine distance between each original and re-translated embedding (row-wise, vectorized)
+    cosine_distances = compute_cosine_distances(original_embeddings, retranslated_embeddings)
 
     # Calculate statistics
     mean_distance = np.mean(cosine_distances)
@@ -70,10 +88,154 @@ def evaluate_translation_quality(translation_results: List[Tuple[str, str]]):
     print("✓ Distance calculations complete\n")
 
     # Print statistics
+    print_quality_metrics(len(cosine_distances), mean_distance, variance_distance,
+                          std_distance, min_distance, max_distance)
+
+    # Step 3: Visualization
+    print("Step 3: Generating visualization...\n")
+
+    with cpu_stage("plot", sentences=len(cosine_distances)):
+        fig = plot_translation_quality(cosine_distances, mean_distance, std_distance)
+
+    print("✓ Visualization complete")
+
+    # Return metrics and figure (don't show yet, let caller decide)
+    return {
+        'mean': mean_distance,
+        'variance': variance_distance,
+        'std': std_distance,
+        'min': min_distance,
+        'max': max_distance,
+        'distances': cosine_distances,
+        'figure': fig  # Return the figure object for saving
+    }
+
+
+def finish_incremental_evaluation(evaluator: IncrementalEvaluator, plot: bool = True):
+    """
+    Evaluation Agent (incremental): Collects the metrics of an IncrementalEvaluator that
+    embedded the pairs while they were being translated, then prints and plots them.
+
+    Args:
+        evaluator: The evaluator that received every (original, final) pair
+        plot: Build the figure (False skips importing matplotlib; 'figure' is then None)
+
+    Returns:
+        The same dictionary as evaluate_translation_quality
+    """
+    print("=== Evaluation Agent: Translation Quality Analysis (incremental) ===\n")
+    print("Waiting for the background evaluator to embed the last pairs...")
+
+    stats = evaluator.close()
+    cosine_distances = evaluator.ordered_distances()
+
+    print("✓ Embeddings and distances complete")
+    report_embedding_cache()
+    print()
+
+    print_quality_metrics(stats['count'], stats['mean'], stats['variance'],
+                          stats['std'], stats['min'], stats['max'])
+
+    fig = None
+    if plot:
+        print("Generating visualization...\n")
+        with cpu_stage("plot", sentences=len(cosine_distances)):
+            fig = plot_translation_quality(cosine_distances, stats['mean'], stats['std'])
+        print("✓ Visualization complete")
+
+    return {
+        'mean': stats['mean'],
+        'variance': stats['variance'],
+        'std': stats['std'],
+        'min': stats['min'],
+        'max': stats['max'],
+        'distances': cosine_distances,
+        'figure': fig
+    }
+
+
+def compare_translation_drift(originals: Sequence[str], finals_a: Sequence[str], finals_b: Sequence[str],
+                              labels: Tuple[str, str] = ("chained", "fused"),
+                              encoder: Optional[Encoder] = None) -> Dict:
+    """
+    Evaluation Agent (comparison): Compares the drift of two round-trip modes on the same corpus.
+
+    The originals are embedded once; each mode's final sentences are compared
+    against them, and the per-sentence distances are paired to show which
+    mode preserves meaning better.
+
+    Args:
+        originals: Original English sentences
+        finals_a: Final sentences of the first mode, aligned with originals
+        finals_b: Final sentences of the second mode, aligned with originals
+        labels: Names of the two modes
+        encoder: Optional replacement for the resident SentenceTransformer
+
+    Returns:
+        Dictionary with per-mode statistics (count, mean, variance, std, min, max)
+        under each label, and 'paired' with the mean distance difference
+        (second minus first) and the share of sentences where each mode drifted less
+    """
+    if not (len(originals) == len(finals_a) == len(finals_b)):
+        raise ValueError("originals, finals_a and finals_b must be aligned")
+
+    print("=== Evaluation Agent: Drift Comparison ===\n")
+    original_embeddings = encode_sentences(list(originals), encoder)
+    distances = {}
+    comparison: Dict = {'sentences': len(originals)}
+    for label, finals in zip(labels, (finals_a, finals_b)):
+        distances[label] = compute_cosine_distances(original_embeddings, encode_sentences(list(finals), encoder))
+        values = distances[label]
+        comparison[label] = {
+            'count': int(values.size),
+            'mean': float(np.mean(values)) if values.size else 0.0,
+            'variance': float(np.var(values)) if values.size else 0.0,
+            'std': float(np.std(values)) if values.size else 0.0,
+            'min': float(np.min(values)) if values.size else 0.0,
+            'max': float(np.max(values)) if values.size else 0.0,
+        }
+
+    first, second = labels
+    difference = distances[second] - distances[first]
+    comparison['paired'] = {
+        'mean_difference': float(np.mean(difference)) if difference.size else 0.0,
+        f'{first}_better_share': float(np.mean(difference > 0)) if difference.size else 0.0,
+        f'{second}_better_share': float(np.mean(difference < 0)) if difference.size else 0.0,
+        'tie_share': float(np.mean(difference == 0)) if difference.size else 0.0,
+    }
+
+    print("=" * 60)
+    print(f"DRIFT COMPARISON: {first.upper()} vs {second.upper()} ({len(originals)} sentences)")
+    print("=" * 60)
+    print(f"{'':<22}{first:>18}{second:>18}")
+    for key in ('mean', 'std', 'min', 'max'):
+        print(f"  {key.capitalize():<20}{comparison[first][key]:>18.6f}{comparison[second][key]:>18.6f}")
+    paired = comparison['paired']
+    print(f"\n  Mean difference ({second} - {first}): {paired['mean_difference']:+.6f}")
+    print(f"  {first} drifted less on {paired[f'{first}_better_share']:.1%} of sentences, "
+          f"{second} on {paired[f'{second}_better_share']:.1%}, ties {paired['tie_share']:.1%}")
+    print("=" * 60)
+    print()
+    return comparison
+
+
+def print_quality_metrics(count: int, mean_distance: float, variance_distance: float,
+                          std_distance: float, min_distance: float, max_distance: float):
+    """
+    Print the translation quality metrics table.
+
+    Args:
+        count: Number of sentences evaluated
+        mean_distance: Average cosine distance
+        variance_distance: Variance of cosine distances
+        std_distance: Standard deviation of cosine distances
+        min_distance: Minimum cosine distance
+        max_distance: Maximum cosine distance
+    """
     print("=" * 60)
     print("TRANSLATION QUALITY METRICS")
     print("=" * 60)
-    print(f"Total Sentences Evaluated: {len(cosine_distances)}")
+    print(f"Total Sentences Evaluated: {count}")
     print(f"\nCosine Distance Statistics:")
     print(f"  Average (Mean):          {mean_distance:.6f}")
     print(f"  Variance:                {variance_distance:.6f}")
@@ -87,8 +249,30 @@ def evaluate_translation_quality(translation_results: List[Tuple[str, str]]):
     print("=" * 60)
     print()
 
-    # Step 3: Visualization
-    print("Step 3: Generating visualization...\n")
+
+def plot_translation_quality(cosine_distances: np.ndarray, mean_distance: float, std_distance: float,
+                             aggregate: Optional[bool] = None):
+    """
+    Plot the error (cosine distance) per sentence and its distribution.
+
+    Above evaluation_plots.AGGREGATE_THRESHOLD sentences the per-point scatter
+    is replaced by density, rolling quantile bands and a precomputed histogram.
+
+    Args:
+        cosine_distances: Per-sentence cosine distances, in sentence order
+        mean_distance: Average cosine distance
+        std_distance: Standard deviation of cosine distances
+        aggregate: Force (True) or disable (False) the aggregated plot; None decides by size
+
+    Returns:
+        The matplotlib figure (not shown; the caller decides)
+    """
+    if aggregate is None:
+        aggregate = should_aggregate(len(cosine_distances))
+    if aggregate:
+        return plot_distance_summary(summarize_distances(cosine_distances))
+
+    import matplotlib.pyplot as plt
 
     # Create figure with two subplots
     fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 10))
@@ -123,18 +307,7 @@ def evaluate_translation_quality(translation_results: List[Tuple[str, str]]):
 
     plt.tight_layout()
 
-    print("✓ Visualization complete")
-
-    # Return metrics and figure (don't show yet, let caller decide)
-    return {
-        'mean': mean_distance,
-        'variance': variance_distance,
-        'std': std_distance,
-        'min': min_distance,
-        'max': max_distance,
-        'distances': cosine_distances,
-        'figure': fig  # Return the figure object for saving
-    }
+    return fig
 
 
 # Example usage and testing
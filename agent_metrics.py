@@ -0,0 +1,281 @@
+import json
+import threading
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+# Upper bounds (seconds) of the latency histogram buckets; the last bucket is +Inf
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# USD per million (input, output) tokens
+MODEL_PRICES = {
+    "claude-3-haiku-20240307": (0.25, 1.25),
+    "claude-3-5-haiku-20241022": (0.80, 4.00),
+    "claude-3-5-sonnet-20241022": (3.00, 15.00),
+}
+
+
+class AgentStats:
+    """
+    Counters and a fixed-bucket latency histogram for one agent.
+
+    Memory stays constant however many calls are recorded, so the same
+    object serves a 10-sentence test and a million-sentence run.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.cache_hits = 0
+        self.errors = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cost_usd = 0.0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def observe_latency(self, seconds: float) -> None:
+        self.latency_sum += seconds
+        self.latency_max = max(self.latency_max, seconds)
+        self.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+    def latency_quantile(self, quantile: float) -> Optional[float]:
+        """Bucket upper bound containing the quantile (the maximum for the +Inf bucket)."""
+        observed = sum(self.buckets)
+        if not observed:
+            return None
+        rank = quantile * observed
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.latency_max)
+        return self.latency_max
+
+    def as_dict(self) -> Dict:
+        observed = sum(self.buckets)
+        return {
+            'calls': self.calls,
+            'cache_hits': self.cache_hits,
+            'errors': self.errors,
+            'retries': self.retries,
+            'hedges': self.hedges,
+            'hedge_wins': self.hedge_wins,
+            'input_tokens': self.input_tokens,
+            'output_tokens': self.output_tokens,
+            'cost_usd': self.cost_usd,
+            'latency_mean_s': self.latency_sum / observed if observed else None,
+            'latency_p50_s': self.latency_quantile(0.50),
+            'latency_p95_s': self.latency_quantile(0.95),
+            'latency_max_s': self.latency_max if observed else None,
+            'latency_histogram': {
+                **{f"le_{bound:g}": count for bound, count in zip(LATENCY_BUCKETS, self.buckets)},
+                'le_inf': self.buckets[-1],
+            },
+        }
+
+
+class AgentMetrics:
+    """
+    Thread-safe, per-agent record of every call made through call_claude_agent.
+
+    API calls record tokens, wall latency (including the scheduler's retries)
+    and retries; cache hits are counted separately since they cost nothing.
+    """
+
+    def __init__(self):
+        self._agents: Dict[str, AgentStats] = {}
+        self._lock = threading.Lock()
+
+    def _stats(self, agent: str) -> AgentStats:
+        stats = self._agents.get(agent)
+        if stats is None:
+            stats = self._agents[agent] = AgentStats()
+        return stats
+
+    def record_call(self, agent: str, model: str, latency: float, input_tokens: int,
+                    output_tokens: int, retries: int) -> None:
+        """Record one completed API call."""
+        input_price, output_price = MODEL_PRICES.get(model, (0.0, 0.0))
+        with self._lock:
+            stats = self._stats(agent)
+            stats.calls += 1
+            stats.retries += retries
+            stats.input_tokens += input_tokens
+            stats.output_tokens += output_tokens
+            stats.cost_usd += (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+            stats.observe_latency(latency)
+
+    def record_cache_hit(self, agent: str) -> None:
+        """Record a response served from the translation cache."""
+        with self._lock:
+            self._stats(agent).cache_hits += 1
+
+    def record_error(self, agent: str) -> None:
+        """Record a call that failed after the scheduler gave up."""
+        with self._lock:
+            self._stats(agent).errors += 1
+
+    def record_hedge(self, agent: str) -> None:
+        """Record a duplicate request fired because a call outlived its hedge threshold."""
+        with self._lock:
+            self._stats(agent).hedges += 1
+
+    def record_hedge_win(self, agent: str) -> None:
+        """Record a hedge that answered before the original request."""
+        with self._lock:
+            self._stats(agent).hedge_wins += 1
+
+    def agents(self) -> List[str]:
+        with self._lock:
+            return sorted(self._agents)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Per-agent dictionaries, safe to serialize."""
+        with self._lock:
+            return {agent: stats.as_dict() for agent, stats in sorted(self._agents.items())}
+
+    def totals(self) -> Dict[str, float]:
+        """Sums over every agent."""
+        snapshot = self.snapshot()
+        keys = ('calls', 'cache_hits', 'errors', 'retries', 'hedges', 'hedge_wins',
+                'input_tokens', 'output_tokens', 'cost_usd')
+        return {key: sum(agent[key] for agent in snapshot.values()) for key in keys}
+
+    def build_report(self, sentences: int, elapsed: float) -> Dict:
+        """
+        Aggregated run report: per-agent stats, totals and throughput.
+
+        Args:
+            sentences: Sentences completed by the run
+            elapsed: Wall time of the run in seconds
+
+        Returns:
+            Dictionary ready for json.dump
+        """
+        return {
+            'sentences': sentences,
+            'elapsed_s': elapsed,
+            'sentences_per_sec': sentences / elapsed if elapsed > 0 else 0.0,
+            'totals': self.totals(),
+            'agents': self.snapshot(),
+        }
+
+    def print_report(self) -> None:
+        """Print one line per agent plus the totals."""
+        print(f"{'Agent':<20}{'Calls':>7}{'Cached':>8}{'Retries':>9}{'In tok':>9}{'Out tok':>9}"
+              f"{'p50 s':>8}{'p95 s':>8}{'Cost $':>9}")
+        for agent, stats in self.snapshot().items():
+            p50 = f"{stats['latency_p50_s']:.2f}" if stats['latency_p50_s'] is not None else "-"
+            p95 = f"{stats['latency_p95_s']:.2f}" if stats['latency_p95_s'] is not None else "-"
+            print(f"{agent:<20}{stats['calls']:>7}{stats['cache_hits']:>8}{stats['retries']:>9}"
+                  f"{stats['input_tokens']:>9}{stats['output_tokens']:>9}{p50:>8}{p95:>8}{stats['cost_usd']:>9.4f}")
+        totals = self.totals()
+        print(f"{'total':<20}{totals['calls']:>7}{totals['cache_hits']:>8}{totals['retries']:>9}"
+              f"{totals['input_tokens']:>9}{totals['output_tokens']:>9}{'':>8}{'':>8}{totals['cost_usd']:>9.4f}")
+
+    def prometheus_text(self, sentences_per_sec: Optional[float] = None) -> str:
+        """
+        Render the metrics in the Prometheus text exposition format.
+
+        Args:
+            sentences_per_sec: Optional run throughput, exported as a gauge
+
+        Returns:
+            The exposition text, ending with a newline
+        """
+        snapshot = self.snapshot()
+        with self._lock:
+            histograms = {agent: (list(stats.buckets), stats.latency_sum) for agent, stats in self._agents.items()}
+
+        lines = []
+
+        def counter(name: str, help_text: str, key: str) -> None:
+            lines.append(f"# HELP turingchain_{name} {help_text}")
+            lines.append(f"# TYPE turingchain_{name} counter")
+            for agent, stats in snapshot.items():
+                lines.append(f'turingchain_{name}{{agent="{agent}"}} {stats[key]}')
+
+        counter("agent_calls_total", "API calls made by the agent.", 'calls')
+        counter("agent_cache_hits_total", "Responses served from the translation cache.", 'cache_hits')
+        counter("agent_errors_total", "Calls that failed after all retries.", 'errors')
+        counter("agent_retries_total", "Retried attempts (throttled or transient).", 'retries')
+        counter("agent_hedges_total", "Duplicate requests fired by request hedging.", 'hedges')
+        counter("agent_hedge_wins_total", "Hedges that answered before the original request.", 'hedge_wins')
+        counter("agent_cost_usd_total", "Estimated API cost in USD.", 'cost_usd')
+
+        lines.append("# HELP turingchain_agent_tokens_total Tokens billed, by direction.")
+        lines.append("# TYPE turingchain_agent_tokens_total counter")
+        for agent, stats in snapshot.items():
+            lines.append(f'turingchain_agent_tokens_total{{agent="{agent}",direction="input"}} {stats["input_tokens"]}')
+            lines.append(f'turingchain_agent_tokens_total{{agent="{agent}",direction="output"}} {stats["output_tokens"]}')
+
+        lines.append("# HELP turingchain_agent_latency_seconds Wall latency of API calls, including retries.")
+        lines.append("# TYPE turingchain_agent_latency_seconds histogram")
+        for agent in snapshot:
+            buckets, latency_sum = histograms[agent]
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, buckets):
+                cumulative += count
+                lines.append(f'turingchain_agent_latency_seconds_bucket{{agent="{agent}",le="{bound:g}"}} {cumulative}')
+            cumulative += buckets[-1]
+            lines.append(f'turingchain_agent_latency_seconds_bucket{{agent="{agent}",le="+Inf"}} {cumulative}')
+            lines.append(f'turingchain_agent_latency_seconds_sum{{agent="{agent}"}} {latency_sum}')
+            lines.append(f'turingchain_agent_latency_seconds_count{{agent="{agent}"}} {cumulative}')
+
+        if sentences_per_sec is not None:
+            lines.append("# HELP turingchain_sentences_per_second Throughput of the last run.")
+            lines.append("# TYPE turingchain_sentences_per_second gauge")
+            lines.append(f"turingchain_sentences_per_second {sentences_per_sec}")
+
+        return "\n".join(lines) + "\n"
+
+
+_metrics = AgentMetrics()
+
+
+def get_agent_metrics() -> AgentMetrics:
+    """Return the process-wide metrics registry."""
+    return _metrics
+
+
+def reset_agent_metrics() -> AgentMetrics:
+    """Start a fresh registry (e.g. at the beginning of a run) and return it."""
+    global _metrics
+    _metrics = AgentMetrics()
+    return _metrics
+
+
+def save_agent_metrics(output_dir: Path, sentences: int, elapsed: float, prometheus: bool = False) -> List[Path]:
+    """
+    Write the aggregated report (and optionally the Prometheus export) next to the other artifacts.
+
+    Args:
+        output_dir: Directory such as Insights/
+        sentences: Sentences completed by the run
+        elapsed: Wall time of the run in seconds
+        prometheus: Also write agent_metrics.prom
+
+    Returns:
+        Paths of the files written
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    report = _metrics.build_report(sentences, elapsed)
+
+    report_file = output_dir / "agent_metrics.json"
+    with open(report_file, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    written = [report_file]
+
+    if prometheus:
+        prometheus_file = output_dir / "agent_metrics.prom"
+        with open(prometheus_file, 'w', encoding='utf-8') as f:
+            f.write(_metrics.prometheus_text(report['sentences_per_sec']))
+        written.append(prometheus_file)
+
+    return written
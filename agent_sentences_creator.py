@@ -1,68 +1,153 @@
-import anthropic
-from typing import Generator
-
-
-def call_claude_agent(prompt: str, system_prompt: str, api_key: str) -> str:
-    """
-    Helper function to call Claude API with a specific system prompt and user prompt.
-
-    Args:
-        prompt: The user message/prompt to send to Claude
-        system_prompt: The system prompt that defines the agent's role
-        api_key: Claude API key
-
-    Returns:
-        The text response from Claude
-    """
-    client = anthropic.Anthropic(api_key=api_key)
-
-    message = client.messages.create(
-        model="claude-3-haiku-20240307",
-        max_tokens=1024,
-        system=system_prompt,
-        messages=[
-            {"role": "user", "content": prompt}
-        ]
-    )
-
-    return message.content[0].text
-
-
-def sentences_creator(api_key: str, count: int = 100) -> Generator[str, None, None]:
+import re
+import math
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Generator, List, Tuple
+
+from claude_client import call_claude_agent, stream_claude_agent_lines
+from pipeline_profiler import span
+from sentence_dedup import SentenceDeduplicator
+
+
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_CONCURRENCY = 4
+
+SYSTEM_PROMPT = (
+    "You are a creative sentence generator. Generate diverse, grammatically correct English sentences "
+    "inspired by the themes, style, and tone of Isaac Asimov's 'Foundation' series. "
+    "Each sentence must be between 10-20 words long. "
+    "Output ONLY the sentences, one per line, with no numbering, explanations, or additional text."
+)
+
+# Parallel requests share one prompt otherwise; rotating the focus keeps them from
+# converging on the same handful of sentences
+THEMES = (
+    "psychohistory and Hari Seldon",
+    "the decline of the Galactic Empire",
+    "Terminus and the Encyclopedists",
+    "traders and merchant princes",
+    "the Mule",
+    "Trantor",
+    "the Second Foundation",
+    "science disguised as religion",
+)
+
+_LIST_MARKER_RE = re.compile(r"^(?:\d+[.)]|[-*•])\s+")
+_DONE = object()
+
+
+def build_generation_prompt(batch_count: int, request_number: int) -> str:
+    """User prompt for one generation request (the theme rotates with request_number)."""
+    theme = THEMES[request_number % len(THEMES)]
+    return (f"Generate exactly {batch_count} diverse English sentences inspired by 'Foundation' by Isaac Asimov. "
+            f"Each sentence must be between 10-20 words. Focus mostly on {theme}.")
+
+
+def parse_sentences(response: str) -> List[str]:
+    """Split a generation response into sentences, dropping blank lines and list markers."""
+    lines = (_LIST_MARKER_RE.sub("", line.strip()) for line in response.split('\n'))
+    return [line for line in lines if line]
+
+
+def sentences_creator(api_key: str, count: int = 100, concurrency: int = DEFAULT_CONCURRENCY,
+                      batch_size: int = DEFAULT_BATCH_SIZE, stream: bool = True) -> Generator[str, None, None]:
     """
     Generator function that creates diverse English sentences inspired by 'Foundation' by Isaac Asimov.
     Yields sentences one at a time to enable pipeline processing.
 
+    Up to `concurrency` generation requests run in parallel. With stream=True
+    each request uses the streaming messages API and every sentence is yielded
+    as soon as its line is complete, so translation can start after roughly
+    one sentence's worth of generation instead of a whole batch. Exact and
+    near-duplicate sentences (MinHash over 5-byte shingles) are dropped, and
+    the number of requests kept in flight is sized to the yield observed so
+    far (unique sentences per requested sentence), so short or repetitive
+    responses are made up for without over-generating.
+
     Args:
         api_key: Claude API key
         count: Number of sentences to generate (default: 100)
+        concurrency: Generation requests in flight at once
+        batch_size: Sentences asked for per request
+        stream: Stream each response line by line instead of waiting for it to complete
 
     Yields:
-        Individual English sentences (10-20 words each)
+        Individual, unique English sentences (10-20 words each)
     """
-    system_prompt = (
-        "You are a creative sentence generator. Generate diverse, grammatically correct English sentences "
-        "inspired by the themes, style, and tone of Isaac Asimov's 'Foundation' series. "
-        "Each sentence must be between 10-20 words long. "
-        "Output ONLY the sentences, one per line, with no numbering, explanations, or additional text."
-    )
-
+    deduplicator = SentenceDeduplicator()
     sentences_generated = 0
-    batch_size = 50  # Generate in batches to ensure we get all sentences
-
-    while sentences_generated < count:
-        remaining = count - sentences_generated
-        batch_count = min(batch_size, remaining)
-
-        user_prompt = f"Generate exactly {batch_count} diverse English sentences inspired by 'Foundation' by Isaac Asimov. Each sentence must be between 10-20 words."
-
-        response = call_claude_agent(user_prompt, system_prompt, api_key)
-
-        # Split response into individual sentences
-        sentences = [s.strip() for s in response.split('\n') if s.strip()]
-
-        for sentence in sentences[:batch_count]:
+    requested = received_unique = 0
+    request_number = 0
+    # Give up if the model keeps repeating itself instead of looping forever
+    max_requests = 4 * math.ceil(count / batch_size) + 4
+    pending: Dict[int, int] = {}  # request number -> sentences asked for
+    taken: Dict[int, int] = {}    # request number -> lines received so far
+    lines: "queue.Queue[Tuple[int, object]]" = queue.Queue()
+    stop = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="sentences-creator")
+
+    def generate(number: int, batch_count: int) -> None:
+        prompt = build_generation_prompt(batch_count, number)
+        try:
+            with span("generate sentences", "api", request=number, sentences=batch_count):
+                if stream:
+                    response_lines = stream_claude_agent_lines(prompt, SYSTEM_PROMPT, api_key,
+                                                               agent="sentences_creator")
+                    try:
+                        for line in response_lines:
+                            if stop.is_set():
+                                break
+                            lines.put((number, line))
+                    finally:
+                        response_lines.close()
+                else:
+                    response = call_claude_agent(prompt, SYSTEM_PROMPT, api_key, agent="sentences_creator")
+                    for line in response.split('\n'):
+                        lines.put((number, line))
+        except Exception as e:
+            lines.put((number, e))
+        else:
+            lines.put((number, _DONE))
+
+    def expected_yield() -> float:
+        # Optimistic until the first responses are in
+        return received_unique / requested if requested else 1.0
+
+    try:
+        while sentences_generated < count:
+            outstanding = sum(asked - taken[number] for number, asked in pending.items())
+            while (len(pending) < concurrency and request_number < max_requests
+                   and sentences_generated + outstanding * expected_yield() < count):
+                needed = count - sentences_generated - outstanding * expected_yield()
+                batch_count = min(batch_size, max(1, math.ceil(needed / max(expected_yield(), 0.1))))
+                pending[request_number] = batch_count
+                taken[request_number] = 0
+                executor.submit(generate, request_number, batch_count)
+                outstanding += batch_count
+                request_number += 1
+
+            if not pending:
+                print(f"Sentence generation stopped after {request_number} requests with "
+                      f"{sentences_generated}/{count} unique sentences")
+                return
+
+            number, item = lines.get()
+            if item is _DONE:
+                requested += pending.pop(number)
+                continue
+            if isinstance(item, Exception):
+                raise item
+
+            sentence = _LIST_MARKER_RE.sub("", item.strip())
+            if not sentence or taken[number] >= pending[number]:
+                continue
+            taken[number] += 1
+            if not deduplicator.add(sentence):
+                continue
+            received_unique += 1
             yield sentence
             sentences_generated += 1
-            if sentences_generated >= count:
-                break
+    finally:
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -1,35 +1,30 @@
-import anthropic
+from typing import List
 
+from claude_client import call_claude_agent, async_call_claude_agent
+from batch_translation import translate_batch, DEFAULT_BATCH_SIZE
 
-def call_claude_agent(prompt: str, system_prompt: str, api_key: str) -> str:
+
+AGENT_NAME = "spanish_hebrew"
+SYSTEM_PROMPT = "You are a translation agent. Your ONLY task is to translate from Spanish to Hebrew. Output ONLY the translated Hebrew text with no explanations, comments, or additional text whatsoever."
+
+
+def spanish_hebrew_translator(text: str, api_key: str) -> str:
     """
-    Helper function to call Claude API with a specific system prompt and user prompt.
+    Agent 3: Translates text from Spanish to Hebrew.
 
     Args:
-        prompt: The user message/prompt to send to Claude
-        system_prompt: The system prompt that defines the agent's role
+        text: Spanish text to translate
         api_key: Claude API key
 
     Returns:
-        The text response from Claude
+        Hebrew translation
     """
-    client = anthropic.Anthropic(api_key=api_key)
-
-    message = client.messages.create(
-        model="claude-3-haiku-20240307",
-        max_tokens=1024,
-        system=system_prompt,
-        messages=[
-            {"role": "user", "content": prompt}
-        ]
-    )
-
-    return message.content[0].text
+    return call_claude_agent(text, SYSTEM_PROMPT, api_key, cache=True, agent=AGENT_NAME)
 
 
-def spanish_hebrew_translator(text: str, api_key: str) -> str:
+async def spanish_hebrew_translator_async(text: str, api_key: str) -> str:
     """
-    Agent 3: Translates text from Spanish to Hebrew.
+    Agent 3 (async): Translates text from Spanish to Hebrew without blocking the event loop.
 
     Args:
         text: Spanish text to translate
@@ -38,5 +33,21 @@ def spanish_hebrew_translator(text: str, api_key: str) -> str:
     Returns:
         Hebrew translation
     """
-    system_prompt = "You are a translation agent. Your ONLY task is to translate from Spanish to Hebrew. Output ONLY the translated Hebrew text with no explanations, comments, or additional text whatsoever."
-    return call_claude_agent(text, system_prompt, api_key)
+    return await async_call_claude_agent(text, SYSTEM_PROMPT, api_key, cache=True, agent=AGENT_NAME)
+
+
+def spanish_hebrew_translator_batch(texts: List[str], api_key: str, batch_size: int = DEFAULT_BATCH_SIZE) -> List[str]:
+    """
+    Agent 3 (batched): Translates many texts from Spanish to Hebrew, `batch_size` per request.
+
+    Misaligned batches are re-split, down to single-sentence calls if needed.
+
+    Args:
+        texts: Spanish texts to translate
+        api_key: Claude API key
+        batch_size: Number of texts packed into each request
+
+    Returns:
+        Hebrew translations, aligned one-to-one with `texts`
+    """
+    return translate_batch(texts, SYSTEM_PROMPT, api_key, spanish_hebrew_translator, batch_size, AGENT_NAME)
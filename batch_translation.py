@@ -0,0 +1,101 @@
+import json
+from typing import Callable, List, Optional
+
+from claude_client import call_claude_agent
+
+
+DEFAULT_BATCH_SIZE = 10
+
+BATCH_INSTRUCTIONS = (
+    " You will receive a JSON array of texts. Translate every element independently and "
+    "respond with ONLY a JSON array of translated strings: exactly one string per input element, "
+    "in the same order, with no numbering, explanations, or additional text whatsoever."
+)
+
+
+def batch_max_tokens(count: int) -> int:
+    """Response budget for a batch of `count` sentences (capped at the model's output limit)."""
+    return min(4096, 256 + 160 * count)
+
+
+def build_batch_prompt(texts: List[str]) -> str:
+    """Pack texts into the JSON envelope sent as the user message."""
+    return json.dumps(texts, ensure_ascii=False)
+
+
+def parse_batch_response(response: str, expected: int) -> Optional[List[str]]:
+    """
+    Unpack a batched response, validating that it is aligned with the request.
+
+    Tolerates surrounding prose or code fences by parsing the outermost JSON array.
+
+    Args:
+        response: Raw text returned by the agent
+        expected: Number of texts that were sent
+
+    Returns:
+        List of exactly `expected` translations, or None if the response is
+        malformed or misaligned
+    """
+    start = response.find('[')
+    end = response.rfind(']')
+    if start == -1 or end <= start:
+        return None
+
+    try:
+        items = json.loads(response[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+
+    if not isinstance(items, list) or len(items) != expected:
+        return None
+    if not all(isinstance(item, str) and item.strip() for item in items):
+        return None
+    return [item.strip() for item in items]
+
+
+def _translate_chunk(texts: List[str], system_prompt: str, api_key: str,
+                     single_translator: Callable[[str, str], str], agent: str) -> List[str]:
+    if len(texts) == 1:
+        return [single_translator(texts[0], api_key)]
+
+    # Only aligned envelopes are cached, so a bad reply is not replayed on the next run
+    response = call_claude_agent(build_batch_prompt(texts), system_prompt + BATCH_INSTRUCTIONS, api_key,
+                                 max_tokens=batch_max_tokens(len(texts)), cache=True, agent=agent,
+                                 validate=lambda text: parse_batch_response(text, len(texts)) is not None)
+    translations = parse_batch_response(response, len(texts))
+    if translations is not None:
+        return translations
+
+    # Misaligned or malformed: re-split into halves, bottoming out in single-sentence calls
+    print(f"Batch of {len(texts)} came back misaligned; re-splitting")
+    middle = len(texts) // 2
+    return (_translate_chunk(texts[:middle], system_prompt, api_key, single_translator, agent)
+            + _translate_chunk(texts[middle:], system_prompt, api_key, single_translator, agent))
+
+
+def translate_batch(texts: List[str], system_prompt: str, api_key: str,
+                    single_translator: Callable[[str, str], str],
+                    batch_size: int = DEFAULT_BATCH_SIZE, agent: str = "unknown") -> List[str]:
+    """
+    Translate many texts with one request per `batch_size` texts.
+
+    Args:
+        texts: Texts to translate
+        system_prompt: The translator agent's single-sentence system prompt
+        api_key: Claude API key
+        single_translator: The agent's single-sentence function, used as the fallback
+        batch_size: Number of texts packed into each request
+        agent: Name the requests are recorded under in agent_metrics
+
+    Returns:
+        Translations aligned one-to-one with `texts`
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+
+    translations = []
+    for start in range(0, len(texts), batch_size):
+        translations.extend(_translate_chunk(texts[start:start + batch_size], system_prompt,
+                                             api_key, single_translator, agent))
+    return translations
@@ -0,0 +1,248 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import threading
+import subprocess
+from pathlib import Path
+from contextlib import redirect_stdout
+from typing import Dict, List, Optional
+
+import numpy as np
+
+import agent_english_spanish
+import agent_spanish_hebrew
+import agent_hebrew_english
+from claude_client import set_backend
+from fake_backend import FakeBackend
+from llm_backend import LLMBackend, LLMResponse
+from translation_cache import cache_disabled
+from request_scheduler import RequestScheduler, configure_scheduler
+from request_hedging import HedgingPolicy, configure_hedging
+from agent_sentences_creator import sentences_creator
+from orchestrator import translate_sequentially, translate_concurrently, translate_in_batches
+
+
+DEFAULT_SIZES = (100, 1000, 10000)
+MODES = ("sequential", "concurrent", "batched")
+
+_HOPS = (
+    (agent_english_spanish.SYSTEM_PROMPT, "english_spanish"),
+    (agent_spanish_hebrew.SYSTEM_PROMPT, "spanish_hebrew"),
+    (agent_hebrew_english.SYSTEM_PROMPT, "hebrew_english"),
+)
+
+
+def _hop_name(system: str) -> str:
+    for prompt, name in _HOPS:
+        if system.startswith(prompt):
+            return name
+    return "sentences_creator"
+
+
+class TimingBackend(LLMBackend):
+    """Wraps a backend and records the wall latency of every call, per hop."""
+
+    def __init__(self, inner: LLMBackend):
+        self.inner = inner
+        self.name = f"timed-{inner.name}"
+        self.latencies: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def _record(self, system: str, elapsed: float) -> None:
+        with self._lock:
+            self.latencies.setdefault(_hop_name(system), []).append(elapsed)
+
+    def create(self, model: str, max_tokens: int, system: str, prompt: str, api_key: str) -> LLMResponse:
+        start = time.perf_counter()
+        try:
+            return self.inner.create(model, max_tokens, system, prompt, api_key)
+        finally:
+            self._record(system, time.perf_counter() - start)
+
+    async def acreate(self, model: str, max_tokens: int, system: str, prompt: str, api_key: str) -> LLMResponse:
+        start = time.perf_counter()
+        try:
+            return await self.inner.acreate(model, max_tokens, system, prompt, api_key)
+        finally:
+            self._record(system, time.perf_counter() - start)
+
+
+def peak_rss_mb() -> Optional[float]:
+    """
+    Peak resident set size of this process in MB (None where unsupported).
+
+    This is the peak over the whole process lifetime, so it only describes a
+    single run when that run had the process to itself (see run_isolated).
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def latency_percentiles(latencies: List[float]) -> Dict[str, float]:
+    """p50/p95/p99 (in milliseconds) and call count for one hop."""
+    p50, p95, p99 = np.percentile(np.asarray(latencies) * 1000.0, [50, 95, 99])
+    return {'calls': len(latencies), 'p50_ms': float(p50), 'p95_ms': float(p95), 'p99_ms': float(p99)}
+
+
+def run_benchmark(num_sentences: int, mode: str = "concurrent", concurrency: int = 32,
+                  batch_size: int = 10, backend: Optional[FakeBackend] = None, hedge: bool = False) -> Dict:
+    """
+    Run the orchestrator once against a simulated backend and measure it.
+
+    The translation cache is disabled during the run, so every run pays for
+    every call, and restored afterwards.
+
+    Args:
+        num_sentences: Corpus size
+        mode: "sequential", "concurrent" or "batched"
+        concurrency: Sentences in flight in concurrent mode
+        batch_size: Sentences per request in batched mode
+        backend: Simulated backend (default: FakeBackend with 5 ms median latency)
+        hedge: Hedge calls slower than each hop's recent p95 (hop latencies then
+            include the duplicate requests)
+
+    Returns:
+        Dictionary with throughput, per-hop latency percentiles and the process's
+        peak RSS so far (`rss_isolated` is False: earlier work in this process counts too)
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode '{mode}'. Expected one of: {', '.join(MODES)}")
+
+    timed = TimingBackend(backend or FakeBackend(latency_median=0.005))
+    scheduler = RequestScheduler.from_env()
+    hedging = HedgingPolicy(enabled=hedge)
+    configure_scheduler(scheduler)
+    configure_hedging(hedging)
+    set_backend(timed)
+    api_key = "offline-benchmark"
+
+    try:
+        start_time = time.perf_counter()
+        with cache_disabled(), open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            sentences = sentences_creator(api_key, count=num_sentences)
+            if mode == "sequential":
+                results = translate_sequentially(sentences, api_key, total=num_sentences)
+            elif mode == "concurrent":
+                results = asyncio.run(translate_concurrently(sentences, api_key, concurrency))
+            else:
+                results = translate_in_batches(sentences, api_key, batch_size)
+        elapsed = time.perf_counter() - start_time
+    finally:
+        set_backend(None)
+        configure_scheduler(None)
+        configure_hedging(None)
+
+    return {
+        'mode': mode,
+        'sentences': num_sentences,
+        'completed': len(results),
+        'elapsed_s': elapsed,
+        'sentences_per_sec': len(results) / elapsed if elapsed > 0 else 0.0,
+        'hops': {hop: latency_percentiles(values) for hop, values in sorted(timed.latencies.items())},
+        'scheduler': scheduler.stats(),
+        'hedging': hedging.stats(),
+        'peak_rss_mb': peak_rss_mb(),
+        'rss_isolated': False,
+    }
+
+
+def print_report(report: Dict) -> None:
+    """Print one benchmark result as a small table."""
+    print("=" * 70)
+    print(f"{report['mode'].upper()} | {report['sentences']} sentences | "
+          f"{report['completed']} completed in {report['elapsed_s']:.2f}s")
+    print("=" * 70)
+    print(f"  Throughput:  {report['sentences_per_sec']:.2f} sentences/sec")
+    if report['peak_rss_mb'] is not None:
+        scope = "" if report.get('rss_isolated') else " (process lifetime, includes earlier runs)"
+        print(f"  Peak RSS:    {report['peak_rss_mb']:.1f} MB{scope}")
+    scheduler = report['scheduler']
+    print(f"  Retries:     {scheduler['retries']} ({scheduler['throttled']} throttled, "
+          f"{scheduler['failures']} gave up, final in-flight limit {scheduler['concurrency_limit']})")
+    hedging = report.get('hedging')
+    if hedging and hedging['enabled']:
+        print(f"  Hedges:      {hedging['hedged']} fired on {hedging['calls']} calls, {hedging['wins']} won, "
+              f"{hedging['over_budget']} skipped over budget")
+    print(f"  {'Hop':<20}{'Calls':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for hop, stats in report['hops'].items():
+        print(f"  {hop:<20}{stats['calls']:>8}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}")
+    print()
+
+
+def run_isolated(size: int, args: argparse.Namespace) -> Dict:
+    """
+    Benchmark one corpus size in a fresh interpreter, so its peak RSS is its own.
+
+    Args:
+        size: Corpus size
+        args: Parsed command-line options (everything but --sizes and --output is forwarded)
+
+    Returns:
+        The run's report, with `rss_isolated` set
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        output = Path(tmp) / "benchmark_results.json"
+        command = [
+            sys.executable, str(Path(__file__).resolve()), "--in-process", "--sizes", str(size),
+            "--mode", args.mode, "--concurrency", str(args.concurrency), "--batch-size", str(args.batch_size),
+            "--latency-ms", str(args.latency_ms), "--latency-sigma", str(args.latency_sigma),
+            "--error-rate", str(args.error_rate), "--rate-limit-rate", str(args.rate_limit_rate),
+            "--seed", str(args.seed), "--output", str(output),
+        ]
+        if args.hedge:
+            command.append("--hedge")
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+        with open(output, encoding='utf-8') as f:
+            report = json.load(f)['benchmarks'][0]
+    report['rss_isolated'] = True
+    return report
+
+
+def main(argv: Optional[List[str]] = None):
+    """Command-line entry point: benchmark the pipeline offline at several corpus sizes."""
+    parser = argparse.ArgumentParser(description="Offline throughput benchmark with a simulated LLM backend")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Corpus sizes to run")
+    parser.add_argument("--mode", choices=MODES, default="concurrent")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="Median simulated latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Log-normal tail shape")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of calls failing with a 5xx")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of calls failing with a 429")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--hedge", action="store_true", help="Hedge calls slower than each hop's recent p95")
+    parser.add_argument("--output", type=Path, default=Path("Insights") / "benchmark_results.json")
+    parser.add_argument("--in-process", action="store_true",
+                        help="Run every size in this process (faster; peak RSS is then cumulative across sizes)")
+    args = parser.parse_args(argv)
+
+    reports = []
+    for size in args.sizes:
+        if args.in_process:
+            backend = FakeBackend(latency_median=args.latency_ms / 1000.0, latency_sigma=args.latency_sigma,
+                                  error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate, seed=args.seed)
+            report = run_benchmark(size, args.mode, args.concurrency, args.batch_size, backend, hedge=args.hedge)
+        else:
+            report = run_isolated(size, args)
+        print_report(report)
+        reports.append(report)
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({'benchmarks': reports}, f, indent=2)
+    print(f"✓ Benchmark results saved: {args.output}")
+
+    return reports
+
+
+if __name__ == "__main__":
+    main()
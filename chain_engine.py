@@ -0,0 +1,376 @@
+import os
+import re
+import json
+import time
+import asyncio
+import argparse
+from pathlib import Path
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from dotenv import load_dotenv
+
+from claude_client import call_claude_agent, async_call_claude_agent
+
+
+LANGUAGES = {
+    "en": "English",
+    "es": "Spanish",
+    "he": "Hebrew",
+    "fr": "French",
+    "de": "German",
+    "it": "Italian",
+    "pt": "Portuguese",
+    "ru": "Russian",
+    "ar": "Arabic",
+    "zh": "Chinese",
+    "ja": "Japanese",
+}
+DEFAULT_CHAINS = ("en→es→he→en",)
+DEFAULT_CONCURRENCY = 10
+
+_ARROW = "→"
+_SEPARATOR_RE = re.compile(r"\s*(?:→|->|>|-|,)\s*")
+
+Chain = Tuple[str, ...]
+ChainResultCallback = Callable[[int, Dict], None]
+
+
+def parse_chain(chain: str) -> Chain:
+    """
+    Parse a chain such as "EN→ES→HE→EN", "en-es-he-en" or "en,es,he,en".
+
+    Returns:
+        Tuple of lower-case language codes
+
+    Raises:
+        ValueError: For unknown languages or chains with fewer than two languages
+    """
+    codes = tuple(code.lower() for code in _SEPARATOR_RE.split(chain.strip()) if code)
+    unknown = [code for code in codes if code not in LANGUAGES]
+    if unknown:
+        raise ValueError(f"Unknown language code(s) {', '.join(unknown)} in chain '{chain}'. "
+                         f"Known: {', '.join(LANGUAGES)}")
+    if len(codes) < 2:
+        raise ValueError(f"Chain '{chain}' needs at least two languages")
+    return codes
+
+
+def chain_name(chain: Sequence[str]) -> str:
+    """Canonical name of a chain or prefix, e.g. 'en→es→he'."""
+    return _ARROW.join(chain)
+
+
+def translation_system_prompt(source: str, target: str) -> str:
+    """
+    System prompt of the translator agent for one hop.
+
+    Uses the same wording as agent_english_spanish / agent_spanish_hebrew /
+    agent_hebrew_english, so the engine shares their translation cache entries.
+    """
+    source_name, target_name = LANGUAGES[source], LANGUAGES[target]
+    return (f"You are a translation agent. Your ONLY task is to translate from {source_name} to {target_name}. "
+            f"Output ONLY the translated {target_name} text with no explanations, comments, or additional text whatsoever.")
+
+
+def hop_agent_name(source: str, target: str) -> str:
+    """Agent name a hop is recorded under in agent_metrics (e.g. 'english_spanish')."""
+    return f"{LANGUAGES[source].lower()}_{LANGUAGES[target].lower()}"
+
+
+@dataclass
+class HopNode:
+    """
+    One node of the chain trie: the text in `language` reached by the path from the root.
+
+    Attributes:
+        language: Language of the text at this node
+        path: Languages from the root to this node
+        children: Next hops keyed by target language
+        chains: Names of the chains that end at this node
+    """
+    language: str
+    path: Chain
+    children: Dict[str, "HopNode"] = field(default_factory=dict)
+    chains: List[str] = field(default_factory=list)
+
+
+class ChainTrie:
+    """
+    Declarative chains merged into a trie of hops.
+
+    Every edge is one translation call per sentence, so chains that share a
+    prefix (en→es→he→en and en→es→fr→en share en→es) translate that prefix
+    once and branch from its output.
+
+    Args:
+        chains: Chains as strings ("en→es→he→en") or language-code sequences;
+            all must start from the corpus language
+    """
+
+    def __init__(self, chains: Iterable):
+        parsed = [parse_chain(chain) if isinstance(chain, str) else tuple(chain) for chain in chains]
+        if not parsed:
+            raise ValueError("At least one chain is required")
+        sources = {chain[0] for chain in parsed}
+        if len(sources) != 1:
+            raise ValueError(f"All chains must start from the same language, got {', '.join(sorted(sources))}")
+
+        self.chains = [chain_name(chain) for chain in parsed]
+        self.root = HopNode(parsed[0][0], (parsed[0][0],))
+        for chain in parsed:
+            node = self.root
+            for language in chain[1:]:
+                if language not in node.children:
+                    node.children[language] = HopNode(language, node.path + (language,))
+                node = node.children[language]
+            if chain_name(chain) not in node.chains:
+                node.chains.append(chain_name(chain))
+
+    def nodes(self) -> Iterable[HopNode]:
+        """Every node below the root, parents before children."""
+        stack = list(reversed(self.root.children.values()))
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.children.values()))
+
+    @property
+    def calls_per_sentence(self) -> int:
+        """Translation calls per sentence with prefix sharing (one per trie edge)."""
+        return sum(1 for _ in self.nodes())
+
+    @property
+    def unshared_calls_per_sentence(self) -> int:
+        """Translation calls per sentence if every chain ran on its own."""
+        return sum(len(parse_chain(chain)) - 1 for chain in self.chains)
+
+    def sharing_report(self, sentences: int) -> Dict[str, int]:
+        """Calls made and saved by prefix sharing over `sentences` sentences."""
+        return {
+            'sentences': sentences,
+            'chains': len(self.chains),
+            'calls_per_sentence': self.calls_per_sentence,
+            'unshared_calls_per_sentence': self.unshared_calls_per_sentence,
+            'calls': self.calls_per_sentence * sentences,
+            'calls_saved': (self.unshared_calls_per_sentence - self.calls_per_sentence) * sentences,
+        }
+
+
+def run_chain(text: str, chain: Sequence[str], api_key: str) -> List[str]:
+    """
+    Translate one text along a single chain, raising on the first failed hop.
+
+    This is the engine's path for the classic round trip (orchestrator.chained_round_trip);
+    translate_chains instead records a failed hop and carries on with the other branches.
+
+    Args:
+        text: Text in the chain's first language
+        chain: Language codes, e.g. parse_chain("en→es→he→en")
+        api_key: Claude API key
+
+    Returns:
+        The text after each hop, in chain order
+    """
+    outputs = []
+    for source, target in zip(chain, chain[1:]):
+        text = call_claude_agent(text, translation_system_prompt(source, target), api_key,
+                                 cache=True, agent=hop_agent_name(source, target))
+        outputs.append(text)
+    return outputs
+
+
+async def run_chain_async(text: str, chain: Sequence[str], api_key: str) -> List[str]:
+    """Async variant of run_chain."""
+    outputs = []
+    for source, target in zip(chain, chain[1:]):
+        text = await async_call_claude_agent(text, translation_system_prompt(source, target), api_key,
+                                             cache=True, agent=hop_agent_name(source, target))
+        outputs.append(text)
+    return outputs
+
+
+def _record(result: Dict, node: HopNode, text: str) -> None:
+    result['outputs'][chain_name(node.path)] = text
+    for name in node.chains:
+        result['chains'][name] = text
+
+
+def _run_subtree(node: HopNode, text: str, api_key: str, result: Dict, index: int) -> None:
+    for child in node.children.values():
+        try:
+            translated = call_claude_agent(text, translation_system_prompt(node.language, child.language), api_key,
+                                           cache=True, agent=hop_agent_name(node.language, child.language))
+        except Exception as e:
+            print(f"ERROR on sentence {index + 1}, hop {chain_name(child.path)}: {str(e)}")
+            result['errors'][chain_name(child.path)] = str(e)
+            continue
+        _record(result, child, translated)
+        _run_subtree(child, translated, api_key, result, index)
+
+
+async def _run_subtree_async(node: HopNode, text: str, api_key: str, result: Dict, index: int) -> None:
+    async def branch(child: HopNode) -> None:
+        try:
+            translated = await async_call_claude_agent(
+                text, translation_system_prompt(node.language, child.language), api_key,
+                cache=True, agent=hop_agent_name(node.language, child.language))
+        except Exception as e:
+            print(f"ERROR on sentence {index + 1}, hop {chain_name(child.path)}: {str(e)}")
+            result['errors'][chain_name(child.path)] = str(e)
+            return
+        _record(result, child, translated)
+        await _run_subtree_async(child, translated, api_key, result, index)
+
+    # Sibling branches only depend on this node's output, so they run side by side
+    await asyncio.gather(*(branch(child) for child in node.children.values()))
+
+
+def _new_result(index: int, original: str) -> Dict:
+    return {'index': index, 'original': original, 'outputs': {}, 'chains': {}, 'errors': {}}
+
+
+def translate_chains(sentences: Iterable[str], trie: ChainTrie, api_key: str,
+                     on_result: Optional[ChainResultCallback] = None) -> List[Dict]:
+    """
+    Run every sentence through all chains of the trie, one sentence at a time.
+
+    Args:
+        sentences: Iterable of sentences in the trie's root language
+        trie: Chains to run
+        api_key: Claude API key for all agent operations
+        on_result: Optional callback invoked with (index, result) as each sentence completes
+
+    Returns:
+        One result per sentence with 'index', 'original', 'outputs' (text at every
+        trie node, keyed by path, intermediate hops included), 'chains' (final
+        text per chain) and 'errors' (failed hops; their chains are missing)
+    """
+    results = []
+    for index, original in enumerate(sentences):
+        result = _new_result(index, original)
+        _run_subtree(trie.root, original, api_key, result, index)
+        results.append(result)
+        if on_result is not None:
+            on_result(index, result)
+    return results
+
+
+async def translate_chains_concurrently(sentences: Iterable[str], trie: ChainTrie, api_key: str,
+                                        concurrency: int = DEFAULT_CONCURRENCY,
+                                        on_result: Optional[ChainResultCallback] = None) -> List[Dict]:
+    """
+    Async variant of translate_chains with up to `concurrency` sentences in flight.
+
+    Sentences are admitted as slots free up (as in orchestrator.translate_concurrently)
+    and results keep the input order.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+
+    semaphore = asyncio.Semaphore(concurrency)
+    iterator = iter(sentences)
+    tasks = []
+
+    async def run_one(index: int, original: str) -> Dict:
+        try:
+            result = _new_result(index, original)
+            await _run_subtree_async(trie.root, original, api_key, result, index)
+        finally:
+            semaphore.release()
+        if on_result is not None:
+            on_result(index, result)
+        return result
+
+    while True:
+        await semaphore.acquire()
+        original = await asyncio.to_thread(next, iterator, None)
+        if original is None:
+            semaphore.release()
+            break
+        tasks.append(asyncio.create_task(run_one(len(tasks), original)))
+
+    return list(await asyncio.gather(*tasks))
+
+
+def report_prefix_sharing(trie: ChainTrie, sentences: int) -> Dict[str, int]:
+    """Print and return how many calls the shared prefixes saved."""
+    report = trie.sharing_report(sentences)
+    print(f"Prefix sharing: {report['calls_per_sentence']} hop calls per sentence instead of "
+          f"{report['unshared_calls_per_sentence']} for {report['chains']} chains "
+          f"(saved {report['calls_saved']} calls over {sentences} sentences)")
+    return report
+
+
+def run_chains(api_key: str, chains: Sequence[str] = DEFAULT_CHAINS, num_sentences: int = 100,
+               concurrency: int = 1, output_dir: Path = Path("Insights")) -> Dict:
+    """
+    Generate a corpus, run it through several chains and save the results.
+
+    Writes chain_results.json to `output_dir` with the prefix-sharing report
+    and every sentence's intermediate and final outputs.
+
+    Args:
+        api_key: Claude API key for all agent operations
+        chains: Chain declarations, e.g. ["en→es→he→en", "en→es→fr→en", "en→de→en"]
+        num_sentences: Corpus size
+        concurrency: Sentences in flight (1 = sequential)
+        output_dir: Where chain_results.json is written
+
+    Returns:
+        The saved document
+    """
+    from agent_sentences_creator import sentences_creator
+    from orchestrator import report_throughput
+
+    trie = ChainTrie(chains)
+    print("=" * 70)
+    print("CHAIN ENGINE")
+    print("=" * 70)
+    for name in trie.chains:
+        print(f"Chain: {name}")
+    print()
+
+    start_time = time.perf_counter()
+    sentences = sentences_creator(api_key, count=num_sentences)
+    if concurrency > 1:
+        results = asyncio.run(translate_chains_concurrently(sentences, trie, api_key, concurrency))
+    else:
+        results = translate_chains(sentences, trie, api_key)
+
+    print("\n" + "=" * 70)
+    report_throughput(len(results), time.perf_counter() - start_time)
+    sharing = report_prefix_sharing(trie, len(results))
+    print("=" * 70)
+
+    document = {'chains': trie.chains, 'prefix_sharing': sharing, 'results': results}
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    results_file = output_dir / "chain_results.json"
+    with open(results_file, 'w', encoding='utf-8') as f:
+        json.dump(document, f, indent=2, ensure_ascii=False)
+    print(f"✓ Chain results saved: {results_file}")
+    return document
+
+
+def main(argv: Optional[List[str]] = None):
+    """Command-line entry point: run several language chains over one corpus."""
+    parser = argparse.ArgumentParser(description="Run declarative translation chains with shared-prefix reuse")
+    parser.add_argument("chains", nargs="*", default=list(DEFAULT_CHAINS),
+                        help="Chains such as en-es-he-en en-es-fr-en en-de-en")
+    parser.add_argument("-n", "--sentences", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("-o", "--output-dir", type=Path, default=Path("Insights"))
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    api_key = os.getenv("ANTHROPIC_API_KEY")
+    if not api_key:
+        print("Error: ANTHROPIC_API_KEY not found in environment variables")
+        return
+
+    return run_chains(api_key, args.chains, args.sentences, args.concurrency, args.output_dir)
+
+
+if __name__ == "__main__":
+    main()
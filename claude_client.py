@@ -0,0 +1,459 @@
+import asyncio
+import importlib
+import os
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+import anthropic
+
+from llm_backend import LLMBackend, LLMResponse, LLMStream, RateLimitedError, TransientBackendError
+from request_scheduler import estimate_tokens, get_scheduler
+from request_hedging import get_hedging
+from pipeline_profiler import span
+from agent_metrics import get_agent_metrics
+from translation_cache import get_translation_cache
+
+
+DEFAULT_MODEL = "claude-3-haiku-20240307"
+DEFAULT_MAX_TOKENS = 1024
+
+
+@dataclass(frozen=True)
+class ClientConfig:
+    """
+    Connection pool and timeout settings shared by every agent.
+
+    Attributes:
+        max_connections: Upper bound on open connections in the pool
+        max_keepalive_connections: Idle connections kept alive for reuse
+        keepalive_expiry: Seconds an idle connection stays in the pool
+        connect_timeout: Seconds allowed to establish a connection
+        read_timeout: Seconds allowed to wait for a response
+        max_retries: Retries performed by the Anthropic SDK itself (off by default:
+            request_scheduler retries instead, so throttling reaches its AIMD controller)
+    """
+    max_connections: int = 20
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 60.0
+    connect_timeout: float = 10.0
+    read_timeout: float = 60.0
+    max_retries: int = 0
+
+    @classmethod
+    def from_env(cls) -> "ClientConfig":
+        """Build a config from TURINGCHAIN_* environment variables, falling back to the defaults."""
+        defaults = cls()
+        return cls(
+            max_connections=int(os.getenv("TURINGCHAIN_POOL_SIZE", defaults.max_connections)),
+            max_keepalive_connections=int(os.getenv("TURINGCHAIN_POOL_SIZE", defaults.max_keepalive_connections)),
+            keepalive_expiry=float(os.getenv("TURINGCHAIN_KEEPALIVE_EXPIRY", defaults.keepalive_expiry)),
+            connect_timeout=float(os.getenv("TURINGCHAIN_CONNECT_TIMEOUT", defaults.connect_timeout)),
+            read_timeout=float(os.getenv("TURINGCHAIN_READ_TIMEOUT", defaults.read_timeout)),
+            max_retries=int(os.getenv("TURINGCHAIN_MAX_RETRIES", defaults.max_retries)),
+        )
+
+
+_config = ClientConfig.from_env()
+_sync_clients: Dict[Tuple[str, ClientConfig], anthropic.Anthropic] = {}
+# Async clients are bound to the event loop that created their connections,
+# so they are pooled per running loop and dropped together with it.
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, ClientConfig], anthropic.AsyncAnthropic]]" = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def configure_client(config: ClientConfig) -> None:
+    """
+    Replace the pool configuration used for clients created from now on.
+
+    Clients already built keep their pools; call close_clients() first to rebuild them.
+
+    Args:
+        config: New connection pool and timeout settings
+    """
+    global _config
+    _config = config
+
+
+def _http_classes():
+    """Sync and async client classes of the httpx-compatible package the installed SDK is built on."""
+    if hasattr(anthropic, "DefaultHttpxClient"):
+        # Newer SDK releases ship their HTTP layer as httpx2 and reject plain httpx clients
+        return anthropic.DefaultHttpxClient, anthropic.DefaultAsyncHttpxClient
+    import httpx
+    return httpx.Client, httpx.AsyncClient
+
+
+def _httpx_settings(config: ClientConfig):
+    client_class, async_client_class = _http_classes()
+    base = next(cls for cls in client_class.__mro__ if not cls.__module__.startswith("anthropic"))
+    http = importlib.import_module(base.__module__.partition(".")[0])
+
+    limits = http.Limits(
+        max_connections=config.max_connections,
+        max_keepalive_connections=config.max_keepalive_connections,
+        keepalive_expiry=config.keepalive_expiry,
+    )
+    timeout = http.Timeout(config.read_timeout, connect=config.connect_timeout)
+    return client_class, async_client_class, limits, timeout
+
+
+def get_client(api_key: str) -> anthropic.Anthropic:
+    """
+    Return the shared synchronous client for an API key, creating it on first use.
+
+    The client owns a keep-alive connection pool, so consecutive calls reuse
+    the same TLS connections instead of opening a new one per request.
+
+    Args:
+        api_key: Claude API key
+
+    Returns:
+        A pooled anthropic.Anthropic client
+    """
+    key = (api_key, _config)
+    client = _sync_clients.get(key)
+    if client is None:
+        with _lock:
+            client = _sync_clients.get(key)
+            if client is None:
+                client_class, _, limits, timeout = _httpx_settings(_config)
+                client = anthropic.Anthropic(
+                    api_key=api_key,
+                    max_retries=_config.max_retries,
+                    timeout=timeout,
+                    http_client=client_class(limits=limits, timeout=timeout),
+                )
+                _sync_clients[key] = client
+    return client
+
+
+def get_async_client(api_key: str) -> anthropic.AsyncAnthropic:
+    """
+    Return the shared asynchronous client for an API key and the running event loop.
+
+    Must be called from inside a coroutine.
+
+    Args:
+        api_key: Claude API key
+
+    Returns:
+        A pooled anthropic.AsyncAnthropic client
+    """
+    key = (api_key, _config)
+    loop = asyncio.get_running_loop()
+    with _lock:
+        loop_clients = _async_clients.setdefault(loop, {})
+        client = loop_clients.get(key)
+        if client is None:
+            _, async_client_class, limits, timeout = _httpx_settings(_config)
+            client = anthropic.AsyncAnthropic(
+                api_key=api_key,
+                max_retries=_config.max_retries,
+                timeout=timeout,
+                http_client=async_client_class(limits=limits, timeout=timeout),
+            )
+            loop_clients[key] = client
+    return client
+
+
+def close_clients() -> None:
+    """Close the shared synchronous clients and forget every pooled client."""
+    with _lock:
+        for client in _sync_clients.values():
+            client.close()
+        _sync_clients.clear()
+        _async_clients.clear()
+
+
+def _retry_after(headers) -> Optional[float]:
+    """Seconds from a retry-after-ms / retry-after header, if present and numeric."""
+    if headers is None:
+        return None
+    try:
+        if headers.get("retry-after-ms") is not None:
+            return float(headers["retry-after-ms"]) / 1000.0
+        if headers.get("retry-after") is not None:
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+
+def _backend_error(error: anthropic.APIError) -> Exception:
+    """
+    Map an SDK error onto the backend error types the request scheduler retries.
+
+    429 and 529 (overloaded) become RateLimitedError, other 5xx responses and
+    connection problems become TransientBackendError; anything else (bad
+    request, authentication, ...) is returned unchanged and is not retried.
+    """
+    if isinstance(error, anthropic.APIConnectionError):
+        return TransientBackendError(str(error))
+    status_code = getattr(error, "status_code", None)
+    if status_code in (429, 529):
+        return RateLimitedError(str(error), _retry_after(error.response.headers), status_code)
+    if status_code is not None and status_code >= 500:
+        return TransientBackendError(str(error))
+    return error
+
+
+class AnthropicBackend(LLMBackend):
+    """The real Claude API, through the pooled sync/async clients above."""
+
+    name = "anthropic"
+
+    def create(self, model: str, max_tokens: int, system: str, prompt: str, api_key: str) -> LLMResponse:
+        try:
+            message = get_client(api_key).messages.create(
+                model=model,
+                max_tokens=max_tokens,
+                system=system,
+                messages=[
+                    {"role": "user", "content": prompt}
+                ]
+            )
+        except anthropic.APIError as e:
+            raise _backend_error(e) from e
+        return LLMResponse(message.content[0].text, message.usage.input_tokens, message.usage.output_tokens)
+
+    async def acreate(self, model: str, max_tokens: int, system: str, prompt: str, api_key: str) -> LLMResponse:
+        try:
+            message = await get_async_client(api_key).messages.create(
+                model=model,
+                max_tokens=max_tokens,
+                system=system,
+                messages=[
+                    {"role": "user", "content": prompt}
+                ]
+            )
+        except anthropic.APIError as e:
+            raise _backend_error(e) from e
+        return LLMResponse(message.content[0].text, message.usage.input_tokens, message.usage.output_tokens)
+
+    def stream(self, model: str, max_tokens: int, system: str, prompt: str, api_key: str) -> LLMStream:
+        manager = get_client(api_key).messages.stream(
+            model=model,
+            max_tokens=max_tokens,
+            system=system,
+            messages=[
+                {"role": "user", "content": prompt}
+            ]
+        )
+        try:
+            # Entering the manager sends the request, so 429/5xx surface here
+            message_stream = manager.__enter__()
+        except anthropic.APIError as e:
+            raise _backend_error(e) from e
+
+        usage = {}
+
+        def deltas():
+            try:
+                yield from message_stream.text_stream
+                final = message_stream.get_final_message().usage
+                usage['tokens'] = (final.input_tokens, final.output_tokens)
+            except anthropic.APIError as e:
+                raise _backend_error(e) from e
+
+        # The stream closes the response itself, even if it is never iterated
+        return LLMStream(deltas(), lambda: usage.get('tokens', (0, 0)),
+                         close=lambda: manager.__exit__(None, None, None))
+
+
+_backend: Optional[LLMBackend] = None
+
+
+def set_backend(backend: Optional[LLMBackend]) -> None:
+    """
+    Route every agent call through `backend` (None restores the default).
+
+    Args:
+        backend: Backend instance, e.g. fake_backend.FakeBackend() for offline runs
+    """
+    global _backend
+    _backend = backend
+
+
+def get_backend() -> LLMBackend:
+    """
+    Return the active backend.
+
+    Defaults to the Claude API; TURINGCHAIN_BACKEND=fake selects the offline
+    simulated backend configured from TURINGCHAIN_FAKE_* variables.
+    """
+    global _backend
+    if _backend is None:
+        if os.getenv("TURINGCHAIN_BACKEND", "anthropic") == "fake":
+            from fake_backend import FakeBackend
+            _backend = FakeBackend.from_env()
+        else:
+            _backend = AnthropicBackend()
+    return _backend
+
+
+def call_claude_agent(prompt: str, system_prompt: str, api_key: str,
+                      model: str = DEFAULT_MODEL, max_tokens: int = DEFAULT_MAX_TOKENS,
+                      cache: bool = False, agent: str = "unknown",
+                      validate: Optional[Callable[[str], bool]] = None) -> str:
+    """
+    Helper function to call Claude API with a specific system prompt and user prompt.
+
+    The request goes through the process-wide RequestScheduler, which enforces
+    rate limits and retries throttled or transient failures. Inside it, each
+    attempt goes through the HedgingPolicy, which (when enabled) duplicates
+    attempts slower than the agent's recent p95 and keeps the first response;
+    each hedge takes its own scheduler admission, so none fire while the
+    scheduler backs off from throttling or has no free slot or rate budget.
+
+    Args:
+        prompt: The user message/prompt to send to Claude
+        system_prompt: The system prompt that defines the agent's role
+        api_key: Claude API key
+        model: Claude model identifier
+        max_tokens: Maximum number of tokens in the response
+        cache: Serve and store the response through the persistent translation
+            cache (only for deterministic agents such as the translators)
+        agent: Name the call is recorded under in agent_metrics
+        validate: With cache=True, only responses for which this returns True are
+            stored or served from the cache (e.g. well-formed batch envelopes)
+
+    Returns:
+        The text response from Claude
+    """
+    backend = get_backend()
+    # Simulated backends get their own cache namespace so fake output never
+    # masquerades as a real translation
+    cache_model = model if backend.name == AnthropicBackend.name else f"{backend.name}/{model}"
+    metrics = get_agent_metrics()
+    response_cache = get_translation_cache() if cache else None
+    if response_cache is not None:
+        cached = response_cache.get(cache_model, system_prompt, max_tokens, prompt)
+        if cached is not None and (validate is None or validate(cached)):
+            metrics.record_cache_hit(agent)
+            return cached
+
+    start = time.perf_counter()
+    try:
+        with span(agent, "api"):
+            hedging, scheduler = get_hedging(), get_scheduler()
+            estimated_tokens = estimate_tokens(system_prompt, prompt)
+            response = scheduler.call(
+                lambda: hedging.call(agent, lambda: backend.create(model, max_tokens, system_prompt, prompt, api_key),
+                                     lambda: scheduler.admit_hedge(estimated_tokens)),
+                estimated_tokens,
+            )
+    except Exception:
+        metrics.record_error(agent)
+        raise
+    metrics.record_call(agent, model, time.perf_counter() - start,
+                        response.input_tokens, response.output_tokens, response.retries)
+
+    if response_cache is not None and (validate is None or validate(response.text)):
+        response_cache.put(cache_model, system_prompt, max_tokens, prompt, response.text)
+    return response.text
+
+
+async def async_call_claude_agent(prompt: str, system_prompt: str, api_key: str,
+                                  model: str = DEFAULT_MODEL, max_tokens: int = DEFAULT_MAX_TOKENS,
+                                  cache: bool = False, agent: str = "unknown",
+                                  validate: Optional[Callable[[str], bool]] = None) -> str:
+    """
+    Async variant of call_claude_agent, sharing a pooled AsyncAnthropic client.
+
+    Args:
+        prompt: The user message/prompt to send to Claude
+        system_prompt: The system prompt that defines the agent's role
+        api_key: Claude API key
+        model: Claude model identifier
+        max_tokens: Maximum number of tokens in the response
+        cache: Serve and store the response through the persistent translation
+            cache (only for deterministic agents such as the translators)
+        agent: Name the call is recorded under in agent_metrics
+        validate: With cache=True, only responses for which this returns True are
+            stored or served from the cache (e.g. well-formed batch envelopes)
+
+    Returns:
+        The text response from Claude
+    """
+    backend = get_backend()
+    # Simulated backends get their own cache namespace so fake output never
+    # masquerades as a real translation
+    cache_model = model if backend.name == AnthropicBackend.name else f"{backend.name}/{model}"
+    metrics = get_agent_metrics()
+    response_cache = get_translation_cache() if cache else None
+    if response_cache is not None:
+        cached = response_cache.get(cache_model, system_prompt, max_tokens, prompt)
+        if cached is not None and (validate is None or validate(cached)):
+            metrics.record_cache_hit(agent)
+            return cached
+
+    start = time.perf_counter()
+    try:
+        with span(agent, "api"):
+            hedging, scheduler = get_hedging(), get_scheduler()
+            estimated_tokens = estimate_tokens(system_prompt, prompt)
+            response = await scheduler.acall(
+                lambda: hedging.acall(agent, lambda: backend.acreate(model, max_tokens, system_prompt, prompt, api_key),
+                                      lambda: scheduler.admit_hedge(estimated_tokens)),
+                estimated_tokens,
+            )
+    except Exception:
+        metrics.record_error(agent)
+        raise
+    metrics.record_call(agent, model, time.perf_counter() - start,
+                        response.input_tokens, response.output_tokens, response.retries)
+
+    if response_cache is not None and (validate is None or validate(response.text)):
+        response_cache.put(cache_model, system_prompt, max_tokens, prompt, response.text)
+    return response.text
+
+
+def stream_claude_agent_lines(prompt: str, system_prompt: str, api_key: str,
+                              model: str = DEFAULT_MODEL, max_tokens: int = DEFAULT_MAX_TOKENS,
+                              agent: str = "unknown") -> Iterator[str]:
+    """
+    Call Claude with the streaming messages API and yield each line as soon as it is complete.
+
+    Opening the stream goes through the request scheduler, so a throttled or
+    failed request is retried before the first line is yielded; an error in
+    the middle of a stream is raised to the caller instead (retrying would
+    repeat lines already yielded). The stream keeps its scheduler slot until
+    it is closed, which happens when this generator finishes or is closed.
+    Streamed responses are never cached.
+
+    Args:
+        prompt: The user message/prompt to send to Claude
+        system_prompt: The system prompt that defines the agent's role
+        api_key: Claude API key
+        model: Claude model identifier
+        max_tokens: Maximum number of tokens in the response
+        agent: Name the call is recorded under in agent_metrics
+
+    Yields:
+        Non-empty lines of the response, stripped of surrounding whitespace
+    """
+    backend = get_backend()
+    metrics = get_agent_metrics()
+    start = time.perf_counter()
+    try:
+        stream = get_scheduler().stream(
+            lambda: backend.stream(model, max_tokens, system_prompt, prompt, api_key),
+            estimate_tokens(system_prompt, prompt),
+        )
+    except Exception:
+        metrics.record_error(agent)
+        raise
+
+    with stream:
+        try:
+            for line in stream.lines():
+                if line.strip():
+                    yield line.strip()
+        except Exception:
+            metrics.record_error(agent)
+            raise
+    metrics.record_call(agent, model, time.perf_counter() - start,
+                        stream.input_tokens, stream.output_tokens, stream.retries)
@@ -0,0 +1,331 @@
+import os
+import json
+import shutil
+import argparse
+from array import array
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Union
+
+import numpy as np
+
+from result_stream import DEFAULT_PIPELINE, iter_results, write_json_csv
+
+
+FORMAT_NAME = "turingchain-columns"
+FORMAT_VERSION = 1
+COLUMNS_DIR_NAME = "translation_results.columns"
+EMBEDDING_CHUNK = 4096
+RESERVED_KEYS = ("index", "cosine_distance")
+
+Encoder = Callable[[List[str]], np.ndarray]
+
+
+class TextColumn:
+    """
+    Memory-mapped string column: a UTF-8 blob plus an int64 offsets array.
+
+    Row i is blob[offsets[i]:offsets[i + 1]]; only the rows that are read are
+    decoded, so reading one sentence of a million-row run touches a few pages.
+    """
+
+    def __init__(self, directory: Path, name: str):
+        self.name = name
+        self.offsets = np.load(directory / f"{name}.offsets.npy", mmap_mode='r')
+        blob_path = directory / f"{name}.blob"
+        # np.memmap cannot map an empty file
+        self.blob = np.memmap(blob_path, dtype=np.uint8, mode='r') if blob_path.stat().st_size else np.empty(0, np.uint8)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError(f"Row {row} out of range for column '{self.name}'")
+        return self.blob[self.offsets[row]:self.offsets[row + 1]].tobytes().decode("utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        for row in range(len(self)):
+            yield self[row]
+
+
+class _TextColumnWriter:
+    """Appends strings to a blob file and collects their end offsets."""
+
+    def __init__(self, directory: Path, name: str, leading_empty_rows: int = 0):
+        self.directory = directory
+        self.name = name
+        self._file = open(directory / f"{name}.blob", 'wb')
+        self._offsets = array('q', [0] * (leading_empty_rows + 1))
+
+    def append(self, text: str) -> None:
+        data = text.encode("utf-8")
+        self._file.write(data)
+        self._offsets.append(self._offsets[-1] + len(data))
+
+    def close(self) -> None:
+        self._file.close()
+        np.save(self.directory / f"{self.name}.offsets.npy", np.frombuffer(self._offsets, dtype=np.int64))
+
+
+class ColumnarWriter:
+    """
+    Streams result rows into a columnar directory.
+
+    Layout:
+    - manifest.json: format, row count, pipeline and the list of columns
+    - index.npy: sentence index of every row (int64)
+    - cosine_distance.npy: distance per row (float64, NaN when not evaluated)
+    - <text>.blob + <text>.offsets.npy: one pair per text column ('original',
+      'final_translated' and any intermediates such as 'spanish'/'hebrew')
+    - <text>_embedding.npy: optional float32 embedding matrix per text column
+
+    Everything is written into `<directory>.tmp` and moved into place on close,
+    so readers never see a half-written directory.
+
+    Args:
+        directory: Destination directory
+        pipeline: Pipeline description stored in the manifest
+    """
+
+    def __init__(self, directory: Path, pipeline: str = DEFAULT_PIPELINE):
+        self.directory = Path(directory)
+        self.pipeline = pipeline
+        self._staging = self.directory.with_name(self.directory.name + ".tmp")
+        if self._staging.exists():
+            shutil.rmtree(self._staging)
+        self._staging.mkdir(parents=True)
+        self._texts: Dict[str, _TextColumnWriter] = {}
+        self._index = array('q')
+        self._distances = array('d')
+        self._embeddings: Dict[str, int] = {}
+
+    @property
+    def rows(self) -> int:
+        return len(self._index)
+
+    @property
+    def text_columns(self) -> List[str]:
+        return list(self._texts)
+
+    def append(self, index: int, texts: Dict[str, str], distance: Optional[float] = None) -> None:
+        """
+        Add one row.
+
+        Args:
+            index: Sentence index
+            texts: Text columns of the row; columns it lacks get an empty string
+            distance: Cosine distance, or None when not evaluated
+        """
+        for name in texts:
+            if name not in self._texts:
+                self._texts[name] = _TextColumnWriter(self._staging, name, leading_empty_rows=self.rows)
+        for name, column in self._texts.items():
+            column.append(texts.get(name, ""))
+        self._index.append(index)
+        self._distances.append(float('nan') if distance is None else float(distance))
+
+    def add_embeddings(self, column: str, encoder: Encoder, chunk_size: int = EMBEDDING_CHUNK) -> None:
+        """
+        Store the embedding of every row of a text column, encoded chunk by chunk.
+
+        Must be called after the last append(). The matrix is written through a
+        memory map, so it never has to fit in RAM at once.
+
+        Args:
+            column: Text column to embed (e.g. 'original')
+            encoder: Function mapping a list of sentences to an embedding matrix
+            chunk_size: Sentences encoded per call
+        """
+        self._texts[column].close()
+        texts = TextColumn(self._staging, column)
+        matrix = None
+        for start in range(0, len(texts), chunk_size):
+            vectors = np.asarray(encoder(texts[start:start + chunk_size]), dtype=np.float32)
+            if matrix is None:
+                matrix = np.lib.format.open_memmap(self._staging / f"{column}_embedding.npy", mode='w+',
+                                                   dtype=np.float32, shape=(len(texts), vectors.shape[1]))
+            matrix[start:start + len(vectors)] = vectors
+        if matrix is not None:
+            matrix.flush()
+            self._embeddings[column] = int(matrix.shape[1])
+            del matrix
+
+    def close(self) -> Path:
+        """Write the numeric columns and manifest, then move the directory into place."""
+        for column in self._texts.values():
+            if not column._file.closed:
+                column.close()
+        np.save(self._staging / "index.npy", np.frombuffer(self._index, dtype=np.int64))
+        np.save(self._staging / "cosine_distance.npy", np.frombuffer(self._distances, dtype=np.float64))
+        with open(self._staging / "manifest.json", 'w', encoding='utf-8') as f:
+            json.dump({
+                'format': FORMAT_NAME,
+                'version': FORMAT_VERSION,
+                'rows': self.rows,
+                'pipeline': self.pipeline,
+                'text_columns': list(self._texts),
+                'embedding_columns': self._embeddings,
+            }, f, indent=2, ensure_ascii=False)
+
+        if self.directory.exists():
+            shutil.rmtree(self.directory)
+        os.replace(self._staging, self.directory)
+        return self.directory
+
+
+class ColumnarResults:
+    """
+    Read-only view of a columnar results directory.
+
+    Numeric columns and embeddings are memory-mapped; text columns are decoded
+    only row by row, so e.g. `ColumnarResults(path).distances.mean()` never
+    reads a single sentence.
+
+    Args:
+        directory: Directory written by ColumnarWriter
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        with open(self.directory / "manifest.json", 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        if self.manifest.get('format') != FORMAT_NAME or self.manifest.get('version', 0) > FORMAT_VERSION:
+            raise ValueError(f"{self.directory} is not a version {FORMAT_VERSION} {FORMAT_NAME} directory")
+
+    def __len__(self) -> int:
+        return self.manifest['rows']
+
+    @property
+    def text_columns(self) -> List[str]:
+        return list(self.manifest['text_columns'])
+
+    @property
+    def index(self) -> np.ndarray:
+        """Sentence index per row (memory-mapped)."""
+        return np.load(self.directory / "index.npy", mmap_mode='r')
+
+    @property
+    def distances(self) -> np.ndarray:
+        """Cosine distance per row, NaN where not evaluated (memory-mapped)."""
+        return np.load(self.directory / "cosine_distance.npy", mmap_mode='r')
+
+    def text(self, column: str) -> TextColumn:
+        """A text column, e.g. 'original' or 'final_translated'."""
+        if column not in self.manifest['text_columns']:
+            raise KeyError(f"No text column '{column}' (have: {', '.join(self.text_columns)})")
+        return TextColumn(self.directory, column)
+
+    def embeddings(self, column: str = "original") -> np.ndarray:
+        """Memory-mapped embedding matrix of a text column."""
+        if column not in self.manifest['embedding_columns']:
+            raise KeyError(f"No embeddings stored for column '{column}'")
+        return np.load(self.directory / f"{column}_embedding.npy", mmap_mode='r')
+
+    def iter_records(self) -> Iterator[Dict]:
+        """Rows as dictionaries (index, every text column, cosine_distance)."""
+        columns = {name: self.text(name) for name in self.text_columns}
+        index, distances = self.index, self.distances
+        for row in range(len(self)):
+            distance = float(distances[row])
+            record = {'index': int(index[row])}
+            record.update({name: column[row] for name, column in columns.items()})
+            record['cosine_distance'] = None if np.isnan(distance) else distance
+            yield record
+
+
+def build_columns_from_stream(stream_path: Path, directory: Path, distances: Optional[Dict[int, float]] = None,
+                              pipeline: str = DEFAULT_PIPELINE, encoder: Optional[Encoder] = None) -> int:
+    """
+    Convert a JSONL checkpoint into a columnar directory, one record at a time.
+
+    Every string field of a record becomes a text column, so intermediates
+    written with ResultStreamWriter.write(..., intermediates=...) are kept.
+
+    Args:
+        stream_path: JSONL checkpoint written by ResultStreamWriter
+        directory: Destination directory
+        distances: Optional cosine distance per sentence index
+        pipeline: Pipeline description stored in the manifest
+        encoder: If given, embeddings of every text column are stored as well
+
+    Returns:
+        Number of rows written
+    """
+    writer = ColumnarWriter(directory, pipeline)
+    for record in iter_results(stream_path):
+        texts = {key: value for key, value in record.items() if key not in RESERVED_KEYS and isinstance(value, str)}
+        writer.append(record['index'], texts, distances.get(record['index']) if distances is not None else None)
+    if encoder is not None:
+        for column in writer.text_columns:
+            writer.add_embeddings(column, encoder)
+    writer.close()
+    return writer.rows
+
+
+def export_json_csv(directory: Path, json_file: Path, csv_file: Path) -> int:
+    """
+    Write the classic translation_results.json/.csv from a columnar directory.
+
+    The output is byte-identical to what build_artifacts_from_stream writes.
+
+    Args:
+        directory: Directory written by ColumnarWriter
+        json_file: Destination of the JSON document
+        csv_file: Destination of the CSV file
+
+    Returns:
+        Number of results written
+    """
+    results = ColumnarResults(directory)
+    rows = ((record['original'], record['final_translated'], record['cosine_distance'])
+            for record in results.iter_records())
+    return write_json_csv(rows, len(results), json_file, csv_file, results.manifest['pipeline'])
+
+
+def main(argv: Optional[List[str]] = None):
+    """Command-line entry point: convert between the JSONL checkpoint, columns and JSON/CSV."""
+    parser = argparse.ArgumentParser(description="Columnar, memory-mapped translation results")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    to_json = subparsers.add_parser("to-json", help="Write translation_results.json/.csv from a columnar directory")
+    to_json.add_argument("columns", type=Path)
+    to_json.add_argument("-o", "--output-dir", type=Path, default=None, help="Default: next to the columns")
+
+    from_jsonl = subparsers.add_parser("from-jsonl", help="Build a columnar directory from a JSONL checkpoint")
+    from_jsonl.add_argument("stream", type=Path)
+    from_jsonl.add_argument("--embeddings", action="store_true", help="Also store embeddings of every text column")
+
+    info = subparsers.add_parser("info", help="Print the manifest and distance summary")
+    info.add_argument("columns", type=Path)
+    args = parser.parse_args(argv)
+
+    if args.command == "to-json":
+        output_dir = args.output_dir or args.columns.parent
+        output_dir.mkdir(parents=True, exist_ok=True)
+        json_file, csv_file = output_dir / "translation_results.json", output_dir / "translation_results.csv"
+        count = export_json_csv(args.columns, json_file, csv_file)
+        print(f"✓ {count} results exported: {json_file}, {csv_file}")
+        return count
+    if args.command == "from-jsonl":
+        from embedding_store import encode_sentences
+        directory = args.stream.with_name(COLUMNS_DIR_NAME)
+        count = build_columns_from_stream(args.stream, directory,
+                                          encoder=encode_sentences if args.embeddings else None)
+        print(f"✓ {count} results written: {directory}")
+        return count
+
+    results = ColumnarResults(args.columns)
+    distances = results.distances
+    evaluated = distances[~np.isnan(distances)]
+    print(json.dumps(results.manifest, indent=2, ensure_ascii=False))
+    if len(evaluated):
+        print(f"Distances: {len(evaluated)} evaluated, mean {evaluated.mean():.6f}, max {evaluated.max():.6f}")
+    return results.manifest
+
+
+if __name__ == "__main__":
+    main()
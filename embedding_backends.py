@@ -0,0 +1,246 @@
+import os
+import json
+import time
+import argparse
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+EMBEDDING_BACKENDS = ("torch", "int8", "onnx")
+DEFAULT_BACKEND = "torch"
+DEFAULT_TOKEN_BUDGET = 8192
+ONNX_QUANTIZED_FILE = "onnx/model_qint8_avx512_vnni.onnx"
+REFERENCE_CORPUS = Path("Insights") / "translation_results.json"
+
+
+def validate_backend(backend: str) -> str:
+    """Return `backend` if known, else raise ValueError listing the choices."""
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{backend}'. Expected one of: {', '.join(EMBEDDING_BACKENDS)}")
+    return backend
+
+
+def model_id(model_name: str, backend: str) -> str:
+    """
+    Name the vectors of a model/backend pair are stored and served under.
+
+    Quantized vectors differ slightly from fp32 ones, so each backend gets its
+    own embedding cache and the embedding server advertises which one it runs.
+    """
+    return model_name if backend == DEFAULT_BACKEND else f"{model_name}-{backend}"
+
+
+def load_model(model_name: str, backend: str = DEFAULT_BACKEND, threads: Optional[int] = None):
+    """
+    Load a SentenceTransformer on CPU with the requested backend.
+
+    - torch: fp32 PyTorch (the reference)
+    - int8:  PyTorch with the transformer's Linear layers dynamically quantized to int8
+    - onnx:  ONNX Runtime with the int8-quantized ONNX export shipped in the model
+             repository (needs `optimum[onnxruntime]`; TURINGCHAIN_EMBEDDING_ONNX_FILE
+             selects another file, e.g. onnx/model.onnx for fp32 ONNX)
+
+    Args:
+        model_name: sentence-transformers model name
+        backend: One of EMBEDDING_BACKENDS
+        threads: Intra-op CPU threads (None = library default)
+
+    Returns:
+        The loaded model
+    """
+    from sentence_transformers import SentenceTransformer
+
+    validate_backend(backend)
+    if backend == "onnx":
+        model_kwargs = {"file_name": os.getenv("TURINGCHAIN_EMBEDDING_ONNX_FILE", ONNX_QUANTIZED_FILE),
+                        "provider": "CPUExecutionProvider"}
+        if threads:
+            import onnxruntime
+            options = onnxruntime.SessionOptions()
+            options.intra_op_num_threads = threads
+            model_kwargs["session_options"] = options
+        return SentenceTransformer(model_name, device="cpu", backend="onnx", model_kwargs=model_kwargs)
+
+    import torch
+    if threads:
+        torch.set_num_threads(threads)
+    model = SentenceTransformer(model_name, device="cpu")
+    if backend == "int8":
+        transformer = model[0]
+        transformer.auto_model = torch.quantization.quantize_dynamic(
+            transformer.auto_model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+
+def estimate_token_lengths(texts: Sequence[str]) -> np.ndarray:
+    """Rough wordpiece count per text (~4 characters per token, plus [CLS] and [SEP])."""
+    return np.fromiter((len(text) // 4 + 3 for text in texts), dtype=np.int64, count=len(texts))
+
+
+def length_buckets(texts: Sequence[str], token_budget: int = DEFAULT_TOKEN_BUDGET) -> List[np.ndarray]:
+    """
+    Group texts of similar length into batches of at most `token_budget` padded tokens.
+
+    Texts are sorted by estimated length, so each batch pads to a length close
+    to its members'; short sentences get large batches and long ones small
+    batches, instead of a fixed batch size padded to its longest member.
+
+    Args:
+        texts: Sentences to embed
+        token_budget: Maximum batch size x longest estimated length per batch
+
+    Returns:
+        Arrays of indices into `texts`, one per batch, covering every text once
+    """
+    lengths = estimate_token_lengths(texts)
+    order = np.argsort(lengths, kind="stable")
+    buckets = []
+    start = 0
+    while start < len(order):
+        end = start + 1
+        # Sorted ascending, so the newest member is always the longest of the batch
+        while end < len(order) and (end - start + 1) * lengths[order[end]] <= token_budget:
+            end += 1
+        buckets.append(order[start:end])
+        start = end
+    return buckets
+
+
+def bucketed_encode(model, texts: Sequence[str], token_budget: int = DEFAULT_TOKEN_BUDGET) -> np.ndarray:
+    """
+    Encode texts batch by length bucket and return the rows in input order.
+
+    Args:
+        model: Object with a SentenceTransformer-style encode(texts, batch_size, convert_to_numpy)
+        texts: Sentences to embed
+        token_budget: Padded tokens per batch (see length_buckets)
+
+    Returns:
+        float32 array of shape (len(texts), dim)
+    """
+    texts = list(texts)
+    output: Optional[np.ndarray] = None
+    for bucket in length_buckets(texts, token_budget):
+        vectors = np.asarray(model.encode([texts[i] for i in bucket], batch_size=len(bucket),
+                                          convert_to_numpy=True), dtype=np.float32)
+        if output is None:
+            output = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+        output[bucket] = vectors
+    return output if output is not None else np.empty((0, 0), dtype=np.float32)
+
+
+def load_reference_pairs(path: Path = REFERENCE_CORPUS) -> List[Tuple[str, str]]:
+    """(original, final) pairs from a translation_results.json file."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [(result['original'], result['final_translated']) for result in json.load(f)['results']]
+
+
+def _spearman(a: np.ndarray, b: np.ndarray) -> float:
+    ranks_a = np.argsort(np.argsort(a)).astype(np.float64)
+    ranks_b = np.argsort(np.argsort(b)).astype(np.float64)
+    return float(np.corrcoef(ranks_a, ranks_b)[0, 1])
+
+
+def check_backend_accuracy(pairs: Sequence[Tuple[str, str]], backend: str = "int8", threads: Optional[int] = None,
+                           token_budget: int = DEFAULT_TOKEN_BUDGET, model_name: Optional[str] = None) -> Dict:
+    """
+    Compare a backend's cosine distances against the fp32 PyTorch baseline.
+
+    Both models embed the same reference pairs (no embedding cache involved),
+    and the report says how far the per-sentence distances move, whether the
+    sentence ranking survives, and how much faster the backend encodes.
+
+    Args:
+        pairs: Reference (original, final) pairs
+        backend: Backend to check against "torch"
+        threads: CPU threads for both models
+        token_budget: Padded tokens per batch
+        model_name: sentence-transformers model name (default: the evaluation model)
+
+    Returns:
+        Dictionary ready for json.dump
+    """
+    from embedding_store import EMBEDDING_MODEL_NAME
+    from streaming_evaluation import cosine_distances
+
+    model_name = model_name or EMBEDDING_MODEL_NAME
+    originals = [original for original, _ in pairs]
+    finals = [final for _, final in pairs]
+    runs = {}
+    for name in (DEFAULT_BACKEND, validate_backend(backend)):
+        model = load_model(model_name, name, threads)
+        bucketed_encode(model, originals[:8], token_budget)  # warm-up
+        start = time.perf_counter()
+        original_vectors = bucketed_encode(model, originals, token_budget)
+        final_vectors = bucketed_encode(model, finals, token_budget)
+        elapsed = time.perf_counter() - start
+        runs[name] = (original_vectors, final_vectors, cosine_distances(original_vectors, final_vectors), elapsed)
+
+    base_originals, _, base_distances, base_elapsed = runs[DEFAULT_BACKEND]
+    test_originals, _, test_distances, test_elapsed = runs[backend]
+    errors = np.abs(test_distances - base_distances)
+    # Agreement of the two models' embeddings for the same sentence
+    agreement = 1.0 - cosine_distances(base_originals, test_originals)
+    sentences = 2 * len(pairs)
+    return {
+        'backend': backend,
+        'model': model_id(model_name, backend),
+        'threads': threads,
+        'reference_pairs': len(pairs),
+        'fp32_mean_distance': float(base_distances.mean()),
+        'backend_mean_distance': float(test_distances.mean()),
+        'mean_abs_distance_error': float(errors.mean()),
+        'max_abs_distance_error': float(errors.max()),
+        'pearson': float(np.corrcoef(base_distances, test_distances)[0, 1]),
+        'spearman': _spearman(base_distances, test_distances),
+        'embedding_similarity_mean': float(agreement.mean()),
+        'embedding_similarity_min': float(agreement.min()),
+        'fp32_sentences_per_sec': sentences / base_elapsed if base_elapsed > 0 else 0.0,
+        'backend_sentences_per_sec': sentences / test_elapsed if test_elapsed > 0 else 0.0,
+        'speedup': base_elapsed / test_elapsed if test_elapsed > 0 else 0.0,
+    }
+
+
+def print_accuracy_report(report: Dict) -> None:
+    """Print the result of check_backend_accuracy."""
+    print("=" * 70)
+    print(f"EMBEDDING BACKEND CHECK: {report['backend']} vs. fp32 ({report['reference_pairs']} reference pairs)")
+    print("=" * 70)
+    print(f"  Mean distance:        {report['fp32_mean_distance']:.6f} (fp32) vs. "
+          f"{report['backend_mean_distance']:.6f} ({report['backend']})")
+    print(f"  Distance error:       mean {report['mean_abs_distance_error']:.6f}, "
+          f"max {report['max_abs_distance_error']:.6f}")
+    print(f"  Correlation:          Pearson {report['pearson']:.4f}, Spearman {report['spearman']:.4f}")
+    print(f"  Embedding similarity: mean {report['embedding_similarity_mean']:.4f}, "
+          f"min {report['embedding_similarity_min']:.4f}")
+    print(f"  Throughput:           {report['fp32_sentences_per_sec']:.1f} → "
+          f"{report['backend_sentences_per_sec']:.1f} sentences/sec ({report['speedup']:.2f}x)")
+
+
+def main(argv: Optional[List[str]] = None):
+    """Command-line entry point: check a quantized backend against fp32 on a reference corpus."""
+    parser = argparse.ArgumentParser(description="Accuracy and speed of an embedding backend against fp32")
+    parser.add_argument("--backend", choices=[b for b in EMBEDDING_BACKENDS if b != DEFAULT_BACKEND], default="int8")
+    parser.add_argument("--threads", type=int, default=None, help="CPU threads (default: library default)")
+    parser.add_argument("--token-budget", type=int, default=DEFAULT_TOKEN_BUDGET, help="Padded tokens per batch")
+    parser.add_argument("--reference", type=Path, default=REFERENCE_CORPUS,
+                        help="translation_results.json with the reference pairs")
+    parser.add_argument("-o", "--output-dir", type=Path, default=Path("Insights"))
+    args = parser.parse_args(argv)
+
+    report = check_backend_accuracy(load_reference_pairs(args.reference), args.backend, args.threads,
+                                    args.token_budget)
+    print_accuracy_report(report)
+
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    report_file = args.output_dir / "embedding_backend_check.json"
+    with open(report_file, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"✓ Backend check saved: {report_file}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+import os
+import json
+import time
+import queue
+import argparse
+import threading
+import http.client
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from embedding_backends import EMBEDDING_BACKENDS
+from embedding_store import (Encoder, configure_embedding_backend, embedding_model_id, encode_sentences,
+                             encode_with_model, get_embedding_store)
+
+
+DEFAULT_ADDRESS = "127.0.0.1:8765"
+DEFAULT_MAX_BATCH = 256
+DEFAULT_MAX_WAIT = 0.005
+CLIENT_CHUNK = 4096
+HEALTH_TIMEOUT = 0.2
+REQUEST_TIMEOUT = 300.0
+RESOLVE_TTL = 30.0
+
+
+class _Pending:
+    """One client request waiting in the batcher."""
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.result: Optional[np.ndarray] = None
+        self.error: Optional[Exception] = None
+        self.done = threading.Event()
+
+
+class DynamicBatcher:
+    """
+    Merges encode requests from concurrent clients into shared model batches.
+
+    A single thread owns the encoder. It takes the first waiting request, then
+    keeps collecting requests for up to `max_wait` seconds or until
+    `max_batch` texts are gathered, encodes them in one call and hands each
+    client its rows.
+
+    Args:
+        encoder: Function mapping a list of sentences to an embedding matrix
+        max_batch: Texts per model batch (a single larger request still runs whole)
+        max_wait: Seconds to wait for more requests after the first one arrives
+    """
+
+    def __init__(self, encoder: Encoder, max_batch: int = DEFAULT_MAX_BATCH, max_wait: float = DEFAULT_MAX_WAIT):
+        self.encoder = encoder
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.requests = 0
+        self.batches = 0
+        self.texts = 0
+        self._queue: "queue.Queue[Optional[_Pending]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._thread.start()
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts as part of the next batch (blocks until it is done)."""
+        pending = _Pending(texts)
+        self._queue.put(pending)
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _collect(self, first: _Pending) -> Tuple[List[_Pending], bool]:
+        batch, size = [first], len(first.texts)
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                pending = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if pending is None:
+                return batch, True
+            batch.append(pending)
+            size += len(pending.texts)
+        return batch, False
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch, stopping = self._collect(first)
+            texts = [text for pending in batch for text in pending.texts]
+            try:
+                vectors = np.asarray(self.encoder(texts), dtype=np.float32)
+            except Exception as e:
+                for pending in batch:
+                    pending.error = e
+                    pending.done.set()
+                continue
+
+            self.requests += len(batch)
+            self.batches += 1
+            self.texts += len(texts)
+            offset = 0
+            for pending in batch:
+                pending.result = vectors[offset:offset + len(pending.texts)]
+                offset += len(pending.texts)
+                pending.done.set()
+
+    def stats(self) -> Dict[str, float]:
+        """Requests served, model batches run and texts encoded."""
+        return {
+            'requests': self.requests,
+            'batches': self.batches,
+            'texts': self.texts,
+            'texts_per_batch': self.texts / self.batches if self.batches else 0.0,
+        }
+
+    def close(self) -> None:
+        """Finish the batches already queued and stop the batcher thread."""
+        self._queue.put(None)
+        self._thread.join()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def _reply(self, status: int, body: bytes, content_type: str, headers: Optional[Dict[str, str]] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        if self.path != "/health":
+            self._reply(404, b"not found", "text/plain")
+            return
+        store = get_embedding_store(self.server.store_model, create=False)
+        body = json.dumps({'model': self.server.model_name, **self.server.batcher.stats(),
+                           'store': store.stats() if store is not None else None}).encode("utf-8")
+        self._reply(200, body, "application/json")
+
+    def do_POST(self) -> None:
+        if self.path != "/encode":
+            self._reply(404, b"not found", "text/plain")
+            return
+        try:
+            texts = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))['texts']
+            vectors = self.server.batcher.encode(texts) if texts else np.empty((0, 0), dtype=np.float32)
+        except Exception as e:
+            self._reply(500, str(e).encode("utf-8"), "text/plain")
+            return
+        # Raw little-endian float32 rows; the shape travels in a header
+        self._reply(200, np.ascontiguousarray(vectors, dtype='<f4').tobytes(), "application/octet-stream",
+                    {"X-Embedding-Shape": f"{vectors.shape[0]},{vectors.shape[1] if vectors.ndim == 2 else 0}"})
+
+
+class EmbeddingServer(ThreadingHTTPServer):
+    """
+    Long-lived localhost HTTP server keeping the embedding model warm.
+
+    POST /encode with {"texts": [...]} returns float32 rows (shape in the
+    X-Embedding-Shape header); GET /health returns the model name, batching
+    counters and the server's embedding store counters. Requests from all clients go through one DynamicBatcher.
+
+    Args:
+        address: "host:port" to listen on (port 0 picks a free port)
+        encoder: Encoder behind the batcher (default: the resident
+            SentenceTransformer, through this process's embedding store)
+        max_batch: Texts per model batch
+        max_wait: Seconds a batch waits for more requests
+        model_name: Name reported by /health (default: the configured model and backend,
+            e.g. 'all-MiniLM-L6-v2-int8'); clients only use a server whose name matches theirs
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address: str = DEFAULT_ADDRESS, encoder: Optional[Encoder] = None,
+                 max_batch: int = DEFAULT_MAX_BATCH, max_wait: float = DEFAULT_MAX_WAIT,
+                 model_name: Optional[str] = None):
+        host, port = parse_address(address)
+        super().__init__((host, port), _Handler)
+        # Explicit encoder, so the server never tries to call itself
+        model = embedding_model_id()
+        self.batcher = DynamicBatcher(encoder or (lambda texts: encode_sentences(texts, encode_with_model, model)),
+                                      max_batch, max_wait)
+        self.model_name = model_name or model
+        self.store_model = model
+
+    @property
+    def address(self) -> str:
+        host, port = self.server_address[:2]
+        return f"{host}:{port}"
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.batcher.close()
+
+
+def parse_address(address: str) -> Tuple[str, int]:
+    """Split "host:port" (or just "port") into its parts."""
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+class EmbeddingClient:
+    """
+    Client of a running EmbeddingServer; an instance is usable as an Encoder.
+
+    Args:
+        address: "host:port" of the server
+        timeout: Seconds to wait for an encode request
+    """
+
+    def __init__(self, address: str = DEFAULT_ADDRESS, timeout: float = REQUEST_TIMEOUT):
+        self.address = address
+        self.timeout = timeout
+
+    def _connection(self, timeout: float) -> http.client.HTTPConnection:
+        host, port = parse_address(self.address)
+        return http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def health(self, timeout: float = HEALTH_TIMEOUT) -> Optional[Dict]:
+        """The server's /health document, or None if it is not reachable."""
+        connection = self._connection(timeout)
+        try:
+            connection.request("GET", "/health")
+            response = connection.getresponse()
+            return json.loads(response.read()) if response.status == 200 else None
+        except (OSError, ValueError, http.client.HTTPException):
+            return None
+        finally:
+            connection.close()
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        """Encode texts on the server, in chunks of CLIENT_CHUNK."""
+        chunks = []
+        for start in range(0, len(texts), CLIENT_CHUNK):
+            connection = self._connection(self.timeout)
+            try:
+                body = json.dumps({'texts': texts[start:start + CLIENT_CHUNK]}).encode("utf-8")
+                connection.request("POST", "/encode", body, {"Content-Type": "application/json"})
+                response = connection.getresponse()
+                data = response.read()
+                if response.status != 200:
+                    raise RuntimeError(f"Embedding server error {response.status}: {data.decode('utf-8', 'replace')}")
+                rows, dim = (int(value) for value in response.getheader("X-Embedding-Shape").split(","))
+                chunks.append(np.frombuffer(data, dtype='<f4').reshape(rows, dim))
+            finally:
+                connection.close()
+        return np.concatenate(chunks) if chunks else np.empty((0, 0), dtype=np.float32)
+
+
+_resolved: Tuple[float, Optional[EmbeddingClient]] = (float('-inf'), None)
+_resolved_lock = threading.Lock()
+
+
+def get_embedding_client() -> Optional[EmbeddingClient]:
+    """
+    Client of the local embedding server if one is running, else None.
+
+    TURINGCHAIN_EMBEDDING_SERVER sets the address ("off" disables the lookup).
+    A server running a different model or embedding backend is ignored.
+    The answer is re-checked at most every RESOLVE_TTL seconds.
+    """
+    global _resolved
+    address = os.getenv("TURINGCHAIN_EMBEDDING_SERVER", DEFAULT_ADDRESS)
+    if address == "off":
+        return None
+    with _resolved_lock:
+        checked_at, client = _resolved
+        if time.monotonic() - checked_at < RESOLVE_TTL and (client is None or client.address == address):
+            return client
+        candidate = EmbeddingClient(address)
+        health = candidate.health()
+        # A server running another backend would mix its vectors into this process's cache
+        client = candidate if health is not None and health.get('model') == embedding_model_id() else None
+        _resolved = (time.monotonic(), client)
+        return client
+
+
+def forget_embedding_client() -> None:
+    """Drop the cached lookup so the next call checks for a server again."""
+    global _resolved
+    with _resolved_lock:
+        _resolved = (float('-inf'), None)
+
+
+def main(argv: Optional[List[str]] = None):
+    """Command-line entry point: serve the embedding model until interrupted."""
+    parser = argparse.ArgumentParser(description="Keep the embedding model warm and batch requests from all clients")
+    parser.add_argument("--address", default=os.getenv("TURINGCHAIN_EMBEDDING_SERVER", DEFAULT_ADDRESS),
+                        help="host:port to listen on")
+    parser.add_argument("--backend", choices=EMBEDDING_BACKENDS, default=None,
+                        help="Embedding backend (default: TURINGCHAIN_EMBEDDING_BACKEND or torch)")
+    parser.add_argument("--threads", type=int, default=None, help="CPU threads for the model")
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH, help="Texts per model batch")
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT * 1000,
+                        help="How long a batch waits for more requests")
+    args = parser.parse_args(argv)
+
+    configure_embedding_backend(args.backend, args.threads)
+    print(f"Loading {embedding_model_id()}...")
+    encode_with_model(["warm-up"])
+    server = EmbeddingServer(args.address, max_batch=args.max_batch, max_wait=args.max_wait_ms / 1000.0)
+    print(f"✓ Embedding server listening on {server.address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stats = server.batcher.stats()
+        server.server_close()
+        print(f"Served {stats['requests']} requests in {stats['batches']} batches "
+              f"({stats['texts_per_batch']:.1f} texts per batch)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+import os
+import json
+import hashlib
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking
+    fcntl = None
+
+import numpy as np
+
+from embedding_backends import DEFAULT_BACKEND, DEFAULT_TOKEN_BUDGET, bucketed_encode, load_model, model_id, validate_backend
+from pipeline_profiler import cpu_stage
+
+
+EMBEDDING_MODEL_NAME = 'all-MiniLM-L6-v2'
+DEFAULT_STORE_DIR = Path(".turingchain_cache") / "embeddings"
+INITIAL_CAPACITY = 1024
+
+Encoder = Callable[[List[str]], np.ndarray]
+
+_model = None
+_model_lock = threading.Lock()
+_backend: Optional[str] = None
+_threads: Optional[int] = None
+
+
+def configure_embedding_backend(backend: Optional[str] = None, threads: Optional[int] = None) -> None:
+    """
+    Select how the evaluation model runs on CPU (see embedding_backends.load_model).
+
+    Drops the resident model and the embedding stores so the next call loads
+    the new backend and uses that backend's own cache.
+
+    Args:
+        backend: "torch" (fp32), "int8" or "onnx"; None reads TURINGCHAIN_EMBEDDING_BACKEND
+        threads: CPU threads; None reads TURINGCHAIN_EMBEDDING_THREADS
+    """
+    global _model, _backend, _threads
+    _backend = validate_backend(backend) if backend is not None else None
+    _threads = threads
+    with _model_lock:
+        _model = None
+    with _store_lock:
+        _stores.clear()
+
+
+def get_embedding_backend() -> str:
+    """The configured embedding backend (default: TURINGCHAIN_EMBEDDING_BACKEND or torch)."""
+    return _backend or validate_backend(os.getenv("TURINGCHAIN_EMBEDDING_BACKEND", DEFAULT_BACKEND))
+
+
+def embedding_model_id() -> str:
+    """Model name plus backend suffix, e.g. 'all-MiniLM-L6-v2-int8'."""
+    return model_id(EMBEDDING_MODEL_NAME, get_embedding_backend())
+
+
+def get_embedding_model():
+    """
+    Return the process-wide SentenceTransformer, loading it on first use.
+
+    Loading the model dominates evaluation time for small runs, so it is
+    loaded once per process and kept resident.
+    """
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                threads = _threads or (int(os.getenv("TURINGCHAIN_EMBEDDING_THREADS", 0)) or None)
+                # 'all-MiniLM-L6-v2' is a high-quality, efficient model for semantic similarity
+                with cpu_stage("load embedding model", backend=get_embedding_backend()):
+                    _model = load_model(EMBEDDING_MODEL_NAME, get_embedding_backend(), threads)
+    return _model
+
+
+def encode_with_model(texts: List[str]) -> np.ndarray:
+    """Encode texts with the resident model in length-bucketed batches (no caching)."""
+    token_budget = int(os.getenv("TURINGCHAIN_EMBEDDING_TOKEN_BUDGET", DEFAULT_TOKEN_BUDGET))
+    model = get_embedding_model()
+    with cpu_stage("encode", texts=len(texts)):
+        return bucketed_encode(model, texts, token_budget)
+
+
+def default_encoder() -> Encoder:
+    """
+    Encoder used when none is given: the local embedding server if one is
+    running (see embedding_server.py), else the resident model in this process.
+
+    If the server fails mid-run, encoding falls back to the local model.
+    """
+    from embedding_server import get_embedding_client, forget_embedding_client
+
+    client = get_embedding_client()
+    if client is None:
+        return encode_with_model
+
+    def encode(texts: List[str]) -> np.ndarray:
+        try:
+            return client(texts)
+        except (OSError, RuntimeError) as e:
+            print(f"Embedding server at {client.address} failed ({e}); encoding in-process")
+            forget_embedding_client()
+            return encode_with_model(texts)
+
+    return encode
+
+
+def text_key(text: str) -> bytes:
+    """128-bit hex key identifying a sentence in the store."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32].encode("ascii")
+
+
+class EmbeddingStore:
+    """
+    Persistent sentence-embedding cache: memory-mapped .npy vectors plus a key index.
+
+    Layout of `directory`:
+    - vectors.npy: float32 matrix (capacity x dim), memory-mapped
+    - keys.npy:    text hashes, row-aligned with vectors.npy
+    - meta.json:   model name, dimension and number of used rows
+
+    Rows are only ever appended; capacity doubles when full. meta.json is
+    written after the rows it counts, so a crash never exposes half-written rows.
+    Appends and growth happen under an exclusive lock on `.lock` (flock), after
+    re-reading meta.json, so several processes can share one store: each one
+    picks up rows and remapped files written by the others before appending.
+
+    Args:
+        directory: Folder holding the store (one folder per model)
+        model_name: Embedding model the vectors belong to
+    """
+
+    def __init__(self, directory: Path = DEFAULT_STORE_DIR / EMBEDDING_MODEL_NAME,
+                 model_name: str = EMBEDDING_MODEL_NAME):
+        self.directory = Path(directory)
+        self.model_name = model_name
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._vectors: Optional[np.memmap] = None
+        self._keys: Optional[np.memmap] = None
+        self._index: Dict[bytes, int] = {}
+        self._count = 0
+        self._inode: Optional[int] = None
+        self._refresh()
+
+    @property
+    def _meta_path(self) -> Path:
+        return self.directory / "meta.json"
+
+    def _refresh(self) -> None:
+        """Pick up rows appended (and files regrown) by other processes since the last look."""
+        if not self._meta_path.exists():
+            return
+
+        with open(self._meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('model') != self.model_name:
+            raise ValueError(f"Embedding store {self.directory} belongs to model '{meta.get('model')}', "
+                             f"not '{self.model_name}'")
+
+        count = meta['count']
+        inode = os.stat(self.directory / "vectors.npy").st_ino
+        if count == self._count and inode == self._inode:
+            return
+        if inode != self._inode:
+            self._vectors = np.load(self.directory / "vectors.npy", mmap_mode='r+')
+            self._keys = np.load(self.directory / "keys.npy", mmap_mode='r+')
+            self._inode = inode
+        for row in range(self._count, count):
+            self._index[bytes(self._keys[row])] = row
+        self._count = count
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Exclusive lock shared by every process using this directory."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / ".lock", 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _write_meta(self) -> None:
+        tmp_path = self._meta_path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'model': self.model_name, 'dim': int(self._vectors.shape[1]), 'count': self._count}, f)
+        os.replace(tmp_path, self._meta_path)
+
+    def _ensure_capacity(self, needed: int, dim: int) -> None:
+        capacity = 0 if self._vectors is None else self._vectors.shape[0]
+        if needed <= capacity:
+            return
+
+        new_capacity = max(INITIAL_CAPACITY, capacity)
+        while new_capacity < needed:
+            new_capacity *= 2
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        vectors = np.lib.format.open_memmap(self.directory / "vectors.tmp.npy", mode='w+',
+                                            dtype=np.float32, shape=(new_capacity, dim))
+        keys = np.lib.format.open_memmap(self.directory / "keys.tmp.npy", mode='w+',
+                                         dtype='S32', shape=(new_capacity,))
+        if self._count:
+            vectors[:self._count] = self._vectors[:self._count]
+            keys[:self._count] = self._keys[:self._count]
+        vectors.flush()
+        keys.flush()
+        del vectors, keys
+        self._vectors = self._keys = None
+
+        os.replace(self.directory / "vectors.tmp.npy", self.directory / "vectors.npy")
+        os.replace(self.directory / "keys.tmp.npy", self.directory / "keys.npy")
+        self._vectors = np.load(self.directory / "vectors.npy", mmap_mode='r+')
+        self._keys = np.load(self.directory / "keys.npy", mmap_mode='r+')
+        self._inode = os.stat(self.directory / "vectors.npy").st_ino
+
+    def encode(self, texts: List[str], encoder: Optional[Encoder] = None) -> np.ndarray:
+        """
+        Return embeddings for texts, encoding only those not already stored.
+
+        Args:
+            texts: Sentences to embed
+            encoder: Function mapping a list of sentences to an embedding matrix
+                (default: the embedding server if running, else the resident SentenceTransformer)
+
+        Returns:
+            float32 array of shape (len(texts), dim), row-aligned with texts
+        """
+        keys = [text_key(text) for text in texts]
+
+        with self._lock:
+            missing = {}
+            for key, text in zip(keys, texts):
+                if key in self._index:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+                    missing.setdefault(key, text)
+
+            if missing:
+                # Encode outside the file lock; other processes keep appending meanwhile
+                encoded = np.asarray((encoder or default_encoder())(list(missing.values())), dtype=np.float32)
+                with self._file_lock():
+                    self._refresh()
+                    # Rows another process stored in the meantime are kept as they are
+                    fresh = [(key, vector) for key, vector in zip(missing, encoded) if key not in self._index]
+                    if fresh:
+                        start = self._count
+                        self._ensure_capacity(start + len(fresh), encoded.shape[1])
+                        self._vectors[start:start + len(fresh)] = np.stack([vector for _, vector in fresh])
+                        self._keys[start:start + len(fresh)] = [key for key, _ in fresh]
+                        self._vectors.flush()
+                        self._keys.flush()
+                        for offset, (key, _) in enumerate(fresh):
+                            self._index[key] = start + offset
+                        self._count += len(fresh)
+                        self._write_meta()
+
+            rows = [self._index[key] for key in keys]
+            return np.array(self._vectors[rows]) if rows else np.empty((0, 0), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters for this process plus the number of stored vectors."""
+        lookups = self.hits + self.misses
+        return {
+            'entries': self._count,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    def report(self) -> None:
+        """Print the embedding cache counters."""
+        stats = self.stats()
+        print(f"Embedding cache: {stats['hits']} hits, {stats['misses']} misses "
+              f"({stats['hit_rate']:.1%} hit rate), {stats['entries']} stored vectors")
+
+
+_stores: Dict[str, EmbeddingStore] = {}
+_store_lock = threading.Lock()
+
+
+def get_embedding_store(model: Optional[str] = None, create: bool = True) -> Optional[EmbeddingStore]:
+    """
+    Return the process-wide embedding store for a model, or None if disabled.
+
+    TURINGCHAIN_EMBEDDING_CACHE sets the stores' parent directory; "off" disables them.
+    Each model (and each embedding backend) has its own store, so vectors of
+    different models or fp32 and quantized vectors never mix.
+
+    Args:
+        model: Model identifier (default: embedding_model_id(), the configured model and backend)
+        create: Open the store if this process has not yet (False returns None instead)
+    """
+    location = os.getenv("TURINGCHAIN_EMBEDDING_CACHE", str(DEFAULT_STORE_DIR))
+    if location == "off":
+        return None
+    model = model or embedding_model_id()
+    store = _stores.get(model)
+    if store is None and create:
+        with _store_lock:
+            store = _stores.get(model)
+            if store is None:
+                store = _stores[model] = EmbeddingStore(Path(location) / model, model)
+    return store
+
+
+def report_embedding_store() -> None:
+    """Print the counters of each store this process encoded through (none is opened just to report)."""
+    for store in list(_stores.values()):
+        if store.hits or store.misses:
+            store.report()
+
+
+def encode_sentences(texts: List[str], encoder: Optional[Encoder] = None, model: Optional[str] = None) -> np.ndarray:
+    """
+    Embed sentences through the persistent store when enabled, else directly.
+
+    When an embedding server is running (and no encoder is given), the texts go
+    straight to it: the server owns the store and is its only writer, so client
+    processes never open it. If the server fails, this process falls back to
+    its own store and model.
+
+    A custom encoder only goes through a store when `model` names what it
+    computes; that store is separate from the default model's, so its vectors
+    are never served as the default model's cache hits.
+
+    Args:
+        texts: Sentences to embed
+        encoder: Optional replacement for default_encoder()
+        model: Identifier of the model behind `encoder` (without one, a custom
+            encoder bypasses the store)
+
+    Returns:
+        Embedding matrix row-aligned with texts
+    """
+    if encoder is None:
+        from embedding_server import get_embedding_client, forget_embedding_client
+
+        client = get_embedding_client()
+        if client is not None:
+            try:
+                return np.asarray(client(texts), dtype=np.float32)
+            except (OSError, RuntimeError) as e:
+                print(f"Embedding server at {client.address} failed ({e}); encoding in-process")
+                forget_embedding_client()
+    elif model is None:
+        return np.asarray(encoder(texts), dtype=np.float32)
+
+    store = get_embedding_store(model)
+    if store is None:
+        return np.asarray((encoder or default_encoder())(texts), dtype=np.float32)
+    return store.encode(texts, encoder)
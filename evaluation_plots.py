@@ -0,0 +1,247 @@
+import os
+import sys
+import json
+import argparse
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+AGGREGATE_THRESHOLD = 5000
+HISTOGRAM_BINS = 50
+BAND_WINDOWS = 500
+DENSITY_BINS = (200, 50)
+BAND_QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+PLOT_DATA_FILE = "evaluation_plot_data.json"
+PLOT_FILE = "evaluation_plot.png"
+
+
+def aggregate_threshold() -> int:
+    """Sentence count above which plots are aggregated (TURINGCHAIN_PLOT_AGGREGATE_THRESHOLD)."""
+    return int(os.getenv("TURINGCHAIN_PLOT_AGGREGATE_THRESHOLD", AGGREGATE_THRESHOLD))
+
+
+def should_aggregate(count: int) -> bool:
+    """True when a run is too large for one artist per sentence."""
+    return count > aggregate_threshold()
+
+
+def summarize_distances(distances: Sequence[float], bins: int = HISTOGRAM_BINS, windows: int = BAND_WINDOWS,
+                        density_bins: Sequence[int] = DENSITY_BINS) -> Dict:
+    """
+    Precompute everything the aggregated plot needs, in size independent of the run.
+
+    - a histogram of the distances
+    - the mean and BAND_QUANTILES of consecutive windows of sentences (rolling bands)
+    - a 2D histogram of (sentence index, distance) for the density panel
+
+    Args:
+        distances: Per-sentence cosine distances in sentence order (a memory map works)
+        bins: Histogram bins
+        windows: Number of consecutive sentence windows for the bands
+        density_bins: (index bins, distance bins) of the 2D histogram
+
+    Returns:
+        JSON-serializable dictionary (see save_plot_data)
+    """
+    distances = np.asarray(distances, dtype=np.float64)
+    count = len(distances)
+    if count == 0:
+        raise ValueError("Cannot summarize an empty run")
+    low, high = float(distances.min()), float(distances.max())
+    if high <= low:
+        high = low + 1e-6
+
+    counts, edges = np.histogram(distances, bins=bins, range=(low, high))
+
+    bounds = np.linspace(0, count, min(windows, count) + 1).astype(np.int64)
+    centers, means, quantiles = [], [], []
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        window = distances[start:end]
+        centers.append((start + end - 1) / 2 + 1)
+        means.append(float(window.mean()))
+        quantiles.append(np.quantile(window, BAND_QUANTILES).tolist())
+
+    index_bins, distance_bins = density_bins
+    density, index_edges, distance_edges = np.histogram2d(
+        np.arange(1, count + 1), distances, bins=(min(index_bins, count), distance_bins),
+        range=((0.5, count + 0.5), (low, high)))
+
+    return {
+        'count': count,
+        'mean': float(distances.mean()),
+        'std': float(distances.std()),
+        'min': float(distances.min()),
+        'max': float(distances.max()),
+        'histogram': {'counts': counts.tolist(), 'edges': edges.tolist()},
+        'bands': {
+            'window': count / len(centers),
+            'centers': centers,
+            'mean': means,
+            'quantiles': list(BAND_QUANTILES),
+            'values': np.asarray(quantiles).T.tolist(),
+        },
+        'density': {
+            'counts': density.astype(np.int64).tolist(),
+            'index_edges': index_edges.tolist(),
+            'distance_edges': distance_edges.tolist(),
+        },
+    }
+
+
+def save_plot_data(summary: Dict, path: Path) -> Path:
+    """Write a summarize_distances result to JSON."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f)
+    return Path(path)
+
+
+def load_plot_data(output_dir: Path) -> Dict:
+    """
+    Plot summary of a run folder.
+
+    Uses evaluation_plot_data.json when present, otherwise recomputes it from
+    the memory-mapped columnar distances or, failing that, translation_results.json.
+
+    Args:
+        output_dir: Run folder (e.g. Insights)
+
+    Returns:
+        Summary as returned by summarize_distances
+    """
+    output_dir = Path(output_dir)
+    if (output_dir / PLOT_DATA_FILE).exists():
+        with open(output_dir / PLOT_DATA_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    from columnar_results import COLUMNS_DIR_NAME, ColumnarResults
+    if (output_dir / COLUMNS_DIR_NAME).exists():
+        distances = ColumnarResults(output_dir / COLUMNS_DIR_NAME).distances
+        return summarize_distances(distances[~np.isnan(distances)])
+
+    with open(output_dir / "translation_results.json", 'r', encoding='utf-8') as f:
+        results = json.load(f)['results']
+    return summarize_distances([r['cosine_distance'] for r in results if r['cosine_distance'] is not None])
+
+
+def plot_distance_summary(summary: Dict):
+    """
+    Aggregated version of the per-sentence plot, drawn from a precomputed summary.
+
+    The top panel shows sentence density as hexbins, the rolling 10–90% and
+    25–75% quantile bands and the rolling mean; the bottom panel is the
+    precomputed histogram. The number of artists does not depend on the run size.
+
+    Args:
+        summary: Result of summarize_distances (or load_plot_data)
+
+    Returns:
+        The matplotlib figure (not shown; the caller decides)
+    """
+    import matplotlib.pyplot as plt
+
+    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 10))
+    count, mean_distance = summary['count'], summary['mean']
+
+    # Subplot 1: density, rolling bands and mean
+    density = summary['density']
+    cells = np.asarray(density['counts'], dtype=np.float64)
+    index_edges = np.asarray(density['index_edges'])
+    distance_edges = np.asarray(density['distance_edges'])
+    x, y = np.meshgrid((index_edges[:-1] + index_edges[1:]) / 2, (distance_edges[:-1] + distance_edges[1:]) / 2,
+                       indexing='ij')
+    occupied = cells > 0
+    hexbins = ax1.hexbin(x[occupied], y[occupied], C=cells[occupied], reduce_C_function=np.sum,
+                         gridsize=(60, 20), bins='log', cmap='Blues')
+    fig.colorbar(hexbins, ax=ax1, label='Sentences (log)')
+
+    bands = summary['bands']
+    centers = np.asarray(bands['centers'])
+    values = dict(zip(bands['quantiles'], bands['values']))
+    ax1.fill_between(centers, values[0.1], values[0.9], alpha=0.2, color='orange', label='10–90% band')
+    ax1.fill_between(centers, values[0.25], values[0.75], alpha=0.35, color='orange', label='25–75% band')
+    ax1.plot(centers, bands['mean'], color='darkblue', linewidth=1.5,
+             label=f"Rolling mean ({bands['window']:.0f} sentences)")
+    ax1.axhline(y=mean_distance, color='red', linestyle='--', linewidth=2, label=f'Mean: {mean_distance:.4f}')
+
+    ax1.set_xlabel('Sentence Index', fontsize=12, fontweight='bold')
+    ax1.set_ylabel('Cosine Distance (Error)', fontsize=12, fontweight='bold')
+    ax1.set_title(f'Translation Quality: Cosine Distance over {count:,} Sentences\n'
+                  f'(English → Spanish → Hebrew → English)', fontsize=14, fontweight='bold', pad=20)
+    ax1.legend(loc='upper right', fontsize=10)
+    ax1.grid(True, alpha=0.3, linestyle='--')
+    ax1.set_xlim(0, count + 1)
+
+    # Subplot 2: precomputed histogram (one artist)
+    edges = np.asarray(summary['histogram']['edges'])
+    ax2.hist(edges[:-1], bins=edges, weights=summary['histogram']['counts'],
+             color='green', alpha=0.7, edgecolor='black')
+    ax2.axvline(x=mean_distance, color='red', linestyle='--', linewidth=2, label=f'Mean: {mean_distance:.4f}')
+    ax2.set_xlabel('Cosine Distance', fontsize=12, fontweight='bold')
+    ax2.set_ylabel('Frequency', fontsize=12, fontweight='bold')
+    ax2.set_title('Distribution of Cosine Distances', fontsize=14, fontweight='bold', pad=20)
+    ax2.legend(loc='upper right', fontsize=10)
+    ax2.grid(True, alpha=0.3, linestyle='--', axis='y')
+
+    plt.tight_layout()
+
+    return fig
+
+
+def render_plot(output_dir: Path, output_file: Optional[Path] = None, dpi: int = 300) -> Path:
+    """
+    Render the aggregated plot of a run folder to a PNG file (off-screen).
+
+    Args:
+        output_dir: Run folder with evaluation_plot_data.json or saved distances
+        output_file: Destination (default: evaluation_plot.png in output_dir)
+        dpi: Resolution
+
+    Returns:
+        Path of the PNG
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+
+    output_file = Path(output_file or Path(output_dir) / PLOT_FILE)
+    fig = plot_distance_summary(load_plot_data(output_dir))
+    fig.savefig(output_file, dpi=dpi, bbox_inches='tight', facecolor='white')
+    return output_file
+
+
+def render_in_background(output_dir: Path, dpi: int = 300) -> subprocess.Popen:
+    """
+    Render the plot of a run folder in a detached process, so the pipeline never waits for it.
+
+    Output goes to evaluation_plot.log next to the plot.
+
+    Args:
+        output_dir: Run folder with evaluation_plot_data.json
+        dpi: Resolution
+
+    Returns:
+        The started process
+    """
+    output_dir = Path(output_dir)
+    with open(output_dir / "evaluation_plot.log", 'w', encoding='utf-8') as log:
+        return subprocess.Popen([sys.executable, str(Path(__file__).resolve()), str(output_dir), "--dpi", str(dpi)],
+                                stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+
+
+def main(argv: Optional[List[str]] = None):
+    """Command-line entry point: render the aggregated plot of a saved run."""
+    parser = argparse.ArgumentParser(description="Render the evaluation plot of a saved run from its metrics")
+    parser.add_argument("output_dir", type=Path, nargs="?", default=Path("Insights"), help="Run folder")
+    parser.add_argument("-o", "--output", type=Path, default=None, help="PNG file (default: evaluation_plot.png)")
+    parser.add_argument("--dpi", type=int, default=300)
+    args = parser.parse_args(argv)
+
+    output_file = render_plot(args.output_dir, args.output, args.dpi)
+    print(f"✓ Plot saved: {output_file}")
+    return output_file
+
+
+if __name__ == "__main__":
+    main()
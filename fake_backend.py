@@ -0,0 +1,180 @@
+import os
+import re
+import json
+import math
+import time
+import random
+import asyncio
+import hashlib
+import threading
+from typing import Optional, Tuple
+
+from llm_backend import LLMBackend, LLMResponse, LLMStream, RateLimitedError, TransientBackendError
+
+
+_TRANSLATE_RE = re.compile(r"translate from (\w+) to (\w+)", re.IGNORECASE)
+_GENERATE_RE = re.compile(r"Generate exactly (\d+)")
+_LANGUAGE_TAG_RE = re.compile(r"^«\w+» ")
+_LANGUAGE_CODES = {"spanish": "es", "hebrew": "he", "french": "fr", "german": "de"}
+
+_VOCABULARY = (
+    "empire foundation galaxy terminus trantor psychohistory seldon plan crisis mayor trader "
+    "encyclopedia scientist mule periphery emperor fleet planet vault prophecy millennium "
+    "barbarism knowledge council merchant atomic power religion priest warlord citizen "
+    "archive mathematics probability future collapse ancient distant silent careful bold "
+    "studied predicted guarded whispered traveled rebuilt forgot questioned gathered"
+).split()
+
+
+def _stable_hash(*parts: str) -> int:
+    digest = hashlib.sha256("\x1f".join(parts).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+class FakeBackend(LLMBackend):
+    """
+    Offline, deterministic stand-in for the Claude API.
+
+    Recognises the agents by their system prompts:
+    - sentence generator: returns N synthetic Foundation-style sentences
+    - translators: tags the text with the target language ("«es» ..."), and
+      strips the tag when translating back to English, so a round trip returns
+      the original sentence (optionally with simulated drift)
+    - batched translators: answers the JSON envelope with a JSON array
+    - fused round trip: answers with the three translations as a JSON object
+
+    Latency is drawn from a log-normal distribution around `latency_median`,
+    and a configurable share of calls fail with simulated 5xx or 429 errors.
+
+    Args:
+        latency_median: Median simulated latency in seconds (0 disables sleeping)
+        latency_sigma: Log-normal shape; larger values give a longer tail
+        error_rate: Probability of a TransientBackendError per call
+        rate_limit_rate: Probability of a RateLimitedError (429) per call
+        retry_after: retry-after seconds attached to simulated 429s
+        drift_rate: Probability that a back-to-English translation drops a word
+        seed: Seed for latencies, failures and generated sentences
+    """
+
+    name = "fake"
+
+    def __init__(self, latency_median: float = 0.0, latency_sigma: float = 0.5,
+                 error_rate: float = 0.0, rate_limit_rate: float = 0.0,
+                 retry_after: Optional[float] = 0.05, drift_rate: float = 0.0, seed: int = 0):
+        self.latency_median = latency_median
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.drift_rate = drift_rate
+        self.seed = seed
+        self.calls = 0
+        self.failures = 0
+        self.rate_limited = 0
+        self._generated = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "FakeBackend":
+        """Build a fake backend from TURINGCHAIN_FAKE_* environment variables."""
+        return cls(
+            latency_median=float(os.getenv("TURINGCHAIN_FAKE_LATENCY", 0.0)),
+            latency_sigma=float(os.getenv("TURINGCHAIN_FAKE_LATENCY_SIGMA", 0.5)),
+            error_rate=float(os.getenv("TURINGCHAIN_FAKE_ERROR_RATE", 0.0)),
+            rate_limit_rate=float(os.getenv("TURINGCHAIN_FAKE_429_RATE", 0.0)),
+            drift_rate=float(os.getenv("TURINGCHAIN_FAKE_DRIFT_RATE", 0.0)),
+            seed=int(os.getenv("TURINGCHAIN_FAKE_SEED", 0)),
+        )
+
+    def create(self, model: str, max_tokens: int, system: str, prompt: str, api_key: str) -> LLMResponse:
+        latency, error = self._plan()
+        if latency > 0:
+            time.sleep(latency)
+        if error is not None:
+            raise error
+        return self._respond(system, prompt)
+
+    async def acreate(self, model: str, max_tokens: int, system: str, prompt: str, api_key: str) -> LLMResponse:
+        latency, error = self._plan()
+        if latency > 0:
+            await asyncio.sleep(latency)
+        if error is not None:
+            raise error
+        return self._respond(system, prompt)
+
+    def stream(self, model: str, max_tokens: int, system: str, prompt: str, api_key: str) -> LLMStream:
+        latency, error = self._plan()
+        # A tenth of the latency passes before the first token, the rest is spread over the lines
+        if latency > 0:
+            time.sleep(latency * 0.1)
+        if error is not None:
+            raise error
+        response = self._respond(system, prompt)
+        lines = response.text.split("\n")
+
+        def deltas():
+            for number, line in enumerate(lines):
+                if latency > 0:
+                    time.sleep(latency * 0.9 / len(lines))
+                yield line + ("\n" if number < len(lines) - 1 else "")
+
+        return LLMStream(deltas(), lambda: (response.input_tokens, response.output_tokens))
+
+    def _plan(self) -> Tuple[float, Optional[Exception]]:
+        with self._lock:
+            self.calls += 1
+            latency = 0.0
+            if self.latency_median > 0:
+                latency = self._rng.lognormvariate(math.log(self.latency_median), self.latency_sigma)
+            roll = self._rng.random()
+            if roll < self.rate_limit_rate:
+                self.rate_limited += 1
+                return latency, RateLimitedError("Simulated 429: rate limit exceeded", self.retry_after)
+            if roll < self.rate_limit_rate + self.error_rate:
+                self.failures += 1
+                return latency, TransientBackendError("Simulated 500: internal server error")
+        return latency, None
+
+    def _respond(self, system: str, prompt: str) -> LLMResponse:
+        generate = _GENERATE_RE.search(prompt)
+        translate = _TRANSLATE_RE.search(system)
+
+        if generate and "sentence generator" in system:
+            text = "\n".join(self._sentence() for _ in range(int(generate.group(1))))
+        elif "round-trip translation agent" in system:
+            text = json.dumps({"spanish": self.translate(prompt, "spanish"), "hebrew": self.translate(prompt, "hebrew"),
+                               "english": self.translate(prompt, "english")}, ensure_ascii=False)
+        elif translate and "JSON array" in system:
+            texts = json.loads(prompt)
+            text = json.dumps([self.translate(t, translate.group(2)) for t in texts], ensure_ascii=False)
+        elif translate:
+            text = self.translate(prompt, translate.group(2))
+        else:
+            text = prompt
+
+        return LLMResponse(text, _count_tokens(system) + _count_tokens(prompt), _count_tokens(text))
+
+    def translate(self, text: str, target: str) -> str:
+        """Deterministic fake translation of `text` into `target`."""
+        text = _LANGUAGE_TAG_RE.sub("", text)
+        if target.lower() != "english":
+            code = _LANGUAGE_CODES.get(target.lower(), target[:2].lower())
+            return f"«{code}» {text}"
+
+        words = text.split()
+        if len(words) > 1 and _stable_hash(str(self.seed), text) % 10_000 < self.drift_rate * 10_000:
+            del words[_stable_hash(text) % len(words)]
+        return " ".join(words)
+
+    def _sentence(self) -> str:
+        with self._lock:
+            self._generated += 1
+            rng = random.Random(_stable_hash(str(self.seed), str(self._generated)))
+        words = [rng.choice(_VOCABULARY) for _ in range(rng.randint(10, 20))]
+        return " ".join(words).capitalize() + "."
+
+
+def _count_tokens(text: str) -> int:
+    # Rough English-like ratio of ~4/3 tokens per word
+    return max(1, len(text.split()) * 4 // 3)
@@ -0,0 +1,218 @@
+import os
+import json
+import time
+import asyncio
+import argparse
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from claude_client import call_claude_agent, async_call_claude_agent
+from agent_english_spanish import english_spanish_translator, english_spanish_translator_async
+from agent_spanish_hebrew import spanish_hebrew_translator, spanish_hebrew_translator_async
+from agent_hebrew_english import hebrew_english_translator, hebrew_english_translator_async
+
+
+AGENT_NAME = "fused_round_trip"
+FUSED_KEYS = ("spanish", "hebrew", "english")
+FUSED_MAX_TOKENS = 2048
+
+SYSTEM_PROMPT = (
+    "You are a round-trip translation agent performing three separate steps. "
+    "Step 1: translate the user's English text into Spanish. "
+    "Step 2: translate your Spanish text (not the English original) into Hebrew. "
+    "Step 3: translate your Hebrew text (not the earlier versions) back into English. "
+    "Output ONLY a JSON object with exactly the keys \"spanish\", \"hebrew\" and \"english\" "
+    "holding the three translations, with no explanations, comments, or additional text whatsoever."
+)
+
+_stats = {'fused': 0, 'fallbacks': 0}
+_stats_lock = threading.Lock()
+
+
+def parse_fused_response(response: str) -> Optional[Dict[str, str]]:
+    """
+    Extract and validate the three translations from a fused response.
+
+    Accepts surrounding prose or code fences around the JSON object.
+
+    Args:
+        response: Raw model output
+
+    Returns:
+        Dictionary with non-empty 'spanish', 'hebrew' and 'english' strings,
+        or None if the response is malformed
+    """
+    start, end = response.find("{"), response.rfind("}")
+    if start == -1 or end <= start:
+        return None
+    try:
+        parsed = json.loads(response[start:end + 1])
+    except ValueError:
+        return None
+    if not isinstance(parsed, dict):
+        return None
+    if not all(isinstance(parsed.get(key), str) and parsed[key].strip() for key in FUSED_KEYS):
+        return None
+    return {key: parsed[key].strip() for key in FUSED_KEYS}
+
+
+def _is_valid(response: str) -> bool:
+    return parse_fused_response(response) is not None
+
+
+def _count(key: str) -> None:
+    with _stats_lock:
+        _stats[key] += 1
+
+
+def fused_round_trip_outputs(text: str, api_key: str) -> Dict[str, str]:
+    """
+    English → Spanish → Hebrew → English in a single request, with all intermediate texts.
+
+    Falls back to the three translator agents when the fused response is not
+    valid JSON with the three expected keys.
+
+    Args:
+        text: English text to round-trip
+        api_key: Claude API key
+
+    Returns:
+        Dictionary with 'spanish', 'hebrew', 'english' and 'fused' (False after a fallback)
+    """
+    # Malformed replies are not cached, so the next run retries the fused request
+    response = call_claude_agent(text, SYSTEM_PROMPT, api_key, max_tokens=FUSED_MAX_TOKENS,
+                                 cache=True, agent=AGENT_NAME, validate=_is_valid)
+    outputs = parse_fused_response(response)
+    if outputs is not None:
+        _count('fused')
+        return {**outputs, 'fused': True}
+
+    print("Fused response was malformed; falling back to three calls")
+    _count('fallbacks')
+    spanish = english_spanish_translator(text, api_key)
+    hebrew = spanish_hebrew_translator(spanish, api_key)
+    return {'spanish': spanish, 'hebrew': hebrew, 'english': hebrew_english_translator(hebrew, api_key), 'fused': False}
+
+
+async def fused_round_trip_outputs_async(text: str, api_key: str) -> Dict[str, str]:
+    """Async variant of fused_round_trip_outputs."""
+    response = await async_call_claude_agent(text, SYSTEM_PROMPT, api_key, max_tokens=FUSED_MAX_TOKENS,
+                                             cache=True, agent=AGENT_NAME, validate=_is_valid)
+    outputs = parse_fused_response(response)
+    if outputs is not None:
+        _count('fused')
+        return {**outputs, 'fused': True}
+
+    print("Fused response was malformed; falling back to three calls")
+    _count('fallbacks')
+    spanish = await english_spanish_translator_async(text, api_key)
+    hebrew = await spanish_hebrew_translator_async(spanish, api_key)
+    return {'spanish': spanish, 'hebrew': hebrew,
+            'english': await hebrew_english_translator_async(hebrew, api_key), 'fused': False}
+
+
+def fused_round_trip(text: str, api_key: str) -> str:
+    """Fused round trip returning only the final English text (drop-in for the chained round trip)."""
+    return fused_round_trip_outputs(text, api_key)['english']
+
+
+async def fused_round_trip_async(text: str, api_key: str) -> str:
+    """Async variant of fused_round_trip."""
+    return (await fused_round_trip_outputs_async(text, api_key))['english']
+
+
+def fused_stats() -> Dict[str, int]:
+    """Fused responses accepted and fallbacks to the three-call path since the last reset."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_fused_stats() -> None:
+    """Zero the fused/fallback counters (e.g. at the beginning of a run)."""
+    with _stats_lock:
+        for key in _stats:
+            _stats[key] = 0
+
+
+def report_fused_translation() -> None:
+    """Print the fused/fallback counters, if the fused mode was used."""
+    stats = fused_stats()
+    if stats['fused'] or stats['fallbacks']:
+        total = stats['fused'] + stats['fallbacks']
+        print(f"Fused round trips: {stats['fused']} fused, {stats['fallbacks']} fell back to three calls "
+              f"({stats['fused'] / total:.1%} fused)")
+
+
+def run_fused_comparison(api_key: str, num_sentences: int = 100, concurrency: int = 10,
+                         output_dir: Path = Path("Insights")) -> Dict:
+    """
+    Translate one corpus both ways and compare their semantic drift.
+
+    The corpus is generated once; the chained (three-call) and fused
+    (single-call) round trips then run over the same sentences, and the
+    evaluation agent compares their cosine distances sentence by sentence.
+    Writes fused_vs_chained.json to `output_dir`.
+
+    Args:
+        api_key: Claude API key
+        num_sentences: Corpus size
+        concurrency: Sentences in flight for each mode
+        output_dir: Where the comparison is written
+
+    Returns:
+        The comparison dictionary from agent_evaluation.compare_translation_drift,
+        plus per-mode wall time
+    """
+    from agent_sentences_creator import sentences_creator
+    from orchestrator import translate_concurrently, chained_round_trip_async
+    from agent_evaluation import compare_translation_drift
+
+    sentences = list(sentences_creator(api_key, count=num_sentences))
+    reset_fused_stats()
+    timings = {}
+    results = {}
+    for label, round_trip in (("chained", chained_round_trip_async), ("fused", fused_round_trip_async)):
+        start_time = time.perf_counter()
+        results[label] = asyncio.run(translate_concurrently(sentences, api_key, concurrency, round_trip=round_trip))
+        timings[label] = time.perf_counter() - start_time
+
+    # Compare only the sentences both modes completed
+    finals = {label: dict(pairs) for label, pairs in results.items()}
+    common = [sentence for sentence in sentences if sentence in finals['chained'] and sentence in finals['fused']]
+    comparison = compare_translation_drift(common, [finals['chained'][s] for s in common],
+                                           [finals['fused'][s] for s in common], labels=("chained", "fused"))
+    comparison['elapsed_s'] = timings
+    comparison['fused_stats'] = fused_stats()
+    report_fused_translation()
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    comparison_file = output_dir / "fused_vs_chained.json"
+    with open(comparison_file, 'w', encoding='utf-8') as f:
+        json.dump(comparison, f, indent=2)
+    print(f"✓ Comparison saved: {comparison_file}")
+    return comparison
+
+
+def main(argv: Optional[List[str]] = None):
+    """Command-line entry point: compare fused and chained round trips on one corpus."""
+    parser = argparse.ArgumentParser(description="Compare fused (1 call) and chained (3 calls) round trips")
+    parser.add_argument("-n", "--sentences", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("-o", "--output-dir", type=Path, default=Path("Insights"))
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    api_key = os.getenv("ANTHROPIC_API_KEY")
+    if not api_key:
+        print("Error: ANTHROPIC_API_KEY not found in environment variables")
+        return
+
+    return run_fused_comparison(api_key, args.sentences, args.concurrency, args.output_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Callable, Iterator, List, Optional, Tuple
+
+
+@dataclass
+class LLMResponse:
+    """
+    Backend-neutral result of one agent request.
+
+    Attributes:
+        text: The text response
+        input_tokens: Prompt tokens billed for the request
+        output_tokens: Completion tokens billed for the request
+        retries: Attempts that failed before this response (set by the request scheduler)
+    """
+    text: str
+    input_tokens: int = 0
+    output_tokens: int = 0
+    retries: int = 0
+
+
+class LLMStream:
+    """
+    A streamed response whose request has already been accepted.
+
+    Iterating yields text deltas as they arrive; lines() regroups them into
+    complete lines. Once the stream is exhausted, `text` holds the whole
+    response and the token counts are filled in. The attributes mirror
+    LLMResponse so the request scheduler treats both alike.
+
+    The stream owns what the open request holds (the HTTP response, the
+    scheduler's in-flight slot) and releases it on close(), whether or not
+    iteration ever started. Use it as a context manager; exhausting or
+    failing the iteration closes it too.
+
+    Args:
+        deltas: Iterator of text fragments
+        usage: Called after the last fragment; returns (input_tokens, output_tokens)
+        close: Releases the underlying response (called once, by close())
+    """
+
+    def __init__(self, deltas: Iterator[str], usage: Optional[Callable[[], Tuple[int, int]]] = None,
+                 close: Optional[Callable[[], None]] = None):
+        self.text = ""
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.retries = 0
+        self.closed = False
+        self._deltas = deltas
+        self._usage = usage
+        self._on_close: List[Callable[[], None]] = [close] if close is not None else []
+
+    def __enter__(self) -> "LLMStream":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __iter__(self) -> Iterator[str]:
+        try:
+            for delta in self._deltas:
+                self.text += delta
+                yield delta
+            if self._usage is not None:
+                self.input_tokens, self.output_tokens = self._usage()
+        finally:
+            self.close()
+
+    def lines(self) -> Iterator[str]:
+        """Yield each line as soon as its newline arrives (the last line when the stream ends)."""
+        buffer = ""
+        for delta in self:
+            buffer += delta
+            *complete, buffer = buffer.split("\n")
+            yield from complete
+        if buffer:
+            yield buffer
+
+    def on_close(self, callback: Callable[[], None]) -> None:
+        """Run `callback` when the stream is closed (e.g. to give back a scheduler slot)."""
+        self._on_close.append(callback)
+
+    def close(self) -> None:
+        """Stop reading and release the underlying connection and anything registered with on_close()."""
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            close = getattr(self._deltas, "close", None)
+            if close is not None:
+                close()
+        finally:
+            for callback in self._on_close:
+                callback()
+
+
+class BackendError(Exception):
+    """Base class for errors raised by an LLM backend."""
+
+
+class RateLimitedError(BackendError):
+    """
+    The backend throttled the request (HTTP 429, or 529 when overloaded).
+
+    Attributes:
+        retry_after: Seconds the server asked us to wait, if it said so
+        status_code: HTTP status code of the throttling response
+    """
+
+    def __init__(self, message: str, retry_after: Optional[float] = None, status_code: int = 429):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.status_code = status_code
+
+
+class TransientBackendError(BackendError):
+    """A failure that is expected to succeed on retry (5xx, connection reset, timeout)."""
+
+
+class LLMBackend:
+    """
+    Interface behind call_claude_agent.
+
+    Subclasses implement create(); acreate() defaults to running create() in a
+    worker thread so a synchronous backend also works in the async pipeline.
+    """
+
+    name = "base"
+
+    def create(self, model: str, max_tokens: int, system: str, prompt: str, api_key: str) -> LLMResponse:
+        """
+        Send one request.
+
+        Args:
+            model: Claude model identifier
+            max_tokens: Maximum number of tokens in the response
+            system: The system prompt that defines the agent's role
+            prompt: The user message/prompt
+            api_key: Claude API key
+
+        Returns:
+            The backend's response
+        """
+        raise NotImplementedError
+
+    async def acreate(self, model: str, max_tokens: int, system: str, prompt: str, api_key: str) -> LLMResponse:
+        """Async variant of create()."""
+        return await asyncio.to_thread(self.create, model, max_tokens, system, prompt, api_key)
+
+    def stream(self, model: str, max_tokens: int, system: str, prompt: str, api_key: str) -> LLMStream:
+        """
+        Send one request and return its response as a stream.
+
+        Errors that reject the request (429, 5xx) must be raised here, before
+        anything is returned, so the request scheduler can retry them. The
+        default implementation delivers the whole create() response at once.
+        """
+        response = self.create(model, max_tokens, system, prompt, api_key)
+        return LLMStream(iter([response.text]), lambda: (response.input_tokens, response.output_tokens))
@@ -1,9 +1,53 @@
 import os
+import time
+import asyncio
+from itertools import islice
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
 from dotenv import load_dotenv
-from agent_english_spanish import english_spanish_translator
-from agent_spanish_hebrew import spanish_hebrew_translator
-from agent_hebrew_english import hebrew_english_translator
+from agent_english_spanish import english_spanish_translator, english_spanish_translator_batch
+from agent_spanish_hebrew import spanish_hebrew_translator, spanish_hebrew_translator_batch
+from agent_hebrew_english import hebrew_english_translator, hebrew_english_translator_batch
+from batch_translation import DEFAULT_BATCH_SIZE
 from agent_sentences_creator import sentences_creator
+from translation_cache import report_translation_cache
+from request_scheduler import report_scheduler
+from request_hedging import report_hedging
+from pipeline_profiler import span
+from chain_engine import parse_chain, run_chain, run_chain_async
+
+
+DEFAULT_CONCURRENCY = 10
+INTERMEDIATE_KEYS = ("spanish", "hebrew")
+# The hops' prompts and agent names match the three translator agents, so the
+# engine shares their cache entries and metrics
+ROUND_TRIP_CHAIN = parse_chain("en→es→he→en")
+
+# Called as on_result(sentence_index, original_sentence, final_translated_sentence, intermediates)
+# whenever a sentence completes the chain, e.g. to feed an IncrementalEvaluator;
+# intermediates holds the hop outputs by language ('spanish', 'hebrew') when the
+# round trip reports them, else it is empty
+ResultCallback = Callable[[int, str, str, Dict[str, str]], None]
+# A round trip returns the final English text, or a dict of every hop's output
+# ('spanish', 'hebrew', 'english'), as chained_round_trip_outputs does
+RoundTripOutput = Union[str, Dict[str, str]]
+RoundTrip = Callable[[str, str], RoundTripOutput]
+AsyncRoundTrip = Callable[[str, str], Awaitable[RoundTripOutput]]
+
+
+def report_throughput(sentence_count: int, elapsed: float) -> float:
+    """
+    Print and return pipeline throughput so sequential and concurrent runs can be compared.
+
+    Args:
+        sentence_count: Number of sentences that completed the chain
+        elapsed: Wall-clock seconds the run took
+
+    Returns:
+        Sentences per second
+    """
+    rate = sentence_count / elapsed if elapsed > 0 else 0.0
+    print(f"Throughput: {rate:.2f} sentences/sec ({sentence_count} sentences in {elapsed:.2f}s)")
+    return rate
 
 
 def run_translation_pipeline(api_key: str, num_sentences: int = 100):
@@ -27,6 +71,7 @@ def run_translation_pipeline(api_key: str, num_sentences: int = 100):
     print(f"Generating and processing {num_sentences} sentences...\n")
 
     sentence_count = 0
+    start_time = time.perf_counter()
 
     # Process sentences as they are generated (synchronized pipeline)
     for original_sentence in sentences_creator(api_key, count=num_sentences):
@@ -46,6 +91,266 @@ def run_translation_pipeline(api_key: str, num_sentences: int = 100):
         print(f"Original: {original_sentence} | Final Translated: {final_english_output}")
 
     print(f"\n=== Pipeline Complete: Processed {sentence_count} sentences ===")
+    report_throughput(sentence_count, time.perf_counter() - start_time)
+    report_translation_cache()
+    report_scheduler()
+    report_hedging()
+
+
+def chained_round_trip_outputs(text: str, api_key: str) -> Dict[str, str]:
+    """English -> Spanish -> Hebrew -> English through the chain engine, with every hop's output."""
+    spanish_output, hebrew_output, english_output = run_chain(text, ROUND_TRIP_CHAIN, api_key)
+    return {'spanish': spanish_output, 'hebrew': hebrew_output, 'english': english_output}
+
+
+async def chained_round_trip_outputs_async(text: str, api_key: str) -> Dict[str, str]:
+    """Async variant of chained_round_trip_outputs."""
+    # Each hop awaits only its own predecessor, so other sentences keep
+    # their requests in flight while this one waits on the network.
+    spanish_output, hebrew_output, english_output = await run_chain_async(text, ROUND_TRIP_CHAIN, api_key)
+    return {'spanish': spanish_output, 'hebrew': hebrew_output, 'english': english_output}
+
+
+def chained_round_trip(text: str, api_key: str) -> str:
+    """English -> Spanish -> Hebrew -> English through the chain engine (three calls)."""
+    return chained_round_trip_outputs(text, api_key)['english']
+
+
+async def chained_round_trip_async(text: str, api_key: str) -> str:
+    """Async variant of chained_round_trip."""
+    return (await chained_round_trip_outputs_async(text, api_key))['english']
+
+
+def _split_output(output: RoundTripOutput) -> Tuple[str, Dict[str, str]]:
+    """Final English text and intermediate hop outputs of a round trip's result."""
+    if isinstance(output, str):
+        return output, {}
+    return output['english'], {key: output[key] for key in INTERMEDIATE_KEYS if key in output}
+
+
+def translate_sequentially(sentences: Iterable[str], api_key: str, total: Optional[int] = None,
+                           on_result: Optional[ResultCallback] = None,
+                           round_trip: RoundTrip = chained_round_trip) -> List[Tuple[str, str]]:
+    """
+    Translate sentences through the chain one at a time, skipping failed sentences.
+
+    Args:
+        sentences: Iterable of English sentences, e.g. sentences_creator(...)
+        api_key: Claude API key for all agent operations
+        total: Expected number of sentences, used only for progress output
+        on_result: Optional callback invoked as each sentence completes
+        round_trip: Function translating one sentence through the whole chain
+            (chained_round_trip, or fused_translation.fused_round_trip); the
+            *_outputs variants also pass the intermediates to on_result
+
+    Returns:
+        List of (original_sentence, final_translated_sentence) tuples in generation order
+    """
+    results = []
+
+    for sentence_count, original_sentence in enumerate(sentences, start=1):
+        print(f"[{sentence_count}/{total or '?'}] Processing...")
+
+        try:
+            with span("sentence", index=sentence_count - 1):
+                final_english_output, intermediates = _split_output(round_trip(original_sentence, api_key))
+
+            print(f"Original: {original_sentence} | Final: {final_english_output}")
+            if on_result is not None:
+                on_result(sentence_count - 1, original_sentence, final_english_output, intermediates)
+            results.append((original_sentence, final_english_output))
+        except Exception as e:
+            print(f"ERROR on sentence {sentence_count}: {str(e)}")
+            continue
+
+    return results
+
+
+async def _translate_chain_async(index: int, original_sentence: str, api_key: str,
+                                 semaphore: asyncio.Semaphore, on_result: Optional[ResultCallback],
+                                 round_trip: AsyncRoundTrip, results: Dict[int, Tuple[str, str]]) -> None:
+    """
+    Run one sentence through the round trip and store its result, releasing its concurrency slot when done.
+
+    Errors (including errors raised by on_result) are reported per sentence and
+    leave no result, mirroring the sequential pipeline's try/except so one
+    failed sentence never aborts the run.
+    """
+    try:
+        with span("sentence", index=index):
+            final_english_output, intermediates = _split_output(await round_trip(original_sentence, api_key))
+
+        print(f"[{index + 1}] Original: {original_sentence} | Final Translated: {final_english_output}")
+        if on_result is not None:
+            on_result(index, original_sentence, final_english_output, intermediates)
+        results[index] = (original_sentence, final_english_output)
+    except Exception as e:
+        print(f"ERROR on sentence {index + 1}: {str(e)}")
+    finally:
+        semaphore.release()
+
+
+async def translate_concurrently(sentences: Iterable[str], api_key: str,
+                                 concurrency: int = DEFAULT_CONCURRENCY,
+                                 on_result: Optional[ResultCallback] = None,
+                                 round_trip: AsyncRoundTrip = chained_round_trip_async) -> List[Tuple[str, str]]:
+    """
+    Translate sentences through the chain with up to `concurrency` sentences in flight.
+
+    Sentences are pulled from the (blocking) iterable in a worker thread, so a
+    sentence starts translating as soon as it is generated. A new sentence is
+    only admitted once a slot is free, so at most `concurrency` tasks (and
+    their requests) exist at any time; finished tasks are dropped and only
+    their (original, final) pairs are kept for the returned list.
+
+    Args:
+        sentences: Iterable of English sentences, e.g. sentences_creator(...)
+        api_key: Claude API key for all agent operations
+        concurrency: Maximum number of sentences being translated at once
+        on_result: Optional callback invoked as each sentence completes
+        round_trip: Coroutine function translating one sentence through the whole
+            chain (chained_round_trip_async, or fused_translation.fused_round_trip_async);
+            the *_outputs variants also pass the intermediates to on_result
+
+    Returns:
+        List of (original_sentence, final_translated_sentence) tuples in the
+        original sentence order; failed sentences are omitted
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+
+    semaphore = asyncio.Semaphore(concurrency)
+    iterator = iter(sentences)
+    in_flight: Set[asyncio.Task] = set()
+    results: Dict[int, Tuple[str, str]] = {}
+    index = 0
+
+    while True:
+        await semaphore.acquire()
+        original_sentence = await asyncio.to_thread(next, iterator, None)
+        if original_sentence is None:
+            semaphore.release()
+            break
+        task = asyncio.create_task(
+            _translate_chain_async(index, original_sentence, api_key, semaphore, on_result, round_trip, results))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+        index += 1
+
+    if in_flight:
+        await asyncio.gather(*in_flight)
+    return [results[index] for index in sorted(results)]
+
+
+async def run_translation_pipeline_async(api_key: str, num_sentences: int = 100,
+                                         concurrency: int = DEFAULT_CONCURRENCY) -> List[Tuple[str, str]]:
+    """
+    Orchestrator (concurrent mode): Same pipeline as run_translation_pipeline, with
+    up to `concurrency` sentences moving through the chain at the same time.
+
+    Args:
+        api_key: Claude API key for all agent operations
+        num_sentences: Number of sentences to generate and process (default: 100)
+        concurrency: Maximum number of sentences in flight (default: 10)
+
+    Returns:
+        List of (original_sentence, final_translated_sentence) tuples in generation order
+    """
+    print("=== Multi-Agent Translation Pipeline (concurrent) ===")
+    print("Pipeline: English -> Spanish -> Hebrew -> English")
+    print(f"Generating and processing {num_sentences} sentences, {concurrency} in flight...\n")
+
+    start_time = time.perf_counter()
+    results = await translate_concurrently(sentences_creator(api_key, count=num_sentences),
+                                           api_key, concurrency)
+
+    print(f"\n=== Pipeline Complete: Processed {len(results)} sentences ===")
+    report_throughput(len(results), time.perf_counter() - start_time)
+    report_translation_cache()
+    report_scheduler()
+    report_hedging()
+    return results
+
+
+def translate_in_batches(sentences: Iterable[str], api_key: str, batch_size: int = DEFAULT_BATCH_SIZE,
+                         on_result: Optional[ResultCallback] = None) -> List[Tuple[str, str]]:
+    """
+    Translate sentences through the chain `batch_size` sentences per request.
+
+    Sentences are consumed from the iterable batch by batch, so translation of
+    the first batch starts before generation has finished. If any hop of a
+    batch fails, the error is reported and that batch is skipped; an error
+    raised by on_result drops only its sentence.
+
+    Args:
+        sentences: Iterable of English sentences, e.g. sentences_creator(...)
+        api_key: Claude API key for all agent operations
+        batch_size: Number of sentences packed into each request
+        on_result: Optional callback invoked as each sentence completes
+
+    Returns:
+        List of (original_sentence, final_translated_sentence) tuples in generation order
+    """
+    results = []
+    iterator = iter(sentences)
+    batch_start = 0
+
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            break
+
+        try:
+            with span("batch", first_index=batch_start, sentences=len(batch)):
+                spanish_outputs = english_spanish_translator_batch(batch, api_key, batch_size)
+                hebrew_outputs = spanish_hebrew_translator_batch(spanish_outputs, api_key, batch_size)
+                final_english_outputs = hebrew_english_translator_batch(hebrew_outputs, api_key, batch_size)
+        except Exception as e:
+            print(f"ERROR on sentences {batch_start + 1}-{batch_start + len(batch)}: {str(e)}")
+            batch_start += len(batch)
+            continue
+
+        for offset, (original_sentence, final_english_output) in enumerate(zip(batch, final_english_outputs)):
+            print(f"[{batch_start + offset + 1}] Original: {original_sentence} | Final Translated: {final_english_output}")
+            try:
+                if on_result is not None:
+                    on_result(batch_start + offset, original_sentence, final_english_output,
+                              {'spanish': spanish_outputs[offset], 'hebrew': hebrew_outputs[offset]})
+                results.append((original_sentence, final_english_output))
+            except Exception as e:
+                print(f"ERROR on sentence {batch_start + offset + 1}: {str(e)}")
+        batch_start += len(batch)
+
+    return results
+
+
+def run_translation_pipeline_batched(api_key: str, num_sentences: int = 100,
+                                     batch_size: int = DEFAULT_BATCH_SIZE) -> List[Tuple[str, str]]:
+    """
+    Orchestrator (batched mode): Same pipeline as run_translation_pipeline, with each
+    hop translating `batch_size` sentences per request (about batch_size-fold fewer calls).
+
+    Args:
+        api_key: Claude API key for all agent operations
+        num_sentences: Number of sentences to generate and process (default: 100)
+        batch_size: Sentences per request (default: 10)
+
+    Returns:
+        List of (original_sentence, final_translated_sentence) tuples in generation order
+    """
+    print("=== Multi-Agent Translation Pipeline (batched) ===")
+    print("Pipeline: English -> Spanish -> Hebrew -> English")
+    print(f"Generating and processing {num_sentences} sentences, {batch_size} per request...\n")
+
+    start_time = time.perf_counter()
+    results = translate_in_batches(sentences_creator(api_key, count=num_sentences), api_key, batch_size)
+
+    print(f"\n=== Pipeline Complete: Processed {len(results)} sentences ===")
+    report_throughput(len(results), time.perf_counter() - start_time)
+    report_translation_cache()
+    report_scheduler()
+    report_hedging()
+    return results
 
 
 def main():
@@ -0,0 +1,322 @@
+import io
+import os
+import json
+import time
+import pstats
+import asyncio
+import cProfile
+import threading
+import tracemalloc as _tracemalloc  # the profiler's `tracemalloc` flag would shadow the module
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+
+PROFILE_MODES = ("trace", "cprofile", "tracemalloc")
+TRACE_FILE = "profile_trace.json"
+CPU_FILE = "profile_cpu.txt"
+CPU_STATS_FILE = "profile_cpu.prof"
+MEMORY_FILE = "profile_memory.txt"
+TOP_FUNCTIONS = 25
+TOP_ALLOCATIONS = 30
+
+_NULL_SPAN = nullcontext()
+
+
+def parse_profile_modes(value: Optional[str]) -> Set[str]:
+    """
+    Turn "trace", "cprofile,tracemalloc", ... into a set of modes.
+
+    Tracing is always included when anything is enabled; "" or None means off.
+    """
+    if not value or value.lower() in ("0", "off", "false"):
+        return set()
+    modes = {mode.strip().lower() for mode in value.split(",") if mode.strip()}
+    if modes & {"1", "on", "true"}:
+        modes = (modes - {"1", "on", "true"}) | {"trace"}
+    unknown = modes - set(PROFILE_MODES)
+    if unknown:
+        raise ValueError(f"Unknown profile mode(s): {', '.join(sorted(unknown))}. "
+                         f"Expected: {', '.join(PROFILE_MODES)}")
+    return modes | {"trace"}
+
+
+class PipelineProfiler:
+    """
+    Lightweight spans for pipeline stages, exported as a Chrome trace.
+
+    span() records a complete event per stage (sentence generation requests,
+    translator hops, model loading, encoding, plotting, file writes). Every
+    thread and every asyncio task gets its own lane, so concurrent sentences,
+    background encoding and idle gaps are visible in chrome://tracing or
+    https://ui.perfetto.dev. cpu_stage() marks local CPU work: with cprofile
+    it is also run under cProfile, and with tracemalloc its net allocation is
+    recorded and the top allocation sites are dumped at the end.
+
+    A disabled profiler hands out a shared no-op context manager, so the
+    instrumentation costs one attribute check per span.
+
+    Args:
+        enabled: Record spans at all
+        cprofile: Run cpu_stage() blocks under cProfile
+        tracemalloc: Trace allocations (slows Python code down noticeably)
+        clock: Monotonic clock in seconds
+    """
+
+    def __init__(self, enabled: bool = True, cprofile: bool = False, tracemalloc: bool = False,
+                 clock=time.perf_counter):
+        self.enabled = enabled
+        self.cprofile = enabled and cprofile
+        self.tracemalloc = enabled and tracemalloc
+        self.clock = clock
+        self._origin = clock()
+        self._lock = threading.Lock()
+        self._events: List[Dict] = []
+        self._task_lanes: Dict[asyncio.Task, List[int]] = {}
+        self._free_lanes: List[int] = []
+        self._lane_names: Dict[int, str] = {}
+        self._profiles: Dict[str, List[cProfile.Profile]] = {}
+        self._stage_totals: Dict[str, List[float]] = {}
+        self._local = threading.local()
+        self._baseline = None
+        if self.tracemalloc:
+            if not _tracemalloc.is_tracing():
+                _tracemalloc.start(10)
+            self._baseline = _tracemalloc.take_snapshot()
+
+    @classmethod
+    def from_env(cls) -> "PipelineProfiler":
+        """Build from TURINGCHAIN_PROFILE (e.g. "trace" or "trace,cprofile,tracemalloc"; unset = disabled)."""
+        return cls.from_modes(os.getenv("TURINGCHAIN_PROFILE"))
+
+    @classmethod
+    def from_modes(cls, value: Optional[str]) -> "PipelineProfiler":
+        """Build from a comma-separated list of PROFILE_MODES."""
+        modes = parse_profile_modes(value)
+        return cls(enabled=bool(modes), cprofile="cprofile" in modes, tracemalloc="tracemalloc" in modes)
+
+    def _new_lane(self, name: str) -> int:
+        with self._lock:
+            lane = len(self._lane_names) + 1
+            self._lane_names[lane] = name
+        return lane
+
+    def _enter_lane(self) -> Tuple[int, Optional[asyncio.Task]]:
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        if task is None:
+            lane = getattr(self._local, 'lane', None)
+            if lane is None:
+                lane = self._local.lane = self._new_lane(threading.current_thread().name)
+            return lane, None
+        # A task holds a lane while one of its spans is open; idle lanes are reused,
+        # so a run shows about `concurrency` async lanes rather than one per sentence
+        with self._lock:
+            entry = self._task_lanes.get(task)
+            if entry is None:
+                if self._free_lanes:
+                    lane = self._free_lanes.pop()
+                else:
+                    lane = len(self._lane_names) + 1
+                    self._lane_names[lane] = f"async lane {lane}"
+                entry = self._task_lanes[task] = [lane, 0]
+            entry[1] += 1
+            return entry[0], task
+
+    def _exit_lane(self, task: Optional[asyncio.Task]) -> None:
+        if task is None:
+            return
+        with self._lock:
+            entry = self._task_lanes[task]
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._task_lanes[task]
+                self._free_lanes.append(entry[0])
+
+    def _record(self, name: str, category: str, start: float, end: float, lane: int, args: Dict) -> None:
+        event = {'name': name, 'cat': category, 'ph': 'X', 'pid': os.getpid(), 'tid': lane,
+                 'ts': (start - self._origin) * 1e6, 'dur': (end - start) * 1e6}
+        if args:
+            event['args'] = args
+        with self._lock:
+            self._events.append(event)
+            totals = self._stage_totals.setdefault(f"{category}/{name}", [0, 0.0])
+            totals[0] += 1
+            totals[1] += end - start
+
+    @contextmanager
+    def _span(self, name: str, category: str, args: Dict) -> Iterator[Dict]:
+        lane, task = self._enter_lane()
+        start = self.clock()
+        try:
+            yield args
+        finally:
+            self._record(name, category, start, self.clock(), lane, args)
+            self._exit_lane(task)
+
+    def span(self, name: str, category: str = "stage", **args):
+        """
+        Context manager timing one stage; yields its args dict, which may be
+        extended (None when profiling is off).
+
+        Args:
+            name: Span name shown in the timeline (e.g. 'english_spanish')
+            category: Group of the span ('stage', 'api', 'cpu', 'io', ...)
+            **args: Values shown when the span is selected
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return self._span(name, category, args)
+
+    @contextmanager
+    def _cpu_stage(self, name: str, args: Dict) -> Iterator[Dict]:
+        profile = None
+        # One profiler per thread at a time; nested stages count towards the outer one
+        if self.cprofile and not getattr(self._local, 'profiling', False):
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+                self._local.profiling = True
+            except ValueError:
+                # Another thread's profiler is active (Python 3.12+ allows only one)
+                profile = None
+        memory_before = _tracemalloc.get_traced_memory()[0] if self.tracemalloc else 0
+        with self._span(name, "cpu", args):
+            try:
+                yield args
+            finally:
+                if profile is not None:
+                    profile.disable()
+                    self._local.profiling = False
+                    with self._lock:
+                        self._profiles.setdefault(name, []).append(profile)
+                if self.tracemalloc:
+                    current, peak = _tracemalloc.get_traced_memory()
+                    args['allocated_mb'] = round((current - memory_before) / 2 ** 20, 3)
+                    args['traced_peak_mb'] = round(peak / 2 ** 20, 3)
+
+    def cpu_stage(self, name: str, **args):
+        """Like span(), for local CPU work that cProfile/tracemalloc should cover."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return self._cpu_stage(name, args)
+
+    def trace(self) -> Dict:
+        """The Chrome trace document (Trace Event Format)."""
+        with self._lock:
+            events = list(self._events)
+            lane_names = dict(self._lane_names)
+        metadata = [{'name': 'process_name', 'ph': 'M', 'pid': os.getpid(), 'args': {'name': 'turingchain'}}]
+        metadata += [{'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': lane, 'args': {'name': name}}
+                     for lane, name in sorted(lane_names.items())]
+        return {'traceEvents': metadata + sorted(events, key=lambda event: event['ts']), 'displayTimeUnit': 'ms'}
+
+    def stage_totals(self) -> Dict[str, Dict[str, float]]:
+        """Span count and total seconds per 'category/name'."""
+        with self._lock:
+            return {key: {'count': count, 'seconds': seconds} for key, (count, seconds) in self._stage_totals.items()}
+
+    def _write_cpu_profiles(self, directory: Path) -> List[Path]:
+        with self._lock:
+            profiles = {stage: list(items) for stage, items in self._profiles.items()}
+        if not profiles:
+            return []
+        merged = None
+        with open(directory / CPU_FILE, 'w', encoding='utf-8') as f:
+            for stage, items in sorted(profiles.items()):
+                stream = io.StringIO()
+                stats = pstats.Stats(items[0], stream=stream)
+                for profile in items[1:]:
+                    stats.add(profile)
+                stats.sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+                f.write(f"{'=' * 70}\nSTAGE: {stage} ({len(items)} profiled runs)\n{'=' * 70}\n")
+                f.write(stream.getvalue() + "\n")
+                if merged is None:
+                    merged = pstats.Stats(items[0], stream=io.StringIO())
+                    items = items[1:]
+                for profile in items:
+                    merged.add(profile)
+        merged.dump_stats(str(directory / CPU_STATS_FILE))
+        return [directory / CPU_FILE, directory / CPU_STATS_FILE]
+
+    def _write_memory_report(self, directory: Path) -> List[Path]:
+        if not self.tracemalloc or not _tracemalloc.is_tracing():
+            return []
+        snapshot = _tracemalloc.take_snapshot().filter_traces([
+            _tracemalloc.Filter(False, _tracemalloc.__file__),
+            _tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ])
+        current, peak = _tracemalloc.get_traced_memory()
+        with open(directory / MEMORY_FILE, 'w', encoding='utf-8') as f:
+            f.write(f"Traced memory: {current / 2 ** 20:.1f} MB now, {peak / 2 ** 20:.1f} MB peak\n\n")
+            f.write(f"Top {TOP_ALLOCATIONS} allocation sites grown since profiling started:\n")
+            for stat in snapshot.compare_to(self._baseline, 'lineno')[:TOP_ALLOCATIONS]:
+                f.write(f"  {stat}\n")
+            f.write(f"\nTop {TOP_ALLOCATIONS} live allocation sites:\n")
+            for stat in snapshot.statistics('lineno')[:TOP_ALLOCATIONS]:
+                f.write(f"  {stat}\n")
+        return [directory / MEMORY_FILE]
+
+    def save(self, directory: Path) -> List[Path]:
+        """
+        Write the trace (and the cProfile/tracemalloc reports when enabled).
+
+        Args:
+            directory: Output folder (e.g. Insights)
+
+        Returns:
+            Paths of the files written
+        """
+        if not self.enabled:
+            return []
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        with open(directory / TRACE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(self.trace(), f)
+        return [directory / TRACE_FILE] + self._write_cpu_profiles(directory) + self._write_memory_report(directory)
+
+    def report(self) -> None:
+        """Print total time per stage, slowest first."""
+        totals = sorted(self.stage_totals().items(), key=lambda item: -item[1]['seconds'])
+        if not totals:
+            return
+        print("Profile (summed span time; concurrent spans overlap):")
+        for key, total in totals:
+            print(f"  {key:40s} {total['count']:6d}x {total['seconds']:10.3f}s")
+
+
+_profiler: Optional[PipelineProfiler] = None
+_profiler_lock = threading.Lock()
+
+
+def configure_profiling(profiler: Optional[PipelineProfiler]) -> None:
+    """Install the process-wide profiler (None rebuilds it from the environment on next use)."""
+    global _profiler
+    _profiler = profiler
+
+
+def get_profiler() -> PipelineProfiler:
+    """Return the process-wide profiler, creating it from the environment on first use."""
+    global _profiler
+    if _profiler is None:
+        with _profiler_lock:
+            if _profiler is None:
+                _profiler = PipelineProfiler.from_env()
+    return _profiler
+
+
+def span(name: str, category: str = "stage", **args):
+    """Time a stage on the process-wide profiler (no-op unless profiling is enabled)."""
+    return get_profiler().span(name, category, **args)
+
+
+def cpu_stage(name: str, **args):
+    """Time local CPU work on the process-wide profiler, under cProfile/tracemalloc when enabled."""
+    return get_profiler().cpu_stage(name, **args)
+
+
+def save_profile(directory: Path) -> List[Path]:
+    """Write the process-wide profile into `directory`; nothing when profiling is off."""
+    return get_profiler().save(directory)
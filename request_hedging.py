@@ -0,0 +1,298 @@
+import os
+import time
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from agent_metrics import get_agent_metrics
+from llm_backend import LLMResponse
+
+
+DEFAULT_QUANTILE = 0.95
+DEFAULT_BUDGET = 0.05
+DEFAULT_MIN_SAMPLES = 20
+DEFAULT_WINDOW = 200
+DEFAULT_MIN_DELAY = 0.05
+DEFAULT_THREADS = 128
+
+# Called when a hedge is due: returns a function freeing the hedge's scheduler
+# slot once it is done, or None to hold the hedge back (see RequestScheduler.admit_hedge)
+HedgeAdmission = Callable[[], Optional[Callable[[], None]]]
+
+
+def _no_release() -> None:
+    pass
+
+
+class HedgingPolicy:
+    """
+    Duplicate slow requests and keep whichever copy answers first.
+
+    Each agent's recent latencies are kept in a rolling window. Once a call
+    has been running longer than that agent's `quantile` latency, an
+    identical hedge request is fired; the first successful response wins and
+    the other copy is cancelled. Hedges are capped at `budget` times the
+    number of calls, so they add at most that share of extra requests.
+
+    The policy wraps a single backend attempt (claude_client runs it inside
+    the request scheduler), so only successful attempts feed the latency
+    window: throttled or failed attempts and the scheduler's backoff never do.
+    Callers pass `admit` so each hedge takes its own scheduler admission (rate
+    buckets and an in-flight slot); hedges that cannot get one right away, e.g.
+    while the scheduler backs off from throttling, are held back.
+
+    Async calls cancel the losing task (and with it the HTTP request). A
+    blocking call cannot be interrupted, so in sync mode the losing copy is
+    abandoned and runs to completion in the background. Tokens spent by
+    losing copies are not recorded in agent_metrics.
+
+    Args:
+        enabled: Hedge at all (a disabled policy just runs the request)
+        quantile: Per-agent latency quantile after which a hedge fires
+        budget: Maximum hedges as a share of calls (0.05 = 5% extra requests)
+        min_samples: Latencies an agent needs before it can be hedged
+        window: Latencies kept per agent for the quantile
+        min_delay: Lower bound of the hedge delay in seconds
+        threads: Worker threads for blocking calls
+    """
+
+    def __init__(self, enabled: bool = True, quantile: float = DEFAULT_QUANTILE, budget: float = DEFAULT_BUDGET,
+                 min_samples: int = DEFAULT_MIN_SAMPLES, window: int = DEFAULT_WINDOW,
+                 min_delay: float = DEFAULT_MIN_DELAY, threads: int = DEFAULT_THREADS):
+        if not 0.0 < quantile < 1.0:
+            raise ValueError("quantile must be between 0 and 1")
+        self.enabled = enabled
+        self.quantile = quantile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.window = window
+        self.min_delay = min_delay
+        self.threads = threads
+        self.calls = 0
+        self.hedged = 0
+        self.wins = 0
+        self.over_budget = 0
+        self.suppressed = 0
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "HedgingPolicy":
+        """Build a policy from TURINGCHAIN_HEDGE (1 = on), _HEDGE_QUANTILE and _HEDGE_BUDGET."""
+        return cls(
+            enabled=os.getenv("TURINGCHAIN_HEDGE", "0") == "1",
+            quantile=float(os.getenv("TURINGCHAIN_HEDGE_QUANTILE", DEFAULT_QUANTILE)),
+            budget=float(os.getenv("TURINGCHAIN_HEDGE_BUDGET", DEFAULT_BUDGET)),
+        )
+
+    def observe(self, agent: str, latency: float) -> None:
+        """Add a completed call's latency to the agent's window."""
+        with self._lock:
+            window = self._latencies.get(agent)
+            if window is None:
+                window = self._latencies[agent] = deque(maxlen=self.window)
+            window.append(latency)
+
+    def threshold(self, agent: str) -> Optional[float]:
+        """Current hedge delay for `agent`, or None while it has too few samples."""
+        with self._lock:
+            window = self._latencies.get(agent)
+            if window is None or len(window) < self.min_samples:
+                return None
+            ordered = sorted(window)
+        return max(self.min_delay, ordered[min(len(ordered) - 1, int(self.quantile * len(ordered)))])
+
+    def _start(self, agent: str) -> Optional[float]:
+        with self._lock:
+            self.calls += 1
+        return self.threshold(agent) if self.enabled else None
+
+    def _admit(self, agent: str, admit: Optional[HedgeAdmission]) -> Optional[Callable[[], None]]:
+        """Budget, then scheduler admission, for a hedge; returns its release function or None."""
+        with self._lock:
+            if self.hedged + 1 > self.budget * self.calls:
+                self.over_budget += 1
+                return None
+            self.hedged += 1
+        release = admit() if admit is not None else _no_release
+        if release is None:
+            with self._lock:
+                self.hedged -= 1
+                self.suppressed += 1
+            return None
+        get_agent_metrics().record_hedge(agent)
+        return release
+
+    def _won(self, agent: str) -> None:
+        with self._lock:
+            self.wins += 1
+        get_agent_metrics().record_hedge_win(agent)
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="hedge")
+            return self._executor
+
+    @staticmethod
+    def _timed(request: Callable[[], LLMResponse]) -> Tuple[float, LLMResponse]:
+        start = time.perf_counter()
+        response = request()
+        return time.perf_counter() - start, response
+
+    @staticmethod
+    async def _timed_async(request: Callable[[], Awaitable[LLMResponse]]) -> Tuple[float, LLMResponse]:
+        start = time.perf_counter()
+        response = await request()
+        return time.perf_counter() - start, response
+
+    def call(self, agent: str, request: Callable[[], LLMResponse],
+             admit: Optional[HedgeAdmission] = None) -> LLMResponse:
+        """
+        Run a blocking request, hedging it if it outlives the agent's threshold.
+
+        Args:
+            agent: Agent the latency window and counters belong to
+            request: Zero-argument function performing one backend attempt;
+                called a second time for the hedge
+            admit: Asked when the hedge is due (e.g. RequestScheduler.admit_hedge);
+                None from it holds the hedge back, otherwise the returned function
+                is called once the hedge finishes or is cancelled
+
+        Returns:
+            The first successful response (the primary's error if both copies fail)
+        """
+        threshold = self._start(agent)
+        if threshold is None:
+            latency, response = self._timed(request)
+            self.observe(agent, latency)
+            return response
+
+        primary = self._pool().submit(self._timed, request)
+        done, _ = wait([primary], timeout=threshold)
+        release = None if done else self._admit(agent, admit)
+        if release is None:
+            latency, response = primary.result()
+            self.observe(agent, latency)
+            return response
+
+        hedge = self._pool().submit(self._timed, request)
+        # An abandoned hedge keeps its slot until it actually completes
+        hedge.add_done_callback(lambda _: release())
+        pending = {primary, hedge}
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        if future is hedge:
+                            self._won(agent)
+                        latency, response = future.result()
+                        self.observe(agent, latency)
+                        return response
+        finally:
+            for future in pending:
+                future.cancel()
+        return primary.result()
+
+    async def acall(self, agent: str, request: Callable[[], Awaitable[LLMResponse]],
+                    admit: Optional[HedgeAdmission] = None) -> LLMResponse:
+        """Async variant of call(); `request` returns a fresh awaitable per copy and the loser is cancelled."""
+        threshold = self._start(agent)
+        if threshold is None:
+            latency, response = await self._timed_async(request)
+            self.observe(agent, latency)
+            return response
+
+        primary = asyncio.ensure_future(self._timed_async(request))
+        pending = {primary}
+        hedge: Optional[asyncio.Future] = None
+        try:
+            done, _ = await asyncio.wait(pending, timeout=threshold)
+            release = None if done else self._admit(agent, admit)
+            if release is None:
+                latency, response = await primary
+                self.observe(agent, latency)
+                return response
+
+            hedge = asyncio.ensure_future(self._timed_async(request))
+            hedge.add_done_callback(lambda _: release())
+            pending.add(hedge)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self._won(agent)
+                        latency, response = task.result()
+                        self.observe(agent, latency)
+                        return response
+            return primary.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> Dict:
+        """Counters for this process plus each agent's current threshold."""
+        with self._lock:
+            agents = list(self._latencies)
+            stats = {
+                'enabled': self.enabled,
+                'quantile': self.quantile,
+                'budget': self.budget,
+                'calls': self.calls,
+                'hedged': self.hedged,
+                'wins': self.wins,
+                'over_budget': self.over_budget,
+                'suppressed': self.suppressed,
+            }
+        stats['thresholds_s'] = {agent: self.threshold(agent) for agent in sorted(agents)}
+        return stats
+
+    def report(self) -> None:
+        """Print how often hedges fired and won."""
+        stats = self.stats()
+        fired = stats['hedged'] / stats['calls'] if stats['calls'] else 0.0
+        won = stats['wins'] / stats['hedged'] if stats['hedged'] else 0.0
+        print(f"Request hedging (p{stats['quantile'] * 100:g}, budget {stats['budget']:.0%}): "
+              f"{stats['hedged']} hedges fired on {stats['calls']} calls ({fired:.1%}), "
+              f"{stats['wins']} won ({won:.0%}), {stats['over_budget']} skipped over budget, "
+              f"{stats['suppressed']} held back by the scheduler")
+
+    def shutdown(self) -> None:
+        """Stop the thread pool without waiting for abandoned copies."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+_hedging: Optional[HedgingPolicy] = None
+_hedging_lock = threading.Lock()
+
+
+def configure_hedging(policy: Optional[HedgingPolicy]) -> None:
+    """Install the process-wide hedging policy (None rebuilds it from the environment on next use)."""
+    global _hedging
+    if _hedging is not None and _hedging is not policy:
+        _hedging.shutdown()
+    _hedging = policy
+
+
+def get_hedging() -> HedgingPolicy:
+    """Return the process-wide hedging policy, creating it from the environment on first use."""
+    global _hedging
+    if _hedging is None:
+        with _hedging_lock:
+            if _hedging is None:
+                _hedging = HedgingPolicy.from_env()
+    return _hedging
+
+
+def report_hedging() -> None:
+    """Print the process-wide hedging counters, if hedging is enabled and was used."""
+    if _hedging is not None and _hedging.enabled and _hedging.calls:
+        _hedging.report()
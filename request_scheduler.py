@@ -0,0 +1,425 @@
+import os
+import time
+import random
+import asyncio
+import threading
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from llm_backend import LLMResponse, LLMStream, RateLimitedError, TransientBackendError
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at `rate_per_minute`.
+
+    reserve() always succeeds immediately and returns how long the caller must
+    wait before using what it reserved, so the same bucket serves both
+    time.sleep (threads) and asyncio.sleep (coroutines).
+
+    Args:
+        rate_per_minute: Sustained refill rate
+        capacity: Maximum burst (default: one second's worth, at least 1)
+        clock: Monotonic clock, replaceable in tests
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else max(1.0, self.rate)
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float = 1.0) -> float:
+        """
+        Take `amount` tokens, going into debt if necessary.
+
+        Returns:
+            Seconds to wait before the reserved tokens are actually available
+        """
+        with self._lock:
+            self._refill()
+            self._tokens -= amount
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+    def try_reserve(self, amount: float = 1.0) -> bool:
+        """Take `amount` tokens only if they are available right now (never goes into debt)."""
+        with self._lock:
+            self._refill()
+            if self._tokens < amount:
+                return False
+            self._tokens -= amount
+            return True
+
+    def adjust(self, amount: float) -> None:
+        """Return (positive) or charge (negative) tokens once the real cost is known."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + amount)
+
+
+class AIMDController:
+    """
+    Additive-increase / multiplicative-decrease limit on requests in flight.
+
+    Each success raises the limit by 1/limit (about +1 per round of requests);
+    a throttling response halves it, at most once per `cooldown` seconds so a
+    burst of 429s from the same moment counts as one signal.
+
+    Args:
+        initial: Starting limit
+        minimum: Lowest allowed limit
+        maximum: Highest allowed limit
+        decrease_factor: Multiplier applied on throttling
+        cooldown: Seconds between two decreases
+    """
+
+    def __init__(self, initial: int = 8, minimum: int = 1, maximum: int = 64,
+                 decrease_factor: float = 0.5, cooldown: float = 1.0):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self._last_decrease = float('-inf')
+        self._condition = threading.Condition()
+        # Coroutines waiting for a slot, woken (thread-safely, on their own loop) like the threads
+        self._async_waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = deque()
+
+    def try_acquire(self) -> bool:
+        """Take a slot if the current limit allows it."""
+        with self._condition:
+            if self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return True
+            return False
+
+    def acquire(self) -> None:
+        """Block the calling thread until a slot is free."""
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    async def acquire_async(self) -> None:
+        """Wait without blocking the event loop until a slot is free."""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._condition:
+                if self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return
+                waiter = (loop, asyncio.Event())
+                self._async_waiters.append(waiter)
+            try:
+                await waiter[1].wait()
+            except BaseException:
+                with self._condition:
+                    if waiter in self._async_waiters:
+                        self._async_waiters.remove(waiter)
+                    else:
+                        # Woken but cancelled before taking the slot: hand the wakeup on
+                        self._notify(1)
+                raise
+
+    def _notify(self, count: int) -> None:
+        """Wake up to `count` waiting threads and coroutines (called with the condition held)."""
+        self._condition.notify(count)
+        for _ in range(min(count, len(self._async_waiters))):
+            loop, event = self._async_waiters.popleft()
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(event.set)
+
+    def release(self) -> None:
+        """Give back a slot."""
+        with self._condition:
+            self.in_flight -= 1
+            self._notify(1)
+
+    def on_success(self) -> None:
+        """Additive increase."""
+        with self._condition:
+            self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            free = int(self.limit) - self.in_flight
+            if free > 0:
+                self._notify(free)
+
+    def on_throttle(self) -> None:
+        """Multiplicative decrease (rate limited by the cooldown)."""
+        with self._condition:
+            now = time.monotonic()
+            if now - self._last_decrease >= self.cooldown:
+                self.limit = max(self.minimum, self.limit * self.decrease_factor)
+                self._last_decrease = now
+
+    def backing_off(self) -> bool:
+        """True within `cooldown` seconds of the last decrease."""
+        with self._condition:
+            return time.monotonic() - self._last_decrease < self.cooldown
+
+
+def estimate_tokens(*texts: str) -> int:
+    """Rough token estimate (~4 characters per token) used to pre-charge the token bucket."""
+    return sum(len(text) for text in texts) // 4 + 1
+
+
+class RequestScheduler:
+    """
+    Gatekeeper in front of every backend request.
+
+    For each request it:
+    1. waits for the requests/min and tokens/min buckets (if configured),
+       and for any retry-after window announced by the server;
+    2. waits for an in-flight slot from the AIMD controller;
+    3. retries throttled (429/529) and transient failures, honoring
+       retry-after when given and otherwise backing off exponentially with
+       full jitter; throttling also shrinks the in-flight limit.
+
+    Args:
+        requests_per_minute: Request rate limit (None = unlimited)
+        tokens_per_minute: Token rate limit (None = unlimited)
+        max_retries: Retries per request before the error is raised
+        base_delay: First backoff step in seconds
+        max_delay: Upper bound of a single backoff
+        controller: In-flight limit controller (default: AIMDController())
+        rng: Random source for jitter, replaceable in tests
+    """
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None,
+                 max_retries: int = 5, base_delay: float = 0.5, max_delay: float = 30.0,
+                 controller: Optional[AIMDController] = None, rng: Optional[random.Random] = None):
+        self.request_bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.token_bucket = TokenBucket(tokens_per_minute, capacity=tokens_per_minute / 6.0) if tokens_per_minute else None
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.controller = controller or AIMDController()
+        self.requests = 0
+        self.retries = 0
+        self.throttled = 0
+        self.failures = 0
+        self._rng = rng or random.Random()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "RequestScheduler":
+        """Build a scheduler from TURINGCHAIN_RPM, _TPM, _MAX_IN_FLIGHT and _RETRIES."""
+        rpm = os.getenv("TURINGCHAIN_RPM")
+        tpm = os.getenv("TURINGCHAIN_TPM")
+        max_in_flight = int(os.getenv("TURINGCHAIN_MAX_IN_FLIGHT", 64))
+        return cls(
+            requests_per_minute=float(rpm) if rpm else None,
+            tokens_per_minute=float(tpm) if tpm else None,
+            max_retries=int(os.getenv("TURINGCHAIN_RETRIES", 5)),
+            controller=AIMDController(initial=min(8, max_in_flight), maximum=max_in_flight),
+        )
+
+    def backing_off(self) -> bool:
+        """True while the server is throttling us: a retry-after window is open or the limit was just cut."""
+        return time.monotonic() < self._blocked_until or self.controller.backing_off()
+
+    def admit_hedge(self, estimated_tokens: int = 0) -> Optional[Callable[[], None]]:
+        """
+        Admission for a hedge, the duplicate of a request already in flight.
+
+        A hedge never waits: it is only admitted while the server is not
+        throttling us, the rate buckets have room right now and the AIMD
+        controller has a free in-flight slot. It then counts like any other
+        request against all three.
+
+        Args:
+            estimated_tokens: Charge for the tokens/min bucket
+
+        Returns:
+            Function freeing the hedge's slot (call it once the hedge is done), or None
+        """
+        if self.backing_off():
+            return None
+        if self.request_bucket is not None and not self.request_bucket.try_reserve(1):
+            return None
+        if self.token_bucket is not None and not self.token_bucket.try_reserve(estimated_tokens):
+            if self.request_bucket is not None:
+                self.request_bucket.adjust(1)
+            return None
+        if not self.controller.try_acquire():
+            if self.request_bucket is not None:
+                self.request_bucket.adjust(1)
+            if self.token_bucket is not None:
+                self.token_bucket.adjust(estimated_tokens)
+            return None
+        return self.controller.release
+
+    def _admission_delay(self, estimated_tokens: int) -> float:
+        delay = max(0.0, self._blocked_until - time.monotonic())
+        if self.request_bucket is not None:
+            delay = max(delay, self.request_bucket.reserve(1))
+        if self.token_bucket is not None:
+            delay = max(delay, self.token_bucket.reserve(estimated_tokens))
+        return delay
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        retry_after = getattr(error, 'retry_after', None)
+        if retry_after is not None:
+            return retry_after
+        return self._rng.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def _on_success(self, response: LLMResponse, estimated_tokens: int, attempt: int) -> LLMResponse:
+        self.controller.on_success()
+        used_tokens = response.input_tokens + response.output_tokens
+        # Streams report usage only when they end; they keep the up-front estimate
+        if self.token_bucket is not None and used_tokens:
+            self.token_bucket.adjust(estimated_tokens - used_tokens)
+        response.retries = attempt
+        return response
+
+    def _on_failure(self, error: Exception, attempt: int) -> float:
+        """Record a failed attempt; return the delay before retrying, or raise when out of retries."""
+        with self._lock:
+            if isinstance(error, RateLimitedError):
+                self.throttled += 1
+            if attempt >= self.max_retries:
+                self.failures += 1
+                raise error
+            self.retries += 1
+
+        delay = self._backoff(attempt, error)
+        if isinstance(error, RateLimitedError):
+            self.controller.on_throttle()
+            # The server throttles the whole key, so every request waits out retry-after
+            with self._lock:
+                self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+        return delay
+
+    def call(self, request: Callable[[], LLMResponse], estimated_tokens: int = 0) -> LLMResponse:
+        """
+        Run a blocking backend request under the scheduler.
+
+        Args:
+            request: Zero-argument function performing the request
+            estimated_tokens: Pre-charge for the tokens/min bucket
+
+        Returns:
+            The backend response, with `retries` set to the number of retries it took
+        """
+        return self._call(request, estimated_tokens, keep_slot=False)
+
+    def stream(self, request: Callable[[], LLMStream], estimated_tokens: int = 0) -> LLMStream:
+        """
+        Open a streamed response under the scheduler.
+
+        Like call(), but the in-flight slot stays taken until the returned
+        stream is closed, so a stream being read counts against the limit.
+
+        Args:
+            request: Zero-argument function opening the stream
+            estimated_tokens: Pre-charge for the tokens/min bucket
+
+        Returns:
+            The open stream; close it (or use it as a context manager) to free the slot
+        """
+        return self._call(request, estimated_tokens, keep_slot=True)
+
+    def _call(self, request: Callable, estimated_tokens: int, keep_slot: bool):
+        with self._lock:
+            self.requests += 1
+
+        attempt = 0
+        while True:
+            delay = self._admission_delay(estimated_tokens)
+            if delay > 0:
+                time.sleep(delay)
+
+            self.controller.acquire()
+            try:
+                response = request()
+            except (RateLimitedError, TransientBackendError) as e:
+                self.controller.release()
+                error = e
+            except BaseException:
+                self.controller.release()
+                raise
+            else:
+                if keep_slot:
+                    response.on_close(self.controller.release)
+                else:
+                    self.controller.release()
+                return self._on_success(response, estimated_tokens, attempt)
+
+            time.sleep(self._on_failure(error, attempt))
+            attempt += 1
+
+    async def acall(self, request: Callable[[], Awaitable[LLMResponse]], estimated_tokens: int = 0) -> LLMResponse:
+        """Async variant of call(); `request` returns a fresh awaitable on every attempt."""
+        with self._lock:
+            self.requests += 1
+
+        attempt = 0
+        while True:
+            delay = self._admission_delay(estimated_tokens)
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            await self.controller.acquire_async()
+            try:
+                response = await request()
+            except (RateLimitedError, TransientBackendError) as e:
+                error = e
+            else:
+                return self._on_success(response, estimated_tokens, attempt)
+            finally:
+                self.controller.release()
+
+            await asyncio.sleep(self._on_failure(error, attempt))
+            attempt += 1
+
+    def stats(self) -> Dict[str, float]:
+        """Counters for this process plus the current in-flight limit."""
+        return {
+            'requests': self.requests,
+            'retries': self.retries,
+            'throttled': self.throttled,
+            'failures': self.failures,
+            'concurrency_limit': int(self.controller.limit),
+        }
+
+    def report(self) -> None:
+        """Print the scheduler counters."""
+        stats = self.stats()
+        print(f"Request scheduler: {stats['requests']} requests, {stats['retries']} retries, "
+              f"{stats['throttled']} throttled, {stats['failures']} gave up, "
+              f"in-flight limit {stats['concurrency_limit']}")
+
+
+_scheduler: Optional[RequestScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def configure_scheduler(scheduler: Optional[RequestScheduler]) -> None:
+    """Install the process-wide scheduler (None rebuilds it from the environment on next use)."""
+    global _scheduler
+    _scheduler = scheduler
+
+
+def get_scheduler() -> RequestScheduler:
+    """Return the process-wide scheduler, creating it from the environment on first use."""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = RequestScheduler.from_env()
+    return _scheduler
+
+
+def report_scheduler() -> None:
+    """Print the process-wide scheduler counters, if any request was made."""
+    if _scheduler is not None and _scheduler.requests:
+        _scheduler.report()
@@ -0,0 +1,216 @@
+import os
+import csv
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+
+DEFAULT_FSYNC_EVERY = 20
+DEFAULT_PIPELINE = 'English → Spanish → Hebrew → English'
+
+
+class ResultStreamWriter:
+    """
+    Append-only JSONL checkpoint of finished sentences.
+
+    Every record is flushed to the OS as soon as it is written and fsync'd to
+    disk every `fsync_every` records (and on close), so a crash loses at most
+    the last few sentences instead of the whole run.
+
+    Args:
+        path: JSONL file to append to
+        fsync_every: Records between fsync calls
+        fresh: Truncate the file instead of appending to an existing checkpoint
+    """
+
+    def __init__(self, path: Path, fsync_every: int = DEFAULT_FSYNC_EVERY, fresh: bool = False):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.fsync_every = fsync_every
+        self.written = 0
+        self._unsynced = 0
+        self._lock = threading.Lock()
+        if not fresh:
+            _drop_torn_tail(self.path)
+        self._file = open(self.path, 'w' if fresh else 'a', encoding='utf-8')
+
+    def write(self, index: int, original: str, final: str, intermediates: Optional[Dict[str, str]] = None) -> None:
+        """
+        Append one finished sentence.
+
+        Args:
+            index: Position of the sentence in the run (0-based)
+            original: Original English sentence
+            final: Final re-translated English sentence
+            intermediates: Optional intermediate texts by name (e.g. 'spanish', 'hebrew')
+        """
+        record = {'index': index, 'original': original, 'final_translated': final, **(intermediates or {})}
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            self.written += 1
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_every:
+                os.fsync(self._file.fileno())
+                self._unsynced = 0
+
+    def close(self) -> None:
+        """Flush, fsync and close the stream."""
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+
+    def __enter__(self) -> "ResultStreamWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _drop_torn_tail(path: Path) -> None:
+    """Cut a partially written last line (from a crash) so appended records start on a fresh line."""
+    if not path.exists():
+        return
+    with open(path, 'rb+') as f:
+        data_end = f.seek(0, os.SEEK_END)
+        position = data_end
+        while position > 0:
+            step = min(4096, position)
+            f.seek(position - step)
+            chunk = f.read(step)
+            newline = chunk.rfind(b"\n")
+            if newline != -1:
+                position = position - step + newline + 1
+                break
+            position -= step
+        if position != data_end:
+            f.truncate(position)
+
+
+def _scan(path: Path) -> Iterator[Tuple[int, int]]:
+    """Yield (sentence index, byte offset) for every complete record; a torn last line is skipped."""
+    if not Path(path).exists():
+        return
+    with open(path, 'rb') as f:
+        offset = 0
+        for line in f:
+            if line.endswith(b"\n"):
+                try:
+                    yield json.loads(line)['index'], offset
+                except (ValueError, KeyError):
+                    pass
+            offset += len(line)
+
+
+def load_checkpoint(path: Path) -> Set[int]:
+    """
+    Indices of the sentences already completed in a checkpoint.
+
+    Args:
+        path: JSONL checkpoint written by ResultStreamWriter
+
+    Returns:
+        Set of completed sentence indices (empty if the file does not exist)
+    """
+    return {index for index, _ in _scan(path)}
+
+
+def iter_results(path: Path) -> Iterator[Dict]:
+    """
+    Read checkpointed records in sentence order without loading the texts into memory.
+
+    Only an (index, offset) table is kept; each record is read back from disk
+    when it is yielded. If an index was written twice, the last record wins.
+
+    Args:
+        path: JSONL checkpoint written by ResultStreamWriter
+
+    Yields:
+        Records with 'index', 'original' and 'final_translated'
+    """
+    offsets: Dict[int, int] = {}
+    for index, offset in _scan(path):
+        offsets[index] = offset
+
+    with open(path, 'rb') as f:
+        for index in sorted(offsets):
+            f.seek(offsets[index])
+            yield json.loads(f.readline())
+
+
+def build_artifacts_from_stream(stream_path: Path, json_file: Path, csv_file: Path,
+                                distances: Optional[Dict[int, float]] = None,
+                                pipeline: str = DEFAULT_PIPELINE) -> int:
+    """
+    Write translation_results.json/.csv from a checkpoint, one record at a time.
+
+    Produces the same layout as before (including the indented JSON), with
+    consecutive 1-based 'index' values, without holding the results in RAM.
+
+    Args:
+        stream_path: JSONL checkpoint written by ResultStreamWriter
+        json_file: Destination of the JSON document
+        csv_file: Destination of the CSV file
+        distances: Optional cosine distance per sentence index
+        pipeline: Pipeline description stored in the JSON header
+
+    Returns:
+        Number of results written
+    """
+    rows = ((record['original'], record['final_translated'],
+             distances.get(record['index']) if distances is not None else None)
+            for record in iter_results(stream_path))
+    return write_json_csv(rows, len(load_checkpoint(stream_path)), json_file, csv_file, pipeline)
+
+
+def write_json_csv(rows: Iterable[Tuple[str, str, Optional[float]]], total: int, json_file: Path, csv_file: Path,
+                   pipeline: str = DEFAULT_PIPELINE) -> int:
+    """
+    Stream (original, final, distance) rows into translation_results.json/.csv.
+
+    Args:
+        rows: Rows in output order; distance may be None
+        total: Row count stored in the JSON header
+        json_file: Destination of the JSON document
+        csv_file: Destination of the CSV file
+        pipeline: Pipeline description stored in the JSON header
+
+    Returns:
+        Number of results written
+    """
+    with open(json_file, 'w', encoding='utf-8') as json_out, \
+            open(csv_file, 'w', newline='', encoding='utf-8') as csv_out:
+        json_out.write("{\n")
+        json_out.write(f'  "total_sentences": {total},\n')
+        json_out.write(f'  "pipeline": {json.dumps(pipeline, ensure_ascii=False)},\n')
+        json_out.write('  "results": [')
+
+        writer = csv.writer(csv_out)
+        writer.writerow(['Index', 'Original English', 'Final Re-translated English', 'Cosine Distance'])
+
+        position = 0
+        for position, (original, final, distance) in enumerate(rows, start=1):
+            entry = {
+                'index': position,
+                'original': original,
+                'final_translated': final,
+                'cosine_distance': float(distance) if distance is not None else None
+            }
+            body = json.dumps(entry, indent=2, ensure_ascii=False).replace("\n", "\n    ")
+            json_out.write(("," if position > 1 else "") + "\n    " + body)
+
+            writer.writerow([position, original, final, f"{float(distance):.6f}" if distance is not None else ""])
+
+        json_out.write("\n  ]\n}" if position else "]\n}")
+
+    return position
+
+
+def read_results(path: Path) -> List[Tuple[str, str]]:
+    """All checkpointed (original, final) pairs in sentence order."""
+    return [(record['original'], record['final_translated']) for record in iter_results(path)]
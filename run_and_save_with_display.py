@@ -1,159 +1,300 @@
+import time
+
+# Measured from the first line of the module so startup cost (imports + setup
+# before the first API call) can be reported
+_STARTUP_BEGIN = time.perf_counter()
+
 import os
+import sys
 import json
 import csv
+import asyncio
+import argparse
 from pathlib import Path
 from dotenv import load_dotenv
-from typing import List, Tuple
-from agent_english_spanish import english_spanish_translator
-from agent_spanish_hebrew import spanish_hebrew_translator
-from agent_hebrew_english import hebrew_english_translator
+from typing import Dict, List, Optional, Tuple
 from agent_sentences_creator import sentences_creator
-from agent_evaluation import evaluate_translation_quality
-import matplotlib
-import matplotlib.pyplot as plt
-
-
-def run_pipeline_save_and_display(api_key: str, num_sentences: int = 100):
+from orchestrator import (translate_sequentially, translate_concurrently, translate_in_batches, report_throughput,
+                          chained_round_trip_outputs, chained_round_trip_outputs_async)
+from fused_translation import (fused_round_trip_outputs, fused_round_trip_outputs_async, report_fused_translation,
+                               reset_fused_stats)
+from translation_cache import configure_cache, report_translation_cache
+from request_scheduler import report_scheduler
+from request_hedging import HedgingPolicy, configure_hedging, report_hedging
+from agent_metrics import reset_agent_metrics, save_agent_metrics
+from embedding_backends import EMBEDDING_BACKENDS
+from embedding_store import configure_embedding_backend
+from result_stream import ResultStreamWriter, load_checkpoint, iter_results, read_results, build_artifacts_from_stream
+from columnar_results import COLUMNS_DIR_NAME, build_columns_from_stream
+from pipeline_profiler import (CPU_FILE, CPU_STATS_FILE, MEMORY_FILE, TRACE_FILE, PipelineProfiler,
+                               configure_profiling, cpu_stage, get_profiler, parse_profile_modes, span)
+from evaluation_plots import PLOT_DATA_FILE, render_in_background, save_plot_data, summarize_distances
+
+# matplotlib, sentence-transformers and torch are imported lazily, only when
+# evaluation or plotting actually runs, so batch runs start making API calls immediately
+
+
+def run_pipeline_save_and_display(api_key: str, num_sentences: int = 100, concurrency: int = 1,
+                                  batch_size: int = 1, output_dir: Path = Path("Insights"),
+                                  evaluate: bool = True, plot: bool = True, show: bool = True,
+                                  resume: bool = False, prometheus: bool = False, fused: bool = False,
+                                  index_run: Optional[str] = None, json_csv: bool = True,
+                                  save_embeddings: bool = False, plot_in_background: bool = False):
     """
     Run complete pipeline, display results, AND save to files.
 
+    With concurrency > 1 the translation chain runs in async mode, keeping up to
+    `concurrency` sentences in flight; results keep the generation order.
+    With batch_size > 1 each hop translates `batch_size` sentences per request.
+    With fused=True each sentence makes the whole round trip in one request
+    (falling back to the three translator calls when its JSON is malformed).
+
+    Every finished sentence is appended to translation_results.jsonl (fsync'd in
+    batches) as it completes, with its Spanish and Hebrew hop outputs. With resume=True the sentences already in that
+    checkpoint are kept and only the missing indices are generated and translated.
+    With index_run set (and evaluation on) the run's embeddings are added to the
+    persistent vector index under that name ("" = timestamp plus random suffix)
+    for cross-run queries; an indexing error is reported and does not stop the run.
+    Results are always written as memory-mappable columns; json_csv=False skips
+    the legacy JSON/CSV (columnar_results.py to-json rebuilds them later).
+    With plot_in_background=True the plot is rendered by a detached process from
+    evaluation_plot_data.json, so the pipeline returns without waiting for it.
+
     Displays:
     - Console output with all metrics
-    - Interactive plot window
-
-    Saves to Insights folder:
-    - evaluation_metrics.json: Statistical results
-    - evaluation_plot.png: Visualization
-    - translation_results.json: All translation pairs
-    - translation_results.csv: All translation pairs in CSV format
+    - Interactive plot window (only when show=True)
+
+    Saves to the output folder (Insights by default):
+    - evaluation_metrics.json: Statistical results (unless evaluate=False)
+    - evaluation_plot.png: Visualization (unless evaluate=False or plot=False)
+    - evaluation_plot_data.json: Histogram, rolling bands and density the plot is drawn from
+    - translation_results.columns/: Texts, distances (and embeddings with save_embeddings=True)
+      as .npy columns plus offset-indexed string blobs
+    - translation_results.json: All translation pairs (unless json_csv=False)
+    - translation_results.csv: All translation pairs in CSV format (unless json_csv=False)
+    - translation_results.jsonl: Crash-safe checkpoint the two files above are built from
+    - agent_metrics.json: Per-agent tokens, latency histogram, retries, cache hits and cost
+    - agent_metrics.prom: The same in Prometheus text format (only when prometheus=True)
+    - profile_trace.json (+ profile_cpu.txt/.prof, profile_memory.txt): Stage timeline and
+      CPU/memory hot spots (only when profiling is enabled, see pipeline_profiler.py)
     """
+    if evaluate and plot and not show and not plot_in_background:
+        # Render off-screen; no display or GUI toolkit is needed
+        import matplotlib
+        matplotlib.use("Agg")
 
     # Create Insights directory if it doesn't exist
-    insights_dir = Path("Insights")
-    insights_dir.mkdir(exist_ok=True)
+    insights_dir = Path(output_dir)
+    insights_dir.mkdir(parents=True, exist_ok=True)
 
     print("=" * 70)
     print("TRANSLATION PIPELINE WITH EVALUATION")
     print("=" * 70)
     print(f"Pipeline: English → Spanish → Hebrew → English")
     print(f"Total Sentences: {num_sentences}")
+    print(f"Concurrency: {concurrency}")
+    print(f"Batch Size: {batch_size}")
+    print(f"Round Trip: {'fused (1 request per sentence)' if fused else 'chained (3 requests per sentence)'}")
     print(f"Output Directory: {insights_dir.absolute()}\n")
 
-    translation_results = []
-    sentence_count = 0
+    # Checkpoint: on resume, only the indices missing from the stream are processed
+    stream_file = insights_dir / 'translation_results.jsonl'
+    completed = load_checkpoint(stream_file) if resume else set()
+    pending_indices = [index for index in range(num_sentences) if index not in completed]
+    if resume:
+        print(f"Resuming: {len(completed)} sentences already completed, {len(pending_indices)} remaining\n")
+
+    metrics = reset_agent_metrics()
+    reset_fused_stats()
+    start_time = time.perf_counter()
+    sentences = sentences_creator(api_key, count=len(pending_indices))
+
+    # Pairs are embedded in the background as soon as each sentence finishes,
+    # so evaluation overlaps with the network-bound translation work
+    evaluator = None
+    if evaluate:
+        from streaming_evaluation import IncrementalEvaluator
+        evaluator = IncrementalEvaluator()
+        for record in iter_results(stream_file) if completed else ():
+            evaluator.submit(record['index'], record['original'], record['final_translated'])
+
+    writer = ResultStreamWriter(stream_file, fresh=not resume)
+
+    def on_result(position: int, original: str, final: str, intermediates: Dict[str, str]):
+        index = pending_indices[position]
+        writer.write(index, original, final, intermediates)
+        if evaluator is not None:
+            evaluator.submit(index, original, final)
 
     # Translation pipeline
-    for original_sentence in sentences_creator(api_key, count=num_sentences):
-        sentence_count += 1
-        print(f"[{sentence_count}/{num_sentences}] Processing...")
-
-        try:
-            spanish_output = english_spanish_translator(original_sentence, api_key)
-            hebrew_output = spanish_hebrew_translator(spanish_output, api_key)
-            final_english_output = hebrew_english_translator(hebrew_output, api_key)
-
-            translation_results.append((original_sentence, final_english_output))
-            print(f"Original: {original_sentence} | Final: {final_english_output}")
-        except Exception as e:
-            print(f"ERROR on sentence {sentence_count}: {str(e)}")
-            continue
+    try:
+        with span("translate", sentences=len(pending_indices), concurrency=concurrency, batch_size=batch_size):
+            if batch_size > 1:
+                translation_results = translate_in_batches(sentences, api_key, batch_size, on_result=on_result)
+            elif concurrency > 1:
+                round_trip = fused_round_trip_outputs_async if fused else chained_round_trip_outputs_async
+                translation_results = asyncio.run(translate_concurrently(
+                    sentences, api_key, concurrency, on_result=on_result, round_trip=round_trip))
+            else:
+                translation_results = translate_sequentially(
+                    sentences, api_key, total=len(pending_indices), on_result=on_result,
+                    round_trip=fused_round_trip_outputs if fused else chained_round_trip_outputs)
+    finally:
+        writer.close()
+    sentence_count = len(translation_results)
+    elapsed = time.perf_counter() - start_time
 
     print(f"\n" + "=" * 70)
     print(f"Translation Pipeline Complete: {sentence_count} sentences")
+    report_throughput(len(translation_results), elapsed)
+    report_translation_cache()
+    report_scheduler()
+    report_hedging()
+    report_fused_translation()
+    print()
+    metrics.print_report()
     print("=" * 70)
     print()
 
-    # Run evaluation
-    print("Starting Evaluation Agent...\n")
-    evaluation_metrics = evaluate_translation_quality(translation_results)
-
-    # IMPORTANT: Save the plot BEFORE showing it
-    print("\nSaving results to Insights folder...")
-
     # Define file paths in Insights directory
     plot_file = insights_dir / 'evaluation_plot.png'
+    plot_data_file = insights_dir / PLOT_DATA_FILE
     metrics_file = insights_dir / 'evaluation_metrics.json'
     json_file = insights_dir / 'translation_results.json'
     csv_file = insights_dir / 'translation_results.csv'
+    columns_dir = insights_dir / COLUMNS_DIR_NAME
 
-    # Get the figure from evaluation metrics and save
-    fig = evaluation_metrics['figure']
-    fig.savefig(plot_file, dpi=300, bbox_inches='tight', facecolor='white')
-    print(f"✓ Plot saved: {plot_file}")
-
-    # Now display the plot
-    print("\n=== Displaying plot... ===")
-    plt.show()
-
-    # Save metrics to JSON
-    metrics_to_save = {
-        'total_sentences': len(translation_results),
-        'mean_cosine_distance': float(evaluation_metrics['mean']),
-        'variance': float(evaluation_metrics['variance']),
-        'standard_deviation': float(evaluation_metrics['std']),
-        'min_distance': float(evaluation_metrics['min']),
-        'max_distance': float(evaluation_metrics['max']),
-        'interpretation': {
-            'note': 'Lower cosine distance = Higher semantic similarity',
-            'perfect_match': 0.0,
-            'completely_different': 1.0
-        }
-    }
+    evaluation_metrics = None
+    if evaluator is not None:
+        from agent_evaluation import finish_incremental_evaluation
 
-    with open(metrics_file, 'w', encoding='utf-8') as f:
-        json.dump(metrics_to_save, f, indent=2, ensure_ascii=False)
-    print(f"✓ Metrics saved: {metrics_file}")
-
-    # Save translation results to JSON
-    results_to_save = {
-        'total_sentences': len(translation_results),
-        'pipeline': 'English → Spanish → Hebrew → English',
-        'results': [
-            {
-                'index': i + 1,
-                'original': orig,
-                'final_translated': final,
-                'cosine_distance': float(evaluation_metrics['distances'][i])
+        # Collect the evaluation that ran alongside translation
+        print("Starting Evaluation Agent...\n")
+        with cpu_stage("finish evaluation"):
+            evaluation_metrics = finish_incremental_evaluation(evaluator, plot=plot and not plot_in_background)
+
+    # IMPORTANT: Save the plot BEFORE showing it
+    print("\nSaving results to Insights folder...")
+
+    if evaluation_metrics is not None and evaluation_metrics['figure'] is not None:
+        # Get the figure from evaluation metrics and save
+        fig = evaluation_metrics['figure']
+        with cpu_stage("save plot"):
+            fig.savefig(plot_file, dpi=300, bbox_inches='tight', facecolor='white')
+        print(f"✓ Plot saved: {plot_file}")
+
+        if show:
+            import matplotlib.pyplot as plt
+
+            # Now display the plot
+            print("\n=== Displaying plot... ===")
+            plt.show()
+
+    if evaluation_metrics is not None:
+        # Save metrics to JSON
+        metrics_to_save = {
+            'total_sentences': len(evaluation_metrics['distances']),
+            'mean_cosine_distance': float(evaluation_metrics['mean']),
+            'variance': float(evaluation_metrics['variance']),
+            'standard_deviation': float(evaluation_metrics['std']),
+            'min_distance': float(evaluation_metrics['min']),
+            'max_distance': float(evaluation_metrics['max']),
+            'interpretation': {
+                'note': 'Lower cosine distance = Higher semantic similarity',
+                'perfect_match': 0.0,
+                'completely_different': 1.0
             }
-            for i, (orig, final) in enumerate(translation_results)
-        ]
-    }
+        }
 
-    with open(json_file, 'w', encoding='utf-8') as f:
-        json.dump(results_to_save, f, indent=2, ensure_ascii=False)
-    print(f"✓ Translation results saved: {json_file}")
+        with open(metrics_file, 'w', encoding='utf-8') as f:
+            json.dump(metrics_to_save, f, indent=2, ensure_ascii=False)
+        print(f"✓ Metrics saved: {metrics_file}")
+
+        # Size-independent plot data, so the plot can be redrawn without the results
+        if len(evaluation_metrics['distances']):
+            with cpu_stage("plot data"):
+                save_plot_data(summarize_distances(evaluation_metrics['distances']), plot_data_file)
+            print(f"✓ Plot data saved: {plot_data_file}")
+            if plot and plot_in_background:
+                process = render_in_background(insights_dir)
+                print(f"✓ Plot rendering in background (pid {process.pid}): {plot_file}")
+
+    # Save translation results as columns (and JSON/CSV), streamed from the checkpoint
+    distances = evaluator.distances if evaluator is not None else None
+    encoder = None
+    if save_embeddings and evaluator is not None:
+        from embedding_store import encode_sentences
+        encoder = encode_sentences  # the evaluation just embedded these sentences: cache hits
+    with cpu_stage("write columns"):
+        build_columns_from_stream(stream_file, columns_dir, distances, encoder=encoder)
+    print(f"✓ Columnar results saved: {columns_dir}")
+    if json_csv:
+        with cpu_stage("write json/csv"):
+            build_artifacts_from_stream(stream_file, json_file, csv_file, distances)
+        print(f"✓ Translation results saved: {json_file}")
+        print(f"✓ CSV with distances saved: {csv_file}")
+
+    if index_run is not None and evaluator is not None:
+        from vector_index import index_run as add_run_to_index
+
+        # Sentences keep their generation index in the run; the index is optional,
+        # so a failure here must not cost the metrics and profile saved below
+        records = sorted(iter_results(stream_file), key=lambda record: record['index'])
+        try:
+            with cpu_stage("vector index"):
+                add_run_to_index([(record['original'], record['final_translated']) for record in records],
+                                 [evaluator.distances[record['index']] for record in records], index_run or None,
+                                 sentences=[record['index'] for record in records])
+        except Exception as e:
+            print(f"Vector index not updated: {e}")
+
+    for metrics_path in save_agent_metrics(insights_dir, sentence_count, elapsed, prometheus=prometheus):
+        print(f"✓ Agent metrics saved: {metrics_path}")
 
-    # Save CSV with cosine distances
-    with open(csv_file, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow(['Index', 'Original English', 'Final Re-translated English', 'Cosine Distance'])
-        for idx, (orig, final) in enumerate(translation_results):
-            cosine_dist = float(evaluation_metrics['distances'][idx])
-            writer.writerow([idx + 1, orig, final, f"{cosine_dist:.6f}"])
-    print(f"✓ CSV with distances saved: {csv_file}")
+    profiler = get_profiler()
+    profile_files = []
+    if profiler.enabled:
+        print()
+        profiler.report()
+        profile_files = profiler.save(insights_dir)
+        for profile_path in profile_files:
+            print(f"✓ Profile saved: {profile_path}")
 
     print("\n" + "=" * 70)
     print(f"FILES CREATED IN: {insights_dir.absolute()}")
     print("=" * 70)
-    print("1. evaluation_metrics.json    - Statistical metrics")
-    print("2. evaluation_plot.png        - Visualization (high-res)")
-    print("3. translation_results.json   - All sentence pairs with distances")
-    print("4. translation_results.csv    - All sentence pairs (CSV format)")
+    created_files = []
+    if evaluation_metrics is not None:
+        created_files.append("evaluation_metrics.json    - Statistical metrics")
+        if evaluation_metrics['figure'] is not None or (plot and plot_in_background):
+            created_files.append("evaluation_plot.png        - Visualization (high-res)")
+        created_files.append("evaluation_plot_data.json  - Aggregated plot data (redraw with evaluation_plots.py)")
+    created_files.append("translation_results.columns/ - Memory-mappable texts, distances"
+                         + (" and embeddings" if encoder is not None else ""))
+    if json_csv:
+        created_files.append("translation_results.json   - All sentence pairs with distances")
+        created_files.append("translation_results.csv    - All sentence pairs (CSV format)")
+    created_files.append("translation_results.jsonl  - Crash-safe checkpoint (use --resume)")
+    created_files.append("agent_metrics.json         - Per-agent tokens, latency, retries and cost")
+    if prometheus:
+        created_files.append("agent_metrics.prom         - Agent metrics (Prometheus text format)")
+    profile_descriptions = {
+        TRACE_FILE: "profile_trace.json         - Stage timeline (chrome://tracing or ui.perfetto.dev)",
+        CPU_FILE: "profile_cpu.txt            - Top functions per CPU stage (cProfile)",
+        CPU_STATS_FILE: "profile_cpu.prof           - Merged cProfile stats (pstats/snakeviz)",
+        MEMORY_FILE: "profile_memory.txt         - Top allocation sites (tracemalloc)",
+    }
+    for profile_path in profile_files:
+        created_files.append(profile_descriptions[profile_path.name])
+    for number, description in enumerate(created_files, start=1):
+        print(f"{number}. {description}")
     print("=" * 70)
 
-    return translation_results, evaluation_metrics
-
-
-def main():
-    """Main entry point"""
-    load_dotenv()
+    return read_results(stream_file), evaluation_metrics
 
-    api_key = os.getenv("ANTHROPIC_API_KEY")
-    if not api_key:
-        print("Error: ANTHROPIC_API_KEY not found in environment variables")
-        print("Please set ANTHROPIC_API_KEY or create a .env file")
-        return
 
+def _prompt_sentence_count() -> int:
+    """Ask for the number of sentences interactively (default: 100)."""
     try:
         num_input = input("Enter number of sentences to generate (default 100): ").strip()
         num_sentences = int(num_input) if num_input else 100
@@ -163,12 +304,100 @@ def main():
     except ValueError:
         print("Invalid input. Using default: 100")
         num_sentences = 100
+    return num_sentences
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command-line options for headless runs."""
+    parser = argparse.ArgumentParser(
+        description="Run the English → Spanish → Hebrew → English pipeline, evaluate it and save the results")
+    parser.add_argument("-n", "--sentences", type=int, default=None,
+                        help="Number of sentences (prompted for when omitted on a terminal, else 100)")
+    parser.add_argument("-o", "--output-dir", type=Path, default=Path("Insights"), help="Where results are written")
+    parser.add_argument("--concurrency", type=int, default=1, help="Sentences translated concurrently")
+    parser.add_argument("--batch-size", type=int, default=1, help="Sentences per translation request")
+    parser.add_argument("--no-eval", action="store_true", help="Skip embedding evaluation (no torch import)")
+    parser.add_argument("--no-plot", action="store_true", help="Skip the plot (no matplotlib import)")
+    parser.add_argument("--show", action="store_true", help="Open the plot in a window after saving it")
+    parser.add_argument("--plot-background", action="store_true",
+                        help="Render the plot in a separate process instead of waiting for it")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue from translation_results.jsonl in the output folder, skipping completed sentences")
+    parser.add_argument("--cache", choices=["on", "refresh", "bypass", "off"], default=None,
+                        help="Translation cache mode (default: TURINGCHAIN_CACHE_MODE or on)")
+    parser.add_argument("--fused", action="store_true",
+                        help="One request per sentence for the whole round trip (falls back to three calls)")
+    parser.add_argument("--hedge", action="store_true",
+                        help="Duplicate calls slower than the agent's recent p95 and keep the first answer")
+    parser.add_argument("--hedge-budget", type=float, default=0.05,
+                        help="Maximum hedges as a share of calls (with --hedge)")
+    parser.add_argument("--embedding-backend", choices=EMBEDDING_BACKENDS, default=None,
+                        help="CPU embedding backend for evaluation (default: TURINGCHAIN_EMBEDDING_BACKEND or torch)")
+    parser.add_argument("--embedding-threads", type=int, default=None, help="CPU threads for the embedding model")
+    parser.add_argument("--index", nargs="?", const="", default=None, metavar="RUN_NAME",
+                        help="Add the evaluated run to the vector index (name defaults to a unique timestamped name)")
+    parser.add_argument("--no-json", action="store_true",
+                        help="Only write the columnar results (rebuild JSON/CSV with columnar_results.py to-json)")
+    parser.add_argument("--embeddings", action="store_true",
+                        help="Store sentence embeddings in the columnar results (needs evaluation)")
+    parser.add_argument("--profile", nargs="?", const="trace", default=None, metavar="MODES",
+                        help="Write a Chrome/Perfetto trace of every stage; add cprofile and/or tracemalloc "
+                             "(comma-separated) to profile the local CPU stages")
+    parser.add_argument("--prometheus", action="store_true",
+                        help="Also export agent metrics as agent_metrics.prom (Prometheus text format)")
+    args = parser.parse_args(argv)
+
+    if args.profile is not None:
+        try:
+            parse_profile_modes(args.profile)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.show and args.plot_background:
+        parser.error("--show cannot be combined with --plot-background")
+    if args.fused and args.batch_size > 1:
+        parser.error("--fused cannot be combined with --batch-size")
+    for name in ("sentences", "concurrency", "batch_size"):
+        value = getattr(args, name)
+        if value is not None and value <= 0:
+            parser.error(f"--{name.replace('_', '-')} must be positive")
+    return args
+
+
+def main(argv: Optional[List[str]] = None):
+    """Main entry point"""
+    args = parse_args(argv)
+    load_dotenv()
+
+    api_key = os.getenv("ANTHROPIC_API_KEY")
+    if not api_key:
+        print("Error: ANTHROPIC_API_KEY not found in environment variables")
+        print("Please set ANTHROPIC_API_KEY or create a .env file")
+        return
+
+    num_sentences = args.sentences
+    if num_sentences is None:
+        num_sentences = _prompt_sentence_count() if sys.stdin.isatty() else 100
+
+    if args.cache is not None:
+        configure_cache(mode=args.cache)
+    if args.embedding_backend is not None or args.embedding_threads is not None:
+        configure_embedding_backend(args.embedding_backend, args.embedding_threads)
+    if args.hedge:
+        configure_hedging(HedgingPolicy(budget=args.hedge_budget))
+    if args.profile is not None:
+        configure_profiling(PipelineProfiler.from_modes(args.profile))
 
+    print(f"✓ Startup time: {time.perf_counter() - _STARTUP_BEGIN:.3f}s (imports and setup before the first API call)")
     print(f"\nStarting pipeline with {num_sentences} sentences...\n")
 
-    results, metrics = run_pipeline_save_and_display(api_key, num_sentences)
+    results, metrics = run_pipeline_save_and_display(
+        api_key, num_sentences, concurrency=args.concurrency, batch_size=args.batch_size,
+        output_dir=args.output_dir, evaluate=not args.no_eval, plot=not args.no_plot, show=args.show,
+        resume=args.resume, prometheus=args.prometheus, fused=args.fused, index_run=args.index,
+        json_csv=not args.no_json, save_embeddings=args.embeddings,
+        plot_in_background=args.plot_background)
 
-    print(f"\n✓ COMPLETE! All results displayed and saved.")
+    print(f"\n✓ COMPLETE! All results saved.")
 
 
 if __name__ == "__main__":
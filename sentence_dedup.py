@@ -0,0 +1,115 @@
+import re
+import hashlib
+from typing import Dict, List, Set
+
+import numpy as np
+
+
+DEFAULT_NUM_PERM = 64
+DEFAULT_BANDS = 16
+DEFAULT_THRESHOLD = 0.7
+SHINGLE_SIZE = 5
+
+_NON_WORD_RE = re.compile(r"[^\w\s]")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_sentence(sentence: str) -> str:
+    """Lower-case, drop punctuation and collapse whitespace, so trivial variants compare equal."""
+    return _SPACE_RE.sub(" ", _NON_WORD_RE.sub("", sentence.lower())).strip()
+
+
+def shingle_hashes(text: str, size: int = SHINGLE_SIZE) -> np.ndarray:
+    """
+    Distinct byte `size`-grams of a normalized sentence, each packed into one integer.
+
+    Args:
+        text: Normalized sentence
+        size: Shingle length in bytes (at most 8)
+
+    Returns:
+        uint64 array with one value per distinct shingle
+    """
+    data = np.frombuffer(text.encode("utf-8"), dtype=np.uint8)
+    if data.size < size:
+        data = np.pad(data, (0, size - data.size))
+    windows = np.lib.stride_tricks.sliding_window_view(data, size).astype(np.uint64)
+    packed = (windows << (np.arange(size, dtype=np.uint64) * np.uint64(8))).sum(axis=1, dtype=np.uint64)
+    return np.unique(packed)
+
+
+class SentenceDeduplicator:
+    """
+    Rejects sentences that were already accepted, exactly or nearly.
+
+    Exact duplicates are caught by a hash of the normalized text. Near
+    duplicates (a word swapped, a comma added) are caught with MinHash
+    signatures over 5-byte shingles, bucketed by LSH banding so each new
+    sentence is compared only against a handful of candidates instead of the
+    whole corpus.
+
+    Args:
+        threshold: Estimated Jaccard similarity at or above which a sentence is a duplicate
+        num_perm: MinHash permutations per signature
+        bands: LSH bands (num_perm must be divisible by bands)
+        seed: Seed of the permutation coefficients
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, num_perm: int = DEFAULT_NUM_PERM,
+                 bands: int = DEFAULT_BANDS, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(0, 1 << 64, size=num_perm, dtype=np.uint64, endpoint=False) | np.uint64(1)
+        self._b = rng.integers(0, 1 << 64, size=num_perm, dtype=np.uint64, endpoint=False)
+        self._exact: Set[bytes] = set()
+        self._signatures: List[np.ndarray] = []
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(bands)]
+        self.exact_duplicates = 0
+        self.near_duplicates = 0
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature of a normalized sentence."""
+        # Multiply-shift hashing: (a * x + b) mod 2^64 (uint64 wrap-around), top 32 bits
+        permuted = (np.outer(self._a, shingle_hashes(text)) + self._b[:, None]) >> np.uint64(32)
+        return permuted.min(axis=1)
+
+    def add(self, sentence: str) -> bool:
+        """
+        Accept a sentence unless it duplicates one accepted earlier.
+
+        Args:
+            sentence: Candidate sentence
+
+        Returns:
+            True if the sentence is new (and is now remembered), False if it is a duplicate
+        """
+        text = normalize_sentence(sentence)
+        digest = hashlib.sha1(text.encode("utf-8")).digest()
+        if digest in self._exact:
+            self.exact_duplicates += 1
+            return False
+
+        signature = self.signature(text)
+        band_keys = [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+        candidates = set()
+        for bucket, key in zip(self._buckets, band_keys):
+            candidates.update(bucket.get(key, ()))
+        if candidates:
+            similarity = (np.array([self._signatures[c] for c in candidates]) == signature).mean(axis=1)
+            if similarity.max() >= self.threshold:
+                self.near_duplicates += 1
+                return False
+
+        sentence_id = len(self._signatures)
+        self._exact.add(digest)
+        self._signatures.append(signature)
+        for bucket, key in zip(self._buckets, band_keys):
+            bucket.setdefault(key, []).append(sentence_id)
+        return True
+
+    def __len__(self) -> int:
+        return len(self._signatures)
@@ -0,0 +1,224 @@
+import queue
+import threading
+from itertools import islice
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from embedding_store import Encoder, default_encoder, encode_sentences
+
+
+DEFAULT_CHUNK_SIZE = 256
+
+
+class RunningStats:
+    """
+    Streaming mean/variance/min/max (Welford, merged chunk by chunk with Chan's formula).
+
+    Produces the same population variance as np.var over the concatenated
+    values while holding only five numbers, however many values it has seen.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = float('inf')
+        self.max = float('-inf')
+
+    def update(self, values: np.ndarray) -> None:
+        """Fold a chunk of values into the running statistics."""
+        values = np.asarray(values, dtype=np.float64)
+        if values.size == 0:
+            return
+
+        chunk_count = values.size
+        chunk_mean = float(values.mean())
+        chunk_m2 = float(((values - chunk_mean) ** 2).sum())
+
+        total = self.count + chunk_count
+        delta = chunk_mean - self.mean
+        self.mean += delta * chunk_count / total
+        self._m2 += chunk_m2 + delta * delta * self.count * chunk_count / total
+        self.count = total
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    @property
+    def variance(self) -> float:
+        """Population variance (matches np.var)."""
+        return self._m2 / self.count if self.count else 0.0
+
+    @property
+    def std(self) -> float:
+        """Population standard deviation (matches np.std)."""
+        return float(np.sqrt(self.variance))
+
+    def as_dict(self) -> Dict[str, float]:
+        """Statistics in the same keys evaluate_translation_quality returns (min/max are 0.0 when empty)."""
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'variance': self.variance,
+            'std': self.std,
+            'min': self.min if self.count else 0.0,
+            'max': self.max if self.count else 0.0,
+        }
+
+
+def cosine_distances(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Row-wise cosine distance between two embedding matrices.
+
+    Equivalent to scipy.spatial.distance.cosine applied pair by pair
+    (including its clipping to [0, 2]), computed with normalized dot products.
+
+    Args:
+        a: Matrix of shape (n, dim)
+        b: Matrix of shape (n, dim)
+
+    Returns:
+        Array of n distances
+    """
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return np.clip(1.0 - np.einsum('ij,ij->i', a, b), 0.0, 2.0)
+
+
+def evaluate_translation_stream(pairs: Iterable[Tuple[str, str]], chunk_size: int = DEFAULT_CHUNK_SIZE,
+                                encoder: Optional[Encoder] = None, use_cache: bool = False,
+                                on_distances: Optional[Callable[[int, np.ndarray], None]] = None) -> Dict[str, float]:
+    """
+    Evaluate (original, final) pairs in fixed-size chunks with bounded memory.
+
+    Only one chunk of sentences and embeddings is alive at a time, so memory
+    stays flat for millions of pairs. Statistics match evaluate_translation_quality.
+
+    Args:
+        pairs: Iterable of (original_sentence, final_translated_sentence)
+        chunk_size: Pairs encoded per chunk
+        encoder: Function mapping sentences to embeddings (default: embedding server or resident model)
+        use_cache: Encode through the persistent embedding store (its index grows with the corpus);
+            a custom encoder bypasses it, see encode_sentences
+        on_distances: Optional callback receiving (start_index, distances) per chunk,
+            e.g. to stream per-sentence distances to disk
+
+    Returns:
+        Dictionary with count, mean, variance, std, min and max
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+
+    encode = (lambda texts: encode_sentences(texts, encoder)) if use_cache else (encoder or default_encoder())
+    stats = RunningStats()
+    iterator = iter(pairs)
+
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            break
+
+        originals = [pair[0] for pair in chunk]
+        finals = [pair[1] for pair in chunk]
+        distances = cosine_distances(encode(originals), encode(finals))
+
+        if on_distances is not None:
+            on_distances(stats.count, distances)
+        stats.update(distances)
+
+    return stats.as_dict()
+
+
+class IncrementalEvaluator:
+    """
+    Background evaluator that embeds pairs while the translation loop is still running.
+
+    Pairs are handed over with submit() as each sentence finishes; a worker
+    thread embeds them in micro-batches and keeps running statistics, so the
+    final metrics are ready almost as soon as the last translation lands.
+    Encoding happens in native code that releases the GIL, so it overlaps
+    with the network-bound translation work.
+
+    Args:
+        micro_batch_size: Pairs embedded together
+        flush_interval: Seconds to wait for a full micro-batch before embedding a partial one
+        encoder: Function mapping sentences to embeddings (default: embedding server or resident model)
+        use_cache: Encode through the persistent embedding store (a custom encoder bypasses it)
+    """
+
+    _STOP = object()
+
+    def __init__(self, micro_batch_size: int = 32, flush_interval: float = 0.5,
+                 encoder: Optional[Encoder] = None, use_cache: bool = True):
+        self.micro_batch_size = micro_batch_size
+        self.flush_interval = flush_interval
+        self.stats = RunningStats()
+        self.distances: Dict[int, float] = {}
+        self._encode = (lambda texts: encode_sentences(texts, encoder)) if use_cache else (encoder or default_encoder())
+        self._queue: "queue.Queue" = queue.Queue()
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, name="incremental-evaluator", daemon=True)
+        self._thread.start()
+
+    def submit(self, index: int, original: str, final: str) -> None:
+        """
+        Queue one finished pair for evaluation (thread-safe, never blocks).
+
+        Args:
+            index: Sentence index, used to key the per-sentence distance
+            original: Original English sentence
+            final: Final re-translated English sentence
+        """
+        self._queue.put((index, original, final))
+
+    def _run(self) -> None:
+        pending: List[Tuple[int, str, str]] = []
+        stopping = False
+
+        while not stopping:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+                if item is self._STOP:
+                    stopping = True
+                else:
+                    pending.append(item)
+                    if len(pending) < self.micro_batch_size:
+                        continue
+            except queue.Empty:
+                pass
+
+            if pending and self._error is None:
+                try:
+                    self._evaluate(pending)
+                except BaseException as e:
+                    self._error = e
+            pending = []
+
+    def _evaluate(self, batch: List[Tuple[int, str, str]]) -> None:
+        distances = cosine_distances(self._encode([item[1] for item in batch]),
+                                     self._encode([item[2] for item in batch]))
+        for (index, _, _), distance in zip(batch, distances):
+            self.distances[index] = float(distance)
+        self.stats.update(distances)
+
+    def close(self) -> Dict[str, float]:
+        """
+        Flush the remaining pairs, stop the worker and return the metrics.
+
+        Returns:
+            Dictionary with count, mean, variance, std, min and max
+
+        Raises:
+            Any exception raised while embedding, re-raised in the caller's thread
+        """
+        self._queue.put(self._STOP)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+        return self.stats.as_dict()
+
+    def ordered_distances(self) -> np.ndarray:
+        """Per-sentence distances sorted by sentence index (call after close())."""
+        return np.array([distance for _, distance in sorted(self.distances.items())])
@@ -0,0 +1,58 @@
+import json
+
+from claude_client import set_backend
+from fake_backend import FakeBackend
+from agent_metrics import AgentStats, reset_agent_metrics, save_agent_metrics
+from translation_cache import configure_cache
+from orchestrator import translate_sequentially, translate_in_batches
+
+
+def test_latency_histogram_quantiles():
+    stats = AgentStats()
+    for seconds in (0.01, 0.02, 0.2, 0.3, 7.0):
+        stats.observe_latency(seconds)
+    assert stats.buckets[0] == 2
+    assert stats.latency_quantile(0.5) == 0.25
+    assert stats.latency_quantile(1.0) == 7.0
+
+
+def test_every_agent_call_is_recorded(tmp_path):
+    """Tokens, calls and cache hits are tagged per agent and exported to JSON and Prometheus"""
+    configure_cache(path=tmp_path / "cache.sqlite3", mode="on")
+    set_backend(FakeBackend())
+    try:
+        sentences = ["The Mule conquered the Foundation.", "Trantor was covered by one city."]
+        metrics = reset_agent_metrics()
+        translate_sequentially(iter(sentences), "offline")
+        translate_in_batches(iter(sentences), "offline", batch_size=2)
+        translate_sequentially(iter(sentences), "offline")
+    finally:
+        set_backend(None)
+        configure_cache(mode="off")
+
+    snapshot = metrics.snapshot()
+    assert set(snapshot) == {"english_spanish", "spanish_hebrew", "hebrew_english"}
+    hop = snapshot["english_spanish"]
+    assert hop['calls'] == 3 and hop['cache_hits'] == 2
+    assert hop['input_tokens'] > 0 and hop['output_tokens'] > 0
+    assert sum(hop['latency_histogram'].values()) == 3
+
+    written = save_agent_metrics(tmp_path, sentences=4, elapsed=2.0, prometheus=True)
+    report = json.loads(written[0].read_text(encoding='utf-8'))
+    assert report['sentences_per_sec'] == 2.0
+    assert report['totals']['calls'] == 9
+
+    exposition = written[1].read_text(encoding='utf-8')
+    assert 'turingchain_agent_calls_total{agent="hebrew_english"} 3' in exposition
+    assert 'turingchain_agent_latency_seconds_count{agent="spanish_hebrew"} 3' in exposition
+    assert 'turingchain_sentences_per_second 2.0' in exposition
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    test_latency_histogram_quantiles()
+    with tempfile.TemporaryDirectory() as directory:
+        test_every_agent_call_is_recorded(Path(directory))
+    print("✓ All agent metrics tests passed")
@@ -0,0 +1,81 @@
+import json
+
+import pytest
+
+from agent_english_spanish import english_spanish_translator_batch
+from batch_translation import parse_batch_response
+from claude_client import set_backend
+from fake_backend import FakeBackend
+from translation_cache import configure_cache
+
+
+class MisalignedBackend(FakeBackend):
+    """FakeBackend that drops the last translation of every batch larger than `max_aligned`."""
+
+    def __init__(self, max_aligned: int = 2):
+        super().__init__(seed=0)
+        self.max_aligned = max_aligned
+        self.batch_sizes = []
+
+    def _respond(self, system, prompt):
+        response = super()._respond(system, prompt)
+        if "JSON array" in system:
+            texts = json.loads(prompt)
+            self.batch_sizes.append(len(texts))
+            if len(texts) > self.max_aligned:
+                response.text = json.dumps(json.loads(response.text)[:-1], ensure_ascii=False)
+        else:
+            self.batch_sizes.append(1)
+        return response
+
+
+def test_parse_batch_response_rejects_misaligned_and_malformed_envelopes():
+    assert parse_batch_response('```json\n["uno", " dos "]\n```', 2) == ["uno", "dos"]
+    assert parse_batch_response('Here you go: ["uno", "dos"] Enjoy!', 2) == ["uno", "dos"]
+    assert parse_batch_response('["uno"]', 2) is None
+    assert parse_batch_response('["uno", "dos", "tres"]', 2) is None
+    assert parse_batch_response('["uno", ""]', 2) is None
+    assert parse_batch_response('["uno", 2]', 2) is None
+    assert parse_batch_response('["uno", "dos"', 2) is None
+    assert parse_batch_response('{"uno": "dos"}', 1) is None
+    assert parse_batch_response('no json at all', 1) is None
+
+
+@pytest.mark.parametrize("count, max_aligned, expected_calls", [
+    (4, 2, [4, 2, 2]),
+    (5, 2, [5, 2, 3, 1, 2]),
+    (3, 0, [3, 1, 2, 1, 1]),
+])
+def test_misaligned_batches_are_halved_down_to_single_calls(count, max_aligned, expected_calls):
+    configure_cache(mode="off")
+    backend = MisalignedBackend(max_aligned)
+    set_backend(backend)
+    texts = [f"Sentence number {i} about the Foundation." for i in range(count)]
+    try:
+        translations = english_spanish_translator_batch(texts, "offline", batch_size=count)
+    finally:
+        set_backend(None)
+
+    assert translations == [f"«es» {text}" for text in texts]
+    assert backend.batch_sizes == expected_calls
+
+
+def test_misaligned_replies_are_not_cached(tmp_path):
+    texts = [f"Sentence number {i} about the Foundation." for i in range(4)]
+    configure_cache(path=tmp_path / "cache.sqlite3", mode="on")
+    try:
+        first = MisalignedBackend(max_aligned=2)
+        set_backend(first)
+        english_spanish_translator_batch(texts, "offline", batch_size=4)
+
+        second = MisalignedBackend(max_aligned=4)
+        set_backend(second)
+        translations = english_spanish_translator_batch(texts, "offline", batch_size=4)
+    finally:
+        set_backend(None)
+        configure_cache(mode="off")
+
+    assert first.batch_sizes == [4, 2, 2]
+    # The bad envelope was not stored: the second run asks again and gets a good one
+    assert second.batch_sizes == [4]
+    assert translations == [f"«es» {text}" for text in texts]
@@ -0,0 +1,65 @@
+from claude_client import call_claude_agent, set_backend
+from fake_backend import FakeBackend
+from benchmark import main, run_benchmark
+from translation_cache import configure_cache, get_translation_cache
+from agent_english_spanish import english_spanish_translator
+from agent_spanish_hebrew import spanish_hebrew_translator
+from agent_hebrew_english import hebrew_english_translator
+
+
+def test_fake_backend_round_trip():
+    """The fake translators are deterministic and a full round trip returns the original"""
+    configure_cache(mode="off")
+    set_backend(FakeBackend())
+    try:
+        original = "Seldon's plan would save humanity from a dark age."
+        spanish = english_spanish_translator(original, "offline")
+        hebrew = spanish_hebrew_translator(spanish, "offline")
+        assert spanish == "«es» " + original
+        assert hebrew == "«he» " + original
+        assert hebrew_english_translator(hebrew, "offline") == original
+        assert call_claude_agent("echo", "unknown agent", "offline") == "echo"
+    finally:
+        set_backend(None)
+
+
+def test_benchmark_reports_throughput_and_hop_latencies():
+    """Every mode completes the corpus offline and reports per-hop percentiles"""
+    for mode in ("sequential", "concurrent", "batched"):
+        report = run_benchmark(60, mode=mode, concurrency=8, batch_size=7,
+                               backend=FakeBackend(latency_median=0.001))
+
+        assert report['completed'] == 60
+        assert report['sentences_per_sec'] > 0
+        assert set(report['hops']) == {'sentences_creator', 'english_spanish', 'spanish_hebrew', 'hebrew_english'}
+        hop = report['hops']['english_spanish']
+        assert hop['calls'] == (9 if mode == "batched" else 60)
+        assert hop['p50_ms'] <= hop['p95_ms'] <= hop['p99_ms']
+
+
+def test_benchmark_restores_the_translation_cache(tmp_path):
+    """The cache is off during the run and the caller's cache is back afterwards"""
+    cache = configure_cache(path=tmp_path / "cache.sqlite3", mode="on")
+    try:
+        run_benchmark(5, mode="sequential", backend=FakeBackend())
+        assert get_translation_cache() is cache
+        assert cache.stats()['entries'] == 0
+    finally:
+        configure_cache(mode="off")
+
+
+def test_each_size_runs_in_its_own_process(tmp_path):
+    """Peak RSS is per size by default, and flagged as cumulative with --in-process"""
+    output = tmp_path / "benchmark_results.json"
+    isolated = main(["--sizes", "5", "10", "--latency-ms", "0.1", "--output", str(output)])
+    in_process = main(["--sizes", "5", "--latency-ms", "0.1", "--in-process", "--output", str(output)])
+
+    assert [report['completed'] for report in isolated] == [5, 10]
+    assert all(report['rss_isolated'] for report in isolated)
+    assert not in_process[0]['rss_isolated']
+
+
+if __name__ == "__main__":
+    test_fake_backend_round_trip()
+    test_benchmark_reports_throughput_and_hop_latencies()
+    print("✓ All benchmark tests passed")
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+import agent_english_spanish
+import agent_spanish_hebrew
+import agent_hebrew_english
+from claude_client import set_backend
+from fake_backend import FakeBackend
+from translation_cache import configure_cache
+from chain_engine import (ChainTrie, parse_chain, translation_system_prompt,
+                          translate_chains, translate_chains_concurrently)
+from orchestrator import chained_round_trip_outputs, chained_round_trip_outputs_async
+
+
+CHAINS = ["EN→ES→HE→EN", "en-es-fr-en", "en->de->en"]
+
+
+def test_parse_and_prompts_match_existing_agents():
+    assert parse_chain("EN→ES→HE→EN") == parse_chain("en-es-he-en") == ("en", "es", "he", "en")
+    with pytest.raises(ValueError):
+        parse_chain("en-xx-en")
+    assert translation_system_prompt("en", "es") == agent_english_spanish.SYSTEM_PROMPT
+    assert translation_system_prompt("es", "he") == agent_spanish_hebrew.SYSTEM_PROMPT
+    assert translation_system_prompt("he", "en") == agent_hebrew_english.SYSTEM_PROMPT
+
+
+def test_trie_shares_prefixes():
+    trie = ChainTrie(CHAINS)
+    # en→es (shared), es→he, he→en, es→fr, fr→en, en→de, de→en
+    assert trie.calls_per_sentence == 7
+    assert trie.unshared_calls_per_sentence == 8
+    assert trie.sharing_report(10)['calls_saved'] == 10
+    with pytest.raises(ValueError):
+        ChainTrie(["en-es", "es-en"])
+
+
+def test_chains_keep_intermediate_outputs_and_call_shared_hops_once():
+    configure_cache(mode="off")
+    backend = FakeBackend()
+    set_backend(backend)
+    try:
+        trie = ChainTrie(CHAINS)
+        sentences = ["Hari Seldon founded psychohistory.", "Terminus lies at the edge of the galaxy."]
+        sequential = translate_chains(iter(sentences), trie, "offline")
+        calls = backend.calls
+        concurrent = asyncio.run(translate_chains_concurrently(iter(sentences), trie, "offline", concurrency=2))
+    finally:
+        set_backend(None)
+
+    assert calls == 7 * len(sentences)
+    assert sequential == concurrent
+    result = sequential[1]
+    assert result['outputs']['en→es'] == "«es» " + sentences[1]
+    assert result['outputs']['en→es→fr'] == "«fr» " + sentences[1]
+    assert result['chains'] == {name: sentences[1] for name in ("en→es→he→en", "en→es→fr→en", "en→de→en")}
+    assert result['errors'] == {}
+
+
+def test_orchestrator_round_trip_runs_on_the_engine_and_shares_agent_cache(tmp_path):
+    """The classic round trip goes through the engine, hitting the cache entries the agents wrote"""
+    configure_cache(path=tmp_path / "cache.sqlite3", mode="on")
+    backend = FakeBackend()
+    set_backend(backend)
+    sentence = "The Mule conquered the Foundation."
+    try:
+        spanish = agent_english_spanish.english_spanish_translator(sentence, "offline")
+        outputs = chained_round_trip_outputs(sentence, "offline")
+        calls = backend.calls
+        async_outputs = asyncio.run(chained_round_trip_outputs_async(sentence, "offline"))
+    finally:
+        set_backend(None)
+        configure_cache(mode="off")
+
+    assert outputs == async_outputs == {'spanish': spanish, 'hebrew': "«he» " + sentence, 'english': sentence}
+    assert calls == 3 and backend.calls == 3
+
+
+if __name__ == "__main__":
+    test_parse_and_prompts_match_existing_agents()
+    test_trie_shares_prefixes()
+    test_chains_keep_intermediate_outputs_and_call_shared_hops_once()
+    print("✓ All chain engine tests passed")
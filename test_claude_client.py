@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from claude_client import ClientConfig, close_clients, configure_client, get_async_client, get_client
+
+
+@pytest.fixture(autouse=True)
+def fresh_pool():
+    close_clients()
+    yield
+    close_clients()
+    configure_client(ClientConfig.from_env())
+
+
+def test_sync_client_is_shared_per_api_key():
+    first = get_client("key-a")
+
+    assert get_client("key-a") is first
+    assert get_client("key-b") is not first
+    assert get_client("key-b") is get_client("key-b")
+
+
+def test_sync_client_is_rebuilt_after_close_or_reconfigure():
+    first = get_client("key-a")
+    configure_client(ClientConfig(max_connections=5, max_keepalive_connections=5))
+    resized = get_client("key-a")
+    close_clients()
+
+    assert resized is not first
+    assert get_client("key-a") not in (first, resized)
+
+
+def test_async_client_is_shared_per_api_key_within_a_loop():
+    async def clients():
+        first = get_async_client("key-a")
+        await asyncio.sleep(0)
+        return first, get_async_client("key-a"), get_async_client("key-b")
+
+    first, again, other = asyncio.run(clients())
+
+    assert again is first
+    assert other is not first
+
+
+def test_async_client_is_not_shared_across_event_loops():
+    async def client():
+        return get_async_client("key-a")
+
+    first = asyncio.run(client())
+    second = asyncio.run(client())
+
+    assert second is not first
+
+
+def test_async_client_needs_a_running_loop():
+    with pytest.raises(RuntimeError):
+        get_async_client("key-a")
@@ -0,0 +1,61 @@
+import zlib
+
+import numpy as np
+import pytest
+
+from columnar_results import ColumnarResults, build_columns_from_stream, export_json_csv
+from result_stream import ResultStreamWriter, build_artifacts_from_stream
+
+
+def fake_encoder(texts):
+    return np.array([np.random.default_rng(zlib.crc32(text.encode())).normal(size=8) for text in texts],
+                    dtype=np.float32)
+
+
+def write_stream(path, count):
+    with ResultStreamWriter(path, fresh=True) as writer:
+        for index in reversed(range(count)):
+            intermediates = {'spanish': f"Hari {index} ñ"} if index % 2 else None
+            writer.write(index, f"Seldon {index} ñ", f"Final {index} 🚀", intermediates)
+
+
+def test_columns_round_trip_texts_distances_and_embeddings(tmp_path):
+    stream = tmp_path / "translation_results.jsonl"
+    write_stream(stream, 50)
+    distances = {index: index / 100 for index in range(50) if index != 7}
+
+    count = build_columns_from_stream(stream, tmp_path / "columns", distances, encoder=fake_encoder)
+    results = ColumnarResults(tmp_path / "columns")
+
+    assert count == len(results) == 50
+    assert results.text_columns == ["original", "final_translated", "spanish"]
+    assert results.text("original")[3] == "Seldon 3 ñ" and results.text("final_translated")[-1] == "Final 49 🚀"
+    assert results.text("spanish")[:3] == ["", "Hari 1 ñ", ""]
+    assert isinstance(results.distances, np.memmap) and np.isnan(results.distances[7])
+    assert results.distances[8] == 0.08
+    np.testing.assert_array_equal(results.index, np.arange(50))
+    np.testing.assert_allclose(results.embeddings("original")[10:12], fake_encoder(["Seldon 10 ñ", "Seldon 11 ñ"]))
+    with pytest.raises(KeyError):
+        results.text("hebrew")
+    assert not (tmp_path / "columns.tmp").exists()
+
+
+def test_json_csv_export_matches_stream_export(tmp_path):
+    stream = tmp_path / "translation_results.jsonl"
+    write_stream(stream, 20)
+    distances = {index: 0.125 * index for index in range(20)}
+    build_artifacts_from_stream(stream, tmp_path / "stream.json", tmp_path / "stream.csv", distances)
+
+    build_columns_from_stream(stream, tmp_path / "columns", distances)
+    assert export_json_csv(tmp_path / "columns", tmp_path / "columns.json", tmp_path / "columns.csv") == 20
+
+    assert (tmp_path / "columns.json").read_bytes() == (tmp_path / "stream.json").read_bytes()
+    assert (tmp_path / "columns.csv").read_bytes() == (tmp_path / "stream.csv").read_bytes()
+
+
+def test_empty_run(tmp_path):
+    stream = tmp_path / "translation_results.jsonl"
+    write_stream(stream, 0)
+    assert build_columns_from_stream(stream, tmp_path / "columns") == 0
+    assert export_json_csv(tmp_path / "columns", tmp_path / "out.json", tmp_path / "out.csv") == 0
+    assert (tmp_path / "out.json").read_text(encoding='utf-8').endswith('"results": []\n}')
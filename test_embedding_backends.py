@@ -0,0 +1,79 @@
+import zlib
+
+import numpy as np
+import pytest
+
+import embedding_backends
+import embedding_store
+from embedding_backends import (bucketed_encode, check_backend_accuracy, estimate_token_lengths,
+                                length_buckets, model_id)
+
+
+class RecordingModel:
+    """SentenceTransformer stand-in: deterministic vectors, optional noise, records batch shapes."""
+
+    def __init__(self, noise: float = 0.0):
+        self.noise = noise
+        self.batches = []
+
+    def encode(self, texts, batch_size, convert_to_numpy):
+        assert batch_size == len(texts) and convert_to_numpy
+        self.batches.append(list(texts))
+        vectors = np.array([np.random.default_rng(zlib.crc32(text.encode())).normal(size=16) for text in texts])
+        if self.noise:
+            vectors = vectors + np.random.default_rng(len(self.batches)).normal(scale=self.noise, size=vectors.shape)
+        return vectors
+
+
+TEXTS = ["short", "a much longer sentence about the Foundation and the Second Foundation " * 3,
+         "medium length sentence", "tiny", "another medium sentence here"] * 20
+
+
+def test_length_buckets_respect_token_budget_and_cover_every_text():
+    lengths = estimate_token_lengths(TEXTS)
+    buckets = length_buckets(TEXTS, token_budget=200)
+    assert sorted(np.concatenate(buckets).tolist()) == list(range(len(TEXTS)))
+    for bucket in buckets:
+        assert len(bucket) == 1 or len(bucket) * lengths[bucket].max() <= 200
+    # Long sentences end up in smaller batches than short ones
+    assert len(buckets[0]) > len(buckets[-1])
+
+
+def test_bucketed_encode_restores_input_order():
+    model = RecordingModel()
+    vectors = bucketed_encode(model, TEXTS, token_budget=200)
+    np.testing.assert_allclose(vectors, RecordingModel().encode(TEXTS, len(TEXTS), True).astype(np.float32))
+    assert len(model.batches) > 1
+    assert bucketed_encode(model, []).shape == (0, 0)
+
+
+def test_backend_selection_keeps_caches_apart(monkeypatch):
+    assert model_id("all-MiniLM-L6-v2", "torch") == "all-MiniLM-L6-v2"
+    assert model_id("all-MiniLM-L6-v2", "int8") == "all-MiniLM-L6-v2-int8"
+    with pytest.raises(ValueError):
+        embedding_store.configure_embedding_backend("fp16")
+
+    monkeypatch.setenv("TURINGCHAIN_EMBEDDING_BACKEND", "int8")
+    embedding_store.configure_embedding_backend()
+    try:
+        assert embedding_store.embedding_model_id() == "all-MiniLM-L6-v2-int8"
+        embedding_store.configure_embedding_backend("onnx", threads=2)
+        assert embedding_store.get_embedding_backend() == "onnx"
+    finally:
+        embedding_store.configure_embedding_backend()
+        monkeypatch.delenv("TURINGCHAIN_EMBEDDING_BACKEND")
+    assert embedding_store.get_embedding_backend() == "torch"
+
+
+def test_accuracy_check_reports_drift_against_fp32(monkeypatch):
+    models = {"torch": RecordingModel(), "int8": RecordingModel(noise=0.05)}
+    monkeypatch.setattr(embedding_backends, "load_model", lambda name, backend, threads: models[backend])
+    pairs = [(f"original sentence {i}", f"final sentence {i % 7}") for i in range(40)]
+
+    report = check_backend_accuracy(pairs, "int8", token_budget=64)
+
+    assert report['model'] == "all-MiniLM-L6-v2-int8"
+    assert report['reference_pairs'] == 40
+    assert 0.0 < report['mean_abs_distance_error'] <= report['max_abs_distance_error'] < 0.1
+    assert report['pearson'] > 0.95 and report['spearman'] > 0.9
+    assert 0.95 < report['embedding_similarity_mean'] < 1.0
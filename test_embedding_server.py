@@ -0,0 +1,176 @@
+import contextlib
+import multiprocessing
+import sys
+import threading
+import zlib
+
+import numpy as np
+import pytest
+
+import embedding_server
+import embedding_store
+from embedding_server import EmbeddingServer, forget_embedding_client, get_embedding_client
+
+
+def fake_encoder(texts):
+    """Deterministic 8-dimensional vectors derived from each text's CRC."""
+    return np.array([np.random.default_rng(zlib.crc32(text.encode())).normal(size=8) for text in texts],
+                    dtype=np.float32)
+
+
+def _start(batches):
+    def encoder(texts):
+        batches.append(len(texts))
+        return fake_encoder(texts)
+
+    server = EmbeddingServer("127.0.0.1:0", encoder=encoder, max_wait=0.05)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def _stop(server):
+    server.shutdown()
+    server.server_close()
+
+
+def test_server_batches_concurrent_clients(monkeypatch):
+    batches = []
+    server = _start(batches)
+    monkeypatch.setenv("TURINGCHAIN_EMBEDDING_SERVER", server.address)
+    monkeypatch.setenv("TURINGCHAIN_EMBEDDING_CACHE", "off")
+    monkeypatch.setattr(embedding_store, "encode_with_model", lambda texts: pytest.fail("local model used"))
+    forget_embedding_client()
+    try:
+        assert get_embedding_client().health()['model'] == "all-MiniLM-L6-v2"
+        texts = ["Trantor is a city planet.", "The Mule upset the Plan."]
+        np.testing.assert_allclose(embedding_store.encode_sentences(texts), fake_encoder(texts))
+
+        results = {}
+        barrier = threading.Barrier(8)
+
+        def client(i):
+            barrier.wait()
+            results[i] = embedding_store.encode_sentences([f"sentence {i}", f"other {i}"])
+
+        threads = [threading.Thread(target=client, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        _stop(server)
+        forget_embedding_client()
+
+    for i in range(8):
+        np.testing.assert_allclose(results[i], fake_encoder([f"sentence {i}", f"other {i}"]))
+    stats = server.batcher.stats()
+    assert stats['requests'] == 9 and stats['texts'] == 18
+    assert len(batches) < 9
+
+
+def test_falls_back_to_in_process_encoding(monkeypatch):
+    local_calls = []
+
+    def local(texts):
+        local_calls.append(len(texts))
+        return fake_encoder(texts)
+
+    monkeypatch.setattr(embedding_store, "encode_with_model", local)
+    monkeypatch.setenv("TURINGCHAIN_EMBEDDING_CACHE", "off")
+
+    # Server resolved while running, then gone mid-run
+    server = _start([])
+    monkeypatch.setenv("TURINGCHAIN_EMBEDDING_SERVER", server.address)
+    forget_embedding_client()
+    encoder = embedding_store.default_encoder()
+    _stop(server)
+    np.testing.assert_allclose(encoder(["a", "b"]), fake_encoder(["a", "b"]))
+    assert local_calls == [2]
+
+    # No server running at all
+    forget_embedding_client()
+    assert get_embedding_client() is None
+    np.testing.assert_allclose(embedding_store.encode_sentences(["c"]), fake_encoder(["c"]))
+    assert local_calls == [2, 1]
+    forget_embedding_client()
+
+
+
+def _client_process(texts):
+    """Encode through the server with the store enabled; the model must never load here."""
+    embedding_store.encode_with_model = lambda texts: sys.exit("local model used")
+    vectors = embedding_store.encode_sentences(texts)
+    if not np.allclose(vectors, fake_encoder(texts)) or embedding_store._stores:
+        sys.exit(1)
+
+
+def test_server_is_the_only_store_writer(monkeypatch, tmp_path):
+    store = embedding_store.EmbeddingStore(tmp_path / embedding_store.embedding_model_id(),
+                                           embedding_store.embedding_model_id())
+    server = EmbeddingServer("127.0.0.1:0", encoder=lambda texts: store.encode(texts, fake_encoder), max_wait=0.01)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv("TURINGCHAIN_EMBEDDING_SERVER", server.address)
+    monkeypatch.setenv("TURINGCHAIN_EMBEDDING_CACHE", str(tmp_path))
+
+    chunks = [[f"client {c} sentence {i}" for i in range(200)] + ["shared"] for c in range(3)]
+    context = multiprocessing.get_context("spawn")
+    clients = [context.Process(target=_client_process, args=(chunk,)) for chunk in chunks]
+    try:
+        for client in clients:
+            client.start()
+        # A process encoding with its own model (bypassing the server) at the same time
+        local = embedding_store.EmbeddingStore(tmp_path / embedding_store.embedding_model_id(),
+                                               embedding_store.embedding_model_id())
+        local.encode([f"local {i}" for i in range(200)], fake_encoder)
+        for client in clients:
+            client.join()
+            assert client.exitcode == 0
+    finally:
+        _stop(server)
+        forget_embedding_client()
+
+    texts = [text for chunk in chunks for text in chunk[:-1]] + ["shared"] + [f"local {i}" for i in range(200)]
+    reopened = embedding_store.EmbeddingStore(tmp_path / embedding_store.embedding_model_id(),
+                                              embedding_store.embedding_model_id())
+    assert len(reopened) == len(texts)
+    np.testing.assert_array_equal(reopened.encode(texts, lambda t: []), fake_encoder(texts))
+
+
+def _reporting_client(texts, output_path):
+    """Encode through the server twice and report the cache, without opening a store here."""
+    from agent_evaluation import report_embedding_cache
+
+    embedding_store.encode_with_model = lambda texts: sys.exit("local model used")
+    embedding_store.encode_sentences(texts)
+    embedding_store.encode_sentences(texts)
+    with open(output_path, 'w', encoding='utf-8') as output, contextlib.redirect_stdout(output):
+        report_embedding_cache()
+    if embedding_store._stores:
+        sys.exit("store opened in the client")
+
+
+def test_client_reports_the_servers_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(embedding_server, "encode_with_model", fake_encoder)
+    monkeypatch.setenv("TURINGCHAIN_EMBEDDING_CACHE", str(tmp_path))
+    server = EmbeddingServer("127.0.0.1:0", max_wait=0.01)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv("TURINGCHAIN_EMBEDDING_SERVER", server.address)
+
+    output_path = tmp_path / "report.txt"
+    client = multiprocessing.get_context("spawn").Process(target=_reporting_client,
+                                                          args=(["Gaia", "Solaria"], output_path))
+    try:
+        client.start()
+        client.join()
+    finally:
+        _stop(server)
+        forget_embedding_client()
+        embedding_store.configure_embedding_backend()
+
+    assert client.exitcode == 0
+    report = output_path.read_text(encoding="utf-8")
+    assert report == (f"Embedding cache (server at {server.address}): 2 hits, 2 misses "
+                      f"(50.0% hit rate), 2 stored vectors\n")
@@ -0,0 +1,85 @@
+import multiprocessing
+import zlib
+
+import numpy as np
+
+import embedding_store
+from embedding_store import EmbeddingStore
+
+
+def fake_encoder(texts):
+    """Deterministic 8-dimensional vectors derived from each text's CRC."""
+    return np.array([np.random.default_rng(zlib.crc32(text.encode())).normal(size=8) for text in texts],
+                    dtype=np.float32)
+
+
+def test_two_instances_share_one_directory(tmp_path):
+    a = EmbeddingStore(tmp_path, "fake")
+    b = EmbeddingStore(tmp_path, "fake")
+
+    alpha = a.encode(["alpha"], fake_encoder)
+    b.encode(["gamma"], fake_encoder)
+
+    np.testing.assert_array_equal(a.encode(["alpha"], fake_encoder), alpha)
+    np.testing.assert_array_equal(a.encode(["gamma"], fake_encoder), fake_encoder(["gamma"]))
+    assert len(a) == len(b) == 2
+    assert len(EmbeddingStore(tmp_path, "fake")) == 2
+
+
+def test_custom_encoder_vectors_never_reach_the_default_models_store(tmp_path, monkeypatch):
+    monkeypatch.setenv("TURINGCHAIN_EMBEDDING_CACHE", str(tmp_path))
+    monkeypatch.setenv("TURINGCHAIN_EMBEDDING_SERVER", "off")
+    monkeypatch.setattr(embedding_store, "encode_with_model", lambda texts: 2 * fake_encoder(texts))
+    embedding_store.configure_embedding_backend()
+    texts = ["Hari Seldon", "Terminus"]
+    try:
+        custom = embedding_store.encode_sentences(texts, fake_encoder)
+        named = embedding_store.encode_sentences(texts, lambda t: 3 * fake_encoder(t), model="fake")
+        default = embedding_store.encode_sentences(texts)
+        again = embedding_store.encode_sentences(texts)
+        default_store = embedding_store.get_embedding_store()
+        named_store = embedding_store.get_embedding_store("fake")
+    finally:
+        embedding_store.configure_embedding_backend()
+
+    np.testing.assert_array_equal(custom, fake_encoder(texts))
+    np.testing.assert_array_equal(named, 3 * fake_encoder(texts))
+    np.testing.assert_array_equal(default, 2 * fake_encoder(texts))
+    np.testing.assert_array_equal(again, default)
+    assert (default_store.misses, default_store.hits, len(default_store)) == (2, 2, 2)
+    assert len(named_store) == 2 and named_store.directory == tmp_path / "fake"
+
+
+def test_instance_remaps_after_another_grows_the_files(tmp_path):
+    a = EmbeddingStore(tmp_path, "fake")
+    b = EmbeddingStore(tmp_path, "fake")
+    a.encode(["first"], fake_encoder)
+
+    texts = [f"sentence {i}" for i in range(embedding_store.INITIAL_CAPACITY + 10)]
+    b.encode(texts, fake_encoder)
+    a.encode(["second"], fake_encoder)
+
+    np.testing.assert_array_equal(a.encode(texts[-3:], lambda t: []), fake_encoder(texts[-3:]))
+    np.testing.assert_array_equal(b.encode(["first", "second"], lambda t: []),
+                                  fake_encoder(["first", "second"]))
+    assert len(EmbeddingStore(tmp_path, "fake")) == len(texts) + 2
+
+
+def _encode_in_process(directory, texts):
+    EmbeddingStore(directory, "fake").encode(texts, fake_encoder)
+
+
+def test_concurrent_processes_keep_rows_aligned(tmp_path):
+    chunks = [[f"process {p} sentence {i}" for i in range(300)] + ["shared"] for p in range(4)]
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=_encode_in_process, args=(tmp_path, chunk)) for chunk in chunks]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+        assert process.exitcode == 0
+
+    store = EmbeddingStore(tmp_path, "fake")
+    texts = [text for chunk in chunks for text in chunk[:-1]] + ["shared"]
+    assert len(store) == len(texts)
+    np.testing.assert_array_equal(store.encode(texts, lambda t: []), fake_encoder(texts))
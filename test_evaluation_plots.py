@@ -0,0 +1,66 @@
+import json
+
+import numpy as np
+import pytest
+
+from evaluation_plots import load_plot_data, save_plot_data, should_aggregate, summarize_distances
+from result_stream import ResultStreamWriter, build_artifacts_from_stream
+
+
+def drifting_distances(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.clip(np.linspace(0.1, 0.4, count) + rng.normal(scale=0.05, size=count), 0.0, 2.0)
+
+
+def test_summary_is_size_independent_and_consistent():
+    distances = drifting_distances(200_000)
+    summary = summarize_distances(distances, bins=40, windows=100)
+
+    assert summary['count'] == 200_000 and summary['mean'] == pytest.approx(distances.mean())
+    assert sum(summary['histogram']['counts']) == 200_000 and len(summary['histogram']['edges']) == 41
+    assert int(np.sum(summary['density']['counts'])) == 200_000
+
+    bands = summary['bands']
+    assert len(bands['centers']) == 100 and bands['window'] == 2000
+    assert bands['mean'][0] == pytest.approx(distances[:2000].mean())
+    low, median, high = (np.asarray(bands['values'][bands['quantiles'].index(q)]) for q in (0.1, 0.5, 0.9))
+    assert np.all(low <= median) and np.all(median <= high)
+    # The drift upward is visible in the rolling mean
+    assert bands['mean'][-1] - bands['mean'][0] > 0.25
+    assert len(json.dumps(summary)) < 200_000
+
+
+def test_small_runs_and_threshold(monkeypatch):
+    summary = summarize_distances([0.2, 0.2, 0.2])
+    assert len(summary['bands']['centers']) == 3 and summary['bands']['mean'] == [0.2, 0.2, 0.2]
+    with pytest.raises(ValueError):
+        summarize_distances([])
+
+    assert not should_aggregate(5000) and should_aggregate(5001)
+    monkeypatch.setenv("TURINGCHAIN_PLOT_AGGREGATE_THRESHOLD", "10")
+    assert should_aggregate(11)
+
+
+def test_plot_data_loads_from_saved_summary_or_results(tmp_path):
+    stream = tmp_path / "translation_results.jsonl"
+    distances = {i: float(d) for i, d in enumerate(drifting_distances(300))}
+    with ResultStreamWriter(stream, fresh=True) as writer:
+        for index in distances:
+            writer.write(index, f"original {index}", f"final {index}")
+    build_artifacts_from_stream(stream, tmp_path / "translation_results.json",
+                                tmp_path / "translation_results.csv", distances)
+
+    from_results = load_plot_data(tmp_path)
+    assert from_results['count'] == 300
+    assert from_results['mean'] == pytest.approx(np.mean(list(distances.values())))
+
+    save_plot_data(summarize_distances([0.5] * 10), tmp_path / "evaluation_plot_data.json")
+    assert load_plot_data(tmp_path)['count'] == 10
+
+
+def test_aggregated_figure_renders(tmp_path):
+    pytest.importorskip("matplotlib")
+    from evaluation_plots import render_plot
+
+    save_plot_data(summarize_distances(drifting_distances(50_000)), tmp_path / "evaluation_plot_data.json")
+    assert render_plot(tmp_path, dpi=50).stat().st_size > 0
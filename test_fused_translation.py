@@ -0,0 +1,115 @@
+import asyncio
+
+import numpy as np
+
+from claude_client import set_backend
+from fake_backend import FakeBackend
+from translation_cache import configure_cache
+from orchestrator import translate_sequentially, translate_concurrently
+from fused_translation import (parse_fused_response, fused_round_trip, fused_round_trip_async,
+                               fused_round_trip_outputs, fused_stats, reset_fused_stats)
+from agent_evaluation import compare_translation_drift
+
+
+class MalformedFusedBackend(FakeBackend):
+    """Fake backend whose fused responses are truncated JSON."""
+
+    def _respond(self, system, prompt):
+        response = super()._respond(system, prompt)
+        if "round-trip translation agent" in system:
+            response.text = response.text[:-5]
+        return response
+
+
+def test_parse_fused_response_validates_keys():
+    assert parse_fused_response('Here you go:\n```json\n{"spanish": "Hola", "hebrew": "שלום", "english": "Hi"}\n```') \
+        == {"spanish": "Hola", "hebrew": "שלום", "english": "Hi"}
+    assert parse_fused_response('{"spanish": "Hola", "hebrew": "שלום"}') is None
+    assert parse_fused_response('{"spanish": "Hola", "hebrew": "", "english": "Hi"}') is None
+    assert parse_fused_response('["Hola", "שלום", "Hi"]') is None
+    assert parse_fused_response('{"spanish": "Hola", "hebrew": "שלום", "english": ') is None
+
+
+def test_fused_mode_uses_one_call_per_sentence():
+    configure_cache(mode="off")
+    backend = FakeBackend()
+    set_backend(backend)
+    try:
+        sentences = [f"Sentence {i} about the Encyclopedia Galactica." for i in range(6)]
+        sequential = translate_sequentially(iter(sentences), "offline", round_trip=fused_round_trip)
+        concurrent = asyncio.run(translate_concurrently(iter(sentences), "offline", 3,
+                                                        round_trip=fused_round_trip_async))
+        outputs = fused_round_trip_outputs(sentences[0], "offline")
+    finally:
+        set_backend(None)
+
+    assert backend.calls == 13
+    assert sequential == concurrent == [(sentence, sentence) for sentence in sentences]
+    assert outputs == {"spanish": "«es» " + sentences[0], "hebrew": "«he» " + sentences[0],
+                       "english": sentences[0], "fused": True}
+
+
+def test_malformed_fused_response_falls_back_to_three_calls():
+    configure_cache(mode="off")
+    backend = MalformedFusedBackend()
+    set_backend(backend)
+    reset_fused_stats()
+    try:
+        outputs = fused_round_trip_outputs("The Mule was a mutant.", "offline")
+    finally:
+        set_backend(None)
+
+    assert backend.calls == 4
+    assert outputs['fused'] is False and outputs['english'] == "The Mule was a mutant."
+    assert outputs['hebrew'] == "«he» The Mule was a mutant."
+    assert fused_stats() == {'fused': 0, 'fallbacks': 1}
+    reset_fused_stats()
+    assert fused_stats() == {'fused': 0, 'fallbacks': 0}
+
+
+def test_malformed_fused_responses_are_not_cached(tmp_path):
+    configure_cache(path=tmp_path / "cache.sqlite3", mode="on")
+    try:
+        first = MalformedFusedBackend()
+        set_backend(first)
+        fused_round_trip_outputs("The Mule was a mutant.", "offline")
+
+        second = FakeBackend()
+        set_backend(second)
+        outputs = fused_round_trip_outputs("The Mule was a mutant.", "offline")
+    finally:
+        set_backend(None)
+        configure_cache(mode="off")
+
+    assert first.calls == 4
+    # The fused request is sent again instead of replaying the malformed reply
+    assert second.calls == 1 and outputs['fused'] is True
+
+
+def test_compare_translation_drift_pairs_the_two_modes(monkeypatch):
+    vocabulary = ["empire", "foundation", "galaxy", "mule", "seldon", "trader", "vault", "crisis"]
+
+    def bag_of_words(texts):
+        return np.array([[text.lower().split().count(word) + 0.01 for word in vocabulary] for text in texts])
+
+    originals = ["empire foundation galaxy", "mule seldon trader", "vault crisis empire"]
+    chained = ["empire foundation galaxy", "mule trader", "vault empire"]
+    fused = ["empire foundation", "mule seldon trader", "vault crisis empire"]
+    monkeypatch.setenv("TURINGCHAIN_EMBEDDING_CACHE", "off")
+    comparison = compare_translation_drift(originals, chained, fused, encoder=bag_of_words)
+
+    assert comparison['sentences'] == 3
+    assert comparison['chained']['count'] == comparison['fused']['count'] == 3
+    assert comparison['paired']['fused_better_share'] == 2 / 3
+    assert comparison['paired']['chained_better_share'] == 1 / 3
+    assert comparison['paired']['mean_difference'] < 0
+
+
+if __name__ == "__main__":
+    test_parse_fused_response_validates_keys()
+    test_fused_mode_uses_one_call_per_sentence()
+    test_malformed_fused_response_falls_back_to_three_calls()
+    import pytest
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_compare_translation_drift_pairs_the_two_modes(monkeypatch)
+    print("✓ All fused translation tests passed")
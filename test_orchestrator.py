@@ -1,6 +1,14 @@
 import os
+import asyncio
+import random
 from dotenv import load_dotenv
-from orchestrator import run_translation_pipeline
+from claude_client import set_backend
+from fake_backend import FakeBackend
+from fused_translation import fused_round_trip_outputs_async
+from orchestrator import (run_translation_pipeline, translate_concurrently, translate_sequentially, translate_in_batches,
+                          chained_round_trip_outputs, chained_round_trip_outputs_async)
+from result_stream import ResultStreamWriter, iter_results
+from translation_cache import configure_cache
 
 
 def test_pipeline():
@@ -18,5 +26,89 @@ def test_pipeline():
     run_translation_pipeline(api_key, num_sentences=3)
 
 
+def test_concurrent_results_keep_generation_order():
+    """Sentences finishing out of order still come back (and are reported once each) in generation order"""
+    configure_cache(mode="off")
+    set_backend(FakeBackend(latency_median=0.005, latency_sigma=1.0, seed=3))
+    sentences = [f"Sentence {i} about the Second Foundation." for i in range(30)]
+    reported = []
+    try:
+        results = asyncio.run(translate_concurrently(iter(sentences), "offline", concurrency=8,
+                                                     on_result=lambda i, o, f, hops: reported.append((i, o, f))))
+    finally:
+        set_backend(None)
+
+    assert results == [(sentence, sentence) for sentence in sentences]
+    assert sorted(reported) == [(i, sentence, sentence) for i, sentence in enumerate(sentences)]
+
+
+def test_failed_sentences_are_skipped_and_tasks_stay_bounded():
+    """Round-trip and on_result errors drop only their sentence; at most `concurrency` tasks exist"""
+    task_counts = []
+
+    async def round_trip(text, api_key):
+        task_counts.append(len(asyncio.all_tasks()))
+        await asyncio.sleep(random.uniform(0, 0.005))
+        if text.endswith("3"):
+            raise RuntimeError("simulated failure")
+        return text.upper()
+
+    def on_result(index, original, final, intermediates):
+        if index == 5:
+            raise OSError("checkpoint write failed")
+
+    sentences = [f"sentence {i}" for i in range(40)]
+    results = asyncio.run(translate_concurrently(sentences, "offline", concurrency=4,
+                                                 on_result=on_result, round_trip=round_trip))
+
+    expected = [(s, s.upper()) for i, s in enumerate(sentences) if not s.endswith("3") and i != 5]
+    assert results == expected
+    # The driving task plus at most four sentences
+    assert max(task_counts) <= 5
+
+    sequential = translate_sequentially(sentences, "offline", on_result=on_result,
+                                        round_trip=lambda text, key: asyncio.run(round_trip(text, key)))
+    assert sequential == expected
+
+    configure_cache(mode="off")
+    set_backend(FakeBackend(seed=2))
+    try:
+        batched = translate_in_batches(sentences, "offline", 8, on_result=on_result)
+    finally:
+        set_backend(None)
+    assert batched == [(s, s) for i, s in enumerate(sentences) if i != 5]
+
+
+def test_intermediates_reach_the_result_stream(tmp_path):
+    """Every mode hands the Spanish and Hebrew hop outputs to on_result, which writes them to the checkpoint"""
+    configure_cache(mode="off")
+    set_backend(FakeBackend(seed=4))
+    sentences = [f"Sentence {i} about Hari Seldon." for i in range(5)]
+    runs = {
+        'sequential': lambda on_result: translate_sequentially(sentences, "offline", on_result=on_result,
+                                                               round_trip=chained_round_trip_outputs),
+        'concurrent': lambda on_result: asyncio.run(translate_concurrently(
+            sentences, "offline", 3, on_result=on_result, round_trip=chained_round_trip_outputs_async)),
+        'fused': lambda on_result: asyncio.run(translate_concurrently(
+            sentences, "offline", 3, on_result=on_result, round_trip=fused_round_trip_outputs_async)),
+        'batched': lambda on_result: translate_in_batches(sentences, "offline", 2, on_result=on_result),
+    }
+    try:
+        for mode, run in runs.items():
+            stream = tmp_path / f"{mode}.jsonl"
+            with ResultStreamWriter(stream, fresh=True) as writer:
+                results = run(lambda index, original, final, intermediates:
+                              writer.write(index, original, final, intermediates))
+            records = sorted(iter_results(stream), key=lambda record: record['index'])
+            assert results == [(sentence, sentence) for sentence in sentences]
+            assert [(r['spanish'], r['hebrew']) for r in records] == \
+                [(f"«es» {sentence}", f"«he» {sentence}") for sentence in sentences], mode
+            assert all('fused' not in record for record in records)
+    finally:
+        set_backend(None)
+
+
 if __name__ == "__main__":
     test_pipeline()
+    test_concurrent_results_keep_generation_order()
+    test_failed_sentences_are_skipped_and_tasks_stay_bounded()
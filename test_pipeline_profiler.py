@@ -0,0 +1,108 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+import pipeline_profiler
+from fake_backend import FakeBackend
+from claude_client import set_backend
+from orchestrator import translate_concurrently, chained_round_trip_async
+from translation_cache import configure_cache
+from pipeline_profiler import PipelineProfiler, configure_profiling, cpu_stage, parse_profile_modes, span
+
+
+def test_disabled_profiler_records_nothing(tmp_path):
+    profiler = PipelineProfiler(enabled=False)
+    with profiler.span("stage") as args:
+        assert args is None
+    with profiler.cpu_stage("cpu"):
+        pass
+    assert profiler.save(tmp_path) == [] and profiler.stage_totals() == {}
+
+
+def test_parse_profile_modes():
+    assert parse_profile_modes(None) == set() and parse_profile_modes("off") == set()
+    assert parse_profile_modes("1") == {"trace"}
+    assert parse_profile_modes("cprofile, tracemalloc") == {"trace", "cprofile", "tracemalloc"}
+    with pytest.raises(ValueError):
+        parse_profile_modes("perf")
+
+
+def test_spans_get_one_lane_per_thread_and_task(tmp_path):
+    profiler = PipelineProfiler()
+
+    def work(name):
+        with profiler.span(name, "api", sentence=name):
+            pass
+
+    threads = [threading.Thread(target=work, args=(f"thread {i}",), name=f"worker-{i}") for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    async def tasks():
+        async def one(i):
+            with profiler.span("hop", index=i):
+                await asyncio.sleep(0.01)
+        await asyncio.gather(*(one(i) for i in range(4)))
+
+    asyncio.run(tasks())
+
+    trace = profiler.trace()
+    events = [event for event in trace['traceEvents'] if event['ph'] == 'X']
+    assert len(events) == 7
+    hops = [event for event in events if event['name'] == "hop"]
+    # Concurrent tasks overlap in time, each on its own lane
+    assert len({event['tid'] for event in hops}) == 4
+    assert max(event['ts'] for event in hops) < min(event['ts'] + event['dur'] for event in hops)
+    lane_names = {event['args']['name'] for event in trace['traceEvents'] if event['name'] == 'thread_name'}
+    assert {"worker-0", "worker-1", "worker-2"} <= lane_names
+    assert profiler.stage_totals()['stage/hop']['count'] == 4
+
+    assert profiler.save(tmp_path) == [tmp_path / "profile_trace.json"]
+    assert json.loads((tmp_path / "profile_trace.json").read_text())['displayTimeUnit'] == 'ms'
+
+
+def test_cpu_stages_dump_cprofile_and_tracemalloc_reports(tmp_path):
+    profiler = PipelineProfiler(cprofile=True, tracemalloc=True)
+    try:
+        with profiler.cpu_stage("encode") as args:
+            with profiler.cpu_stage("nested"):
+                blocks = [bytearray(1024) for _ in range(2000)]
+            sorted(range(50000), key=lambda value: -value)
+        assert args['allocated_mb'] > 1.0
+        files = profiler.save(tmp_path)
+    finally:
+        pipeline_profiler._tracemalloc.stop()
+
+    assert [path.name for path in files] == ["profile_trace.json", "profile_cpu.txt", "profile_cpu.prof",
+                                             "profile_memory.txt"]
+    cpu_report = (tmp_path / "profile_cpu.txt").read_text()
+    assert "STAGE: encode" in cpu_report and "STAGE: nested" not in cpu_report and "sorted" in cpu_report
+    assert "test_pipeline_profiler.py" in (tmp_path / "profile_memory.txt").read_text()
+    del blocks
+
+
+def test_pipeline_hops_show_up_in_the_trace():
+    profiler = PipelineProfiler()
+    configure_profiling(profiler)
+    configure_cache(mode="off")
+    set_backend(FakeBackend(latency_median=0.001, seed=1))
+    try:
+        with span("translate"):
+            results = asyncio.run(translate_concurrently([f"sentence {i}" for i in range(5)], "key", 3,
+                                                         round_trip=chained_round_trip_async))
+        with cpu_stage("evaluate"):
+            pass
+    finally:
+        set_backend(None)
+        configure_profiling(None)
+
+    assert len(results) == 5
+    totals = profiler.stage_totals()
+    assert totals['stage/sentence']['count'] == 5 and totals['stage/translate']['count'] == 1
+    assert {key for key in totals if key.startswith("api/")} == {
+        "api/english_spanish", "api/spanish_hebrew", "api/hebrew_english"}
+    assert totals['cpu/evaluate']['count'] == 1
@@ -0,0 +1,197 @@
+import time
+import asyncio
+import threading
+
+from agent_metrics import reset_agent_metrics
+from claude_client import call_claude_agent, async_call_claude_agent, set_backend
+from llm_backend import LLMBackend, LLMResponse, RateLimitedError
+from request_hedging import HedgingPolicy, configure_hedging
+from request_scheduler import AIMDController, RequestScheduler, configure_scheduler
+from translation_cache import configure_cache
+
+
+class StragglerBackend(LLMBackend):
+    """Answers in 1 ms, except that every call whose prompt starts with 'slow' hangs on its first attempt."""
+
+    name = "straggler"
+
+    def __init__(self, stall: float = 2.0):
+        self.stall = stall
+        self.calls = 0
+        self.cancelled = 0
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def _delay(self, prompt: str) -> float:
+        with self._lock:
+            self.calls += 1
+            first = prompt not in self._seen
+            self._seen.add(prompt)
+        return self.stall if prompt.startswith("slow") and first else 0.001
+
+    def create(self, model, max_tokens, system, prompt, api_key):
+        time.sleep(self._delay(prompt))
+        return LLMResponse(prompt, 1, 1)
+
+    async def acreate(self, model, max_tokens, system, prompt, api_key):
+        try:
+            await asyncio.sleep(self._delay(prompt))
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return LLMResponse(prompt, 1, 1)
+
+
+def _setup(policy: HedgingPolicy) -> StragglerBackend:
+    configure_cache(mode="off")
+    configure_scheduler(RequestScheduler())
+    configure_hedging(policy)
+    backend = StragglerBackend()
+    set_backend(backend)
+    return backend
+
+
+def _teardown() -> None:
+    set_backend(None)
+    configure_scheduler(None)
+    configure_hedging(None)
+
+
+def test_sync_hedge_fires_after_threshold_and_wins():
+    metrics = reset_agent_metrics()
+    policy = HedgingPolicy(budget=0.5, min_samples=5, min_delay=0.02)
+    _setup(policy)
+    try:
+        for i in range(10):
+            call_claude_agent(f"warm-up {i}", "system", "offline", agent="english_spanish")
+        assert policy.threshold("english_spanish") == 0.02
+
+        start = time.perf_counter()
+        assert call_claude_agent("slow one", "system", "offline", agent="english_spanish") == "slow one"
+        assert time.perf_counter() - start < 1.0
+    finally:
+        _teardown()
+
+    assert policy.stats()['hedged'] == policy.stats()['wins'] == 1
+    stats = metrics.snapshot()['english_spanish']
+    assert (stats['hedges'], stats['hedge_wins'], stats['calls']) == (1, 1, 11)
+
+
+def test_async_hedge_cancels_the_losing_request():
+    metrics = reset_agent_metrics()
+    policy = HedgingPolicy(budget=0.5, min_samples=5, min_delay=0.02)
+    backend = _setup(policy)
+
+    async def run():
+        for i in range(10):
+            await async_call_claude_agent(f"warm-up {i}", "system", "offline", agent="spanish_hebrew")
+        start = time.perf_counter()
+        text = await async_call_claude_agent("slow two", "system", "offline", agent="spanish_hebrew")
+        return text, time.perf_counter() - start
+
+    try:
+        text, elapsed = asyncio.run(run())
+    finally:
+        _teardown()
+
+    assert text == "slow two"
+    assert elapsed < 1.0
+    assert backend.cancelled == 1
+    assert metrics.snapshot()['spanish_hebrew']['hedge_wins'] == 1
+
+
+def test_budget_caps_hedges_and_disabled_policy_never_hedges():
+    reset_agent_metrics()
+    policy = HedgingPolicy(budget=0.0, min_samples=5, min_delay=0.01)
+    backend = _setup(policy)
+    backend.stall = 0.05
+    try:
+        for i in range(6):
+            call_claude_agent(f"warm-up {i}", "system", "offline", agent="hebrew_english")
+        call_claude_agent("slow three", "system", "offline", agent="hebrew_english")
+    finally:
+        _teardown()
+    assert policy.stats()['hedged'] == 0
+    assert policy.stats()['over_budget'] == 1
+    assert backend.calls == 7
+
+    disabled = HedgingPolicy(enabled=False, min_samples=1)
+    disabled.observe("agent", 0.0)
+    assert disabled.call("agent", lambda: LLMResponse("done")).text == "done"
+    assert disabled.stats()['hedged'] == 0
+
+
+class ThrottlingBackend(StragglerBackend):
+    """StragglerBackend that throttles every prompt starting with 'throttle' on its first attempt."""
+
+    def create(self, model, max_tokens, system, prompt, api_key):
+        if prompt.startswith("throttle") and prompt not in self._seen:
+            self._delay(prompt)
+            raise RateLimitedError("slow down", retry_after=0.01)
+        return super().create(model, max_tokens, system, prompt, api_key)
+
+
+def test_only_successful_attempts_feed_the_latency_window():
+    reset_agent_metrics()
+    policy = HedgingPolicy(budget=0.5, min_samples=5, min_delay=0.02)
+    configure_cache(mode="off")
+    configure_scheduler(RequestScheduler(base_delay=0.01))
+    configure_hedging(policy)
+    backend = ThrottlingBackend()
+    set_backend(backend)
+    try:
+        assert call_claude_agent("throttle me", "system", "offline", agent="english_spanish") == "throttle me"
+    finally:
+        _teardown()
+
+    assert backend.calls == 2
+    assert policy.stats()['calls'] == 2
+    # One sample, from the successful retry; the throttled attempt and the backoff are not in it
+    assert len(policy._latencies["english_spanish"]) == 1
+    assert policy._latencies["english_spanish"][0] < 0.01
+
+
+def test_no_hedges_while_the_scheduler_backs_off():
+    reset_agent_metrics()
+    policy = HedgingPolicy(budget=0.5, min_samples=5, min_delay=0.02)
+    backend = _setup(policy)
+    backend.stall = 0.1
+    scheduler = RequestScheduler(controller=AIMDController(cooldown=60.0))
+    configure_scheduler(scheduler)
+    try:
+        for i in range(10):
+            call_claude_agent(f"warm-up {i}", "system", "offline", agent="hebrew_english")
+        scheduler.controller.on_throttle()
+        assert scheduler.backing_off()
+        call_claude_agent("slow four", "system", "offline", agent="hebrew_english")
+    finally:
+        _teardown()
+
+    assert policy.stats()['hedged'] == 0
+    assert policy.stats()['suppressed'] == 1
+    assert backend.calls == 11
+
+
+def test_hedges_take_their_own_in_flight_slot():
+    """A hedge counts against the AIMD limit; with no free slot it is held back"""
+    reset_agent_metrics()
+    for limit, hedged in ((1, 0), (2, 1)):
+        policy = HedgingPolicy(budget=0.5, min_samples=5, min_delay=0.02)
+        backend = _setup(policy)
+        backend.stall = 0.1
+        controller = AIMDController(initial=limit, maximum=limit)
+        configure_scheduler(RequestScheduler(controller=controller))
+        try:
+            for i in range(10):
+                call_claude_agent(f"warm-up {i}", "system", "offline", agent="english_spanish")
+            call_claude_agent("slow five", "system", "offline", agent="english_spanish")
+        finally:
+            _teardown()
+
+        assert (policy.stats()['hedged'], policy.stats()['suppressed']) == (hedged, 1 - hedged)
+        assert backend.calls == 11 + hedged
+        # Every slot, the hedge's included, is given back (done callbacks may lag the return)
+        deadline = time.monotonic() + 1.0
+        while controller.in_flight and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert controller.in_flight == 0
@@ -0,0 +1,254 @@
+import json
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from claude_client import call_claude_agent, set_backend, close_clients
+from fake_backend import FakeBackend
+from llm_backend import LLMResponse, RateLimitedError
+from orchestrator import translate_concurrently
+from request_scheduler import AIMDController, RequestScheduler, TokenBucket, configure_scheduler
+from translation_cache import configure_cache
+
+
+def test_token_bucket_reports_wait_for_debt():
+    """Reservations beyond the burst must wait for the refill, and refunds shorten the wait"""
+    now = [0.0]
+    bucket = TokenBucket(rate_per_minute=60, capacity=2, clock=lambda: now[0])
+
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == pytest.approx(1.0)
+    now[0] = 3.0
+    assert bucket.reserve() == 0.0
+    bucket.adjust(-5)
+    assert bucket.reserve() == pytest.approx(5.0)
+
+
+def test_aimd_increases_additively_and_halves_once_per_cooldown():
+    controller = AIMDController(initial=8, minimum=1, maximum=10, cooldown=60)
+    for _ in range(8):
+        controller.on_success()
+    assert 8.9 < controller.limit < 9.1
+
+    controller.on_throttle()
+    controller.on_throttle()
+    assert controller.limit == pytest.approx(9.0 * 0.5, rel=0.02)
+
+
+def test_hedge_admission_never_waits_and_refunds_on_refusal():
+    scheduler = RequestScheduler(requests_per_minute=60, tokens_per_minute=600,
+                                 controller=AIMDController(initial=2, maximum=2, cooldown=60))
+    release = scheduler.admit_hedge(10)
+    assert release is not None and scheduler.controller.in_flight == 1
+    release()
+    assert scheduler.controller.in_flight == 0
+
+    # The one-request burst is spent: refused without touching the token bucket or the controller
+    assert scheduler.admit_hedge(10) is None
+    assert scheduler.token_bucket.try_reserve(90) and scheduler.controller.in_flight == 0
+
+    unlimited = RequestScheduler(controller=AIMDController(initial=1, maximum=1, cooldown=60))
+    unlimited.controller.acquire()
+    assert unlimited.admit_hedge() is None
+    unlimited.controller.release()
+    unlimited.controller.on_throttle()
+    assert unlimited.backing_off() and unlimited.admit_hedge() is None
+
+
+def test_async_waiters_are_woken_by_release_and_growth_without_polling(monkeypatch):
+    """Coroutines sleep on an event until a slot is released (from any thread) or the limit grows"""
+    controller = AIMDController(initial=1, maximum=2)
+    controller.acquire()
+
+    async def scenario():
+        async def forbidden_sleep(delay):
+            raise AssertionError("acquire_async polled")
+
+        monkeypatch.setattr(asyncio, "sleep", forbidden_sleep)
+        first = asyncio.create_task(controller.acquire_async())
+        second = asyncio.create_task(controller.acquire_async())
+        await asyncio.wait([first, second], timeout=0.05)
+        assert not first.done() and not second.done()
+
+        threading.Thread(target=controller.release).start()
+        await asyncio.wait_for(first, timeout=1)
+        assert not second.done() and controller.in_flight == 1
+
+        controller.on_success()  # limit 1 -> 2: one more slot
+        await asyncio.wait_for(second, timeout=1)
+        assert controller.in_flight == 2
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_async_waiter_hands_its_wakeup_on():
+    controller = AIMDController(initial=1, maximum=1)
+    controller.acquire()
+
+    async def scenario():
+        cancelled = asyncio.create_task(controller.acquire_async())
+        waiting = asyncio.create_task(controller.acquire_async())
+        await asyncio.sleep(0.01)
+        controller.release()  # wakes `cancelled`, which never gets to take the slot
+        cancelled.cancel()
+        await asyncio.wait_for(waiting, timeout=1)
+        assert cancelled.cancelled() and controller.in_flight == 1
+
+    asyncio.run(scenario())
+
+
+def test_scheduler_honors_retry_after_then_gives_up():
+    scheduler = RequestScheduler(max_retries=2, base_delay=0.001)
+    attempts = []
+
+    def throttled_once():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RateLimitedError("slow down", retry_after=0.01)
+        return LLMResponse("ok")
+
+    response = scheduler.call(throttled_once)
+    assert response.text == "ok" and response.retries == 1
+    assert scheduler.stats()['throttled'] == 1
+
+    def always_throttled():
+        raise RateLimitedError("slow down", retry_after=0.001)
+
+    with pytest.raises(RateLimitedError):
+        scheduler.call(always_throttled)
+    assert scheduler.stats()['failures'] == 1
+
+
+def test_concurrent_pipeline_survives_429s_and_5xx():
+    """Against a backend that throttles 20% and fails 10% of requests, no sentence is lost"""
+    configure_cache(mode="off")
+    scheduler = RequestScheduler(max_retries=20, base_delay=0.001, max_delay=0.01,
+                                 controller=AIMDController(initial=8, maximum=16, cooldown=0.0))
+    configure_scheduler(scheduler)
+    set_backend(FakeBackend(rate_limit_rate=0.2, error_rate=0.1, retry_after=0.001, seed=3))
+    try:
+        sentences = [f"Sentence number {i} about the galactic empire." for i in range(40)]
+        results = asyncio.run(translate_concurrently(iter(sentences), "offline", concurrency=16))
+    finally:
+        set_backend(None)
+        configure_scheduler(None)
+
+    assert [original for original, _ in results] == sentences
+    assert all(final == original for original, final in results)
+    stats = scheduler.stats()
+    assert stats['throttled'] > 0 and stats['retries'] >= stats['throttled']
+    assert stats['failures'] == 0
+    assert 1 <= stats['concurrency_limit'] <= 16
+
+
+class _ThrottlingStub(BaseHTTPRequestHandler):
+    """Messages endpoint that answers 429 (retry-after 0) to every other request."""
+
+    requests = 0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        type(self).requests += 1
+        if type(self).requests % 2 == 1:
+            body, status = {"type": "error", "error": {"type": "rate_limit_error", "message": "slow down"}}, 429
+        else:
+            body, status = {"id": "msg_stub", "type": "message", "role": "assistant", "model": "stub",
+                            "content": [{"type": "text", "text": "hola"}], "stop_reason": "end_turn",
+                            "stop_sequence": None, "usage": {"input_tokens": 5, "output_tokens": 2}}, 200
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        if status == 429:
+            self.send_header('retry-after', '0')
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_sdk_429_is_retried_by_the_scheduler(monkeypatch):
+    """A real SDK client pointed at a local 429 stub: the scheduler, not the SDK, retries"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ThrottlingStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setenv("ANTHROPIC_BASE_URL", f"http://127.0.0.1:{server.server_address[1]}")
+    configure_cache(mode="off")
+    scheduler = RequestScheduler(base_delay=0.001)
+    configure_scheduler(scheduler)
+    close_clients()
+    try:
+        assert call_claude_agent("hello", "translator", "stub-key") == "hola"
+    finally:
+        configure_scheduler(None)
+        close_clients()
+        server.shutdown()
+
+    assert _ThrottlingStub.requests == 2
+    assert scheduler.stats()['throttled'] == 1
+
+
+if __name__ == "__main__":
+    test_token_bucket_reports_wait_for_debt()
+    test_aimd_increases_additively_and_halves_once_per_cooldown()
+    test_scheduler_honors_retry_after_then_gives_up()
+    test_concurrent_pipeline_survives_429s_and_5xx()
+    print("✓ All request scheduler tests passed")
+
+
+class _TrackedStreamBackend(FakeBackend):
+    """FakeBackend whose streams record when their response is released."""
+
+    def __init__(self):
+        super().__init__(latency_median=0.0, seed=0)
+        self.released = 0
+
+    def stream(self, model, max_tokens, system, prompt, api_key):
+        stream = super().stream(model, max_tokens, system, prompt, api_key)
+        stream.on_close(self._release)
+        return stream
+
+    def _release(self):
+        self.released += 1
+
+
+def test_stream_holds_its_slot_until_closed_even_if_never_read():
+    scheduler = RequestScheduler(controller=AIMDController(initial=2, maximum=2))
+    backend = _TrackedStreamBackend()
+    open_stream = lambda: backend.stream("model", 100, "sentence generator", "Generate exactly 3", "offline")
+
+    unread = scheduler.stream(open_stream)
+    assert scheduler.controller.in_flight == 1
+    unread.close()
+    unread.close()
+    assert scheduler.controller.in_flight == 0 and backend.released == 1
+
+    with scheduler.stream(open_stream) as stream:
+        assert scheduler.controller.in_flight == 1
+        next(iter(stream))
+    assert scheduler.controller.in_flight == 0 and backend.released == 2
+
+    exhausted = scheduler.stream(open_stream)
+    assert list(exhausted.lines())
+    assert exhausted.closed and scheduler.controller.in_flight == 0 and backend.released == 3
+
+
+def test_streamed_lines_release_the_slot_when_the_generator_closes():
+    from claude_client import stream_claude_agent_lines
+
+    scheduler = RequestScheduler(controller=AIMDController(initial=2, maximum=2))
+    configure_scheduler(scheduler)
+    backend = _TrackedStreamBackend()
+    set_backend(backend)
+    try:
+        lines = stream_claude_agent_lines("Generate exactly 3", "sentence generator", "offline")
+        next(lines)
+        assert scheduler.controller.in_flight == 1
+        lines.close()
+    finally:
+        set_backend(None)
+        configure_scheduler(None)
+    assert scheduler.controller.in_flight == 0 and backend.released == 1
@@ -0,0 +1,47 @@
+import json
+
+from result_stream import ResultStreamWriter, load_checkpoint, read_results, build_artifacts_from_stream
+
+
+def test_checkpoint_survives_torn_write_and_resumes(tmp_path):
+    """A half-written last record is ignored, and appending after it starts on a clean line"""
+    stream = tmp_path / "translation_results.jsonl"
+    with ResultStreamWriter(stream, fsync_every=2, fresh=True) as writer:
+        for index in (2, 0, 1):
+            writer.write(index, f"original {index}", f"final {index}")
+    with open(stream, 'a', encoding='utf-8') as f:
+        f.write('{"index": 3, "original": "cut off mid-')
+
+    assert load_checkpoint(stream) == {0, 1, 2}
+
+    with ResultStreamWriter(stream) as writer:
+        writer.write(3, "original 3", "final 3")
+
+    assert load_checkpoint(stream) == {0, 1, 2, 3}
+    assert read_results(stream) == [(f"original {i}", f"final {i}") for i in range(4)]
+
+
+def test_artifacts_match_previous_format(tmp_path):
+    """Streamed JSON/CSV artifacts are identical to the former json.dump/csv output"""
+    stream = tmp_path / "translation_results.jsonl"
+    distances = {0: 0.125, 1: 0.5, 2: 0.0625}
+    with ResultStreamWriter(stream, fresh=True) as writer:
+        for index in (1, 2, 0):
+            writer.write(index, f"Seldon {index} ñ", f"Final {index}")
+
+    count = build_artifacts_from_stream(stream, tmp_path / "results.json", tmp_path / "results.csv", distances)
+
+    expected = {
+        'total_sentences': 3,
+        'pipeline': 'English → Spanish → Hebrew → English',
+        'results': [
+            {'index': i + 1, 'original': f"Seldon {i} ñ", 'final_translated': f"Final {i}",
+             'cosine_distance': distances[i]}
+            for i in range(3)
+        ]
+    }
+    assert count == 3
+    assert (tmp_path / "results.json").read_text(encoding='utf-8') == json.dumps(expected, indent=2, ensure_ascii=False)
+    csv_lines = (tmp_path / "results.csv").read_text(encoding='utf-8').splitlines()
+    assert csv_lines[0] == "Index,Original English,Final Re-translated English,Cosine Distance"
+    assert csv_lines[1] == "1,Seldon 0 ñ,Final 0,0.125000"
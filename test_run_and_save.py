@@ -0,0 +1,66 @@
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+
+from run_and_save_with_display import parse_args
+
+
+HEAVY_MODULES = ("torch", "matplotlib", "sentence_transformers", "transformers", "scipy")
+
+# Run in a fresh interpreter: records every import attempt of a heavy module,
+# so the check holds whether or not those packages are installed
+IMPORT_PROBE = textwrap.dedent("""
+    import sys
+    heavy = {heavy!r}
+    attempted = []
+
+    class Probe:
+        def find_spec(self, name, path=None, target=None):
+            if name.partition(".")[0] in heavy:
+                attempted.append(name)
+            return None
+
+    sys.meta_path.insert(0, Probe())
+    import run_and_save_with_display
+    args = run_and_save_with_display.parse_args({argv!r})
+    assert args.sentences == 5
+    print(",".join(sorted(set(attempted))))
+""")
+
+
+@pytest.mark.parametrize("argv", [
+    ["-n", "5"],
+    ["-n", "5", "--no-eval", "--no-plot", "--profile", "trace,cprofile", "--concurrency", "4"],
+])
+def test_parse_args_does_not_import_heavy_modules(argv):
+    result = subprocess.run([sys.executable, "-c", IMPORT_PROBE.format(heavy=HEAVY_MODULES, argv=argv)],
+                            cwd=Path(__file__).parent, capture_output=True, text=True, timeout=60)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == ""
+
+
+def test_parse_args_defaults():
+    args = parse_args([])
+
+    assert args.sentences is None and args.output_dir == Path("Insights")
+    assert (args.concurrency, args.batch_size) == (1, 1)
+    assert not (args.no_eval or args.no_plot or args.fused or args.resume)
+
+
+@pytest.mark.parametrize("argv", [
+    ["--show", "--plot-background"],
+    ["--fused", "--batch-size", "4"],
+    ["-n", "0"],
+    ["--concurrency", "-1"],
+    ["--profile", "flamegraph"],
+])
+def test_parse_args_rejects_invalid_combinations(argv, capsys):
+    with pytest.raises(SystemExit) as excinfo:
+        parse_args(argv)
+
+    assert excinfo.value.code == 2
+    assert "error:" in capsys.readouterr().err
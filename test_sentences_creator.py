@@ -0,0 +1,157 @@
+import re
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from claude_client import set_backend, close_clients, stream_claude_agent_lines
+from fake_backend import FakeBackend
+from llm_backend import LLMBackend, LLMResponse
+from agent_sentences_creator import sentences_creator, parse_sentences
+from sentence_dedup import SentenceDeduplicator, normalize_sentence
+
+
+class RepetitiveBackend(LLMBackend):
+    """Generator stub where half of every response repeats (or nearly repeats) earlier lines."""
+
+    name = "repetitive"
+
+    def __init__(self):
+        self.requests = []
+        self._fake = FakeBackend(seed=7)
+        self._lock = threading.Lock()
+
+    def create(self, model, max_tokens, system, prompt, api_key):
+        count = int(re.search(r"Generate exactly (\d+)", prompt).group(1))
+        lines = []
+        with self._lock:
+            self.requests.append(count)
+            for i in range(count):
+                if i % 2 == 0:
+                    lines.append(f"{i + 1}. {self._fake._sentence()}")
+                else:
+                    # Exact repeat with different case, or the previous line minus its last word
+                    previous = lines[-1].split(". ", 1)[1]
+                    lines.append(previous.upper() if i % 4 == 1 else previous.rsplit(" ", 1)[0] + ".")
+        return LLMResponse("\n".join(lines))
+
+
+def test_deduplicator_catches_exact_and_near_duplicates():
+    dedup = SentenceDeduplicator()
+    assert dedup.add("Hari Seldon predicted the fall of the Galactic Empire within three centuries.")
+    assert not dedup.add("hari seldon predicted the fall of the galactic empire within three centuries")
+    assert not dedup.add("Hari Seldon predicted the collapse of the Galactic Empire within three centuries.")
+    assert dedup.add("The Mule conquered worlds that psychohistory never expected to fall.")
+    assert (dedup.exact_duplicates, dedup.near_duplicates, len(dedup)) == (1, 1, 2)
+    assert normalize_sentence("  The  Mule, again! ") == "the mule again"
+
+
+def test_parse_sentences_strips_list_markers():
+    assert parse_sentences("1. First one\n\n- Second one\n  Third one  ") == ["First one", "Second one", "Third one"]
+
+
+def test_sentences_are_unique_and_generation_adapts_to_yield():
+    backend = RepetitiveBackend()
+    set_backend(backend)
+    try:
+        sentences = list(sentences_creator("offline", count=120, concurrency=3, batch_size=40))
+    finally:
+        set_backend(None)
+
+    assert len(sentences) == 120
+    assert len({normalize_sentence(sentence) for sentence in sentences}) == 120
+    assert not any(sentence[0].isdigit() for sentence in sentences)
+    # Only half of each response is unique, so later requests are sized for the ~50% yield
+    assert sum(backend.requests) >= 240
+    assert len(backend.requests) <= 4 * 3 + 4
+
+
+def test_generator_yields_before_all_requests_finish():
+    set_backend(FakeBackend())
+    try:
+        generator = sentences_creator("offline", count=500, concurrency=2, batch_size=50)
+        first = next(generator)
+        generator.close()
+    finally:
+        set_backend(None)
+    assert len(first.split()) >= 10
+
+
+def test_streaming_yields_first_sentence_after_one_line_of_latency():
+    """With 0.5 s per response, streaming hands over the first sentence long before the batch completes"""
+    set_backend(FakeBackend(latency_median=0.5, latency_sigma=0.01))
+    try:
+        for stream, bound in ((True, lambda first: first < 0.2), (False, lambda first: first >= 0.45)):
+            start = time.perf_counter()
+            generator = sentences_creator("offline", count=50, concurrency=1, stream=stream)
+            next(generator)
+            assert bound(time.perf_counter() - start)
+            assert len(list(generator)) == 49
+    finally:
+        set_backend(None)
+
+
+class _StreamingStub(BaseHTTPRequestHandler):
+    """Streaming messages endpoint that holds back its second line until the client has read the first."""
+
+    release = threading.Event()
+    first_line_read_early = False
+
+    def _event(self, name, payload):
+        self.wfile.write(f"event: {name}\ndata: {json.dumps(payload)}\n\n".encode())
+        self.wfile.flush()
+
+    def _delta(self, text):
+        self._event("content_block_delta",
+                    {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": text}})
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.end_headers()
+        self._event("message_start", {"type": "message_start", "message": {
+            "id": "msg_stub", "type": "message", "role": "assistant", "model": "stub", "content": [],
+            "stop_reason": None, "stop_sequence": None, "usage": {"input_tokens": 30, "output_tokens": 1}}})
+        self._event("content_block_start", {"type": "content_block_start", "index": 0,
+                                            "content_block": {"type": "text", "text": ""}})
+        self._delta("1. The Foundation was built on Terminus at the edge of ")
+        self._delta("the galaxy.\nThe Mule")
+        type(self).first_line_read_early = type(self).release.wait(timeout=5)
+        self._delta(" broke the Seldon Plan with a single mutation.")
+        self._event("content_block_stop", {"type": "content_block_stop", "index": 0})
+        self._event("message_delta", {"type": "message_delta", "delta": {"stop_reason": "end_turn",
+                                      "stop_sequence": None}, "usage": {"output_tokens": 24}})
+        self._event("message_stop", {"type": "message_stop"})
+
+    def log_message(self, *args):
+        pass
+
+
+def test_sdk_stream_yields_lines_as_newlines_arrive(monkeypatch):
+    """A real SDK client against a local SSE stub: the first line is available mid-stream"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StreamingStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setenv("ANTHROPIC_BASE_URL", f"http://127.0.0.1:{server.server_address[1]}")
+    close_clients()
+    try:
+        lines = stream_claude_agent_lines("Generate exactly 2", "sentence generator", "stub-key")
+        first = next(lines)
+        _StreamingStub.release.set()
+        rest = list(lines)
+    finally:
+        close_clients()
+        server.shutdown()
+
+    assert first == "1. The Foundation was built on Terminus at the edge of the galaxy."
+    assert rest == ["The Mule broke the Seldon Plan with a single mutation."]
+    assert _StreamingStub.first_line_read_early
+
+
+if __name__ == "__main__":
+    test_deduplicator_catches_exact_and_near_duplicates()
+    test_parse_sentences_strips_list_markers()
+    test_sentences_are_unique_and_generation_adapts_to_yield()
+    test_generator_yields_before_all_requests_finish()
+    test_streaming_yields_first_sentence_after_one_line_of_latency()
+    print("✓ All sentences creator tests passed")
@@ -0,0 +1,93 @@
+import json
+
+import numpy as np
+
+from agent_evaluation import finish_incremental_evaluation
+from streaming_evaluation import RunningStats, IncrementalEvaluator, cosine_distances, evaluate_translation_stream
+
+
+def _fake_encoder(texts):
+    """Deterministic pseudo-embeddings derived from each sentence"""
+    return np.stack([np.random.default_rng(abs(hash(text)) % (2 ** 32)).normal(size=16).astype(np.float32)
+                     for text in texts])
+
+
+def _reference_cosine(u, v):
+    """Pair-by-pair cosine distance as scipy.spatial.distance.cosine computes it"""
+    u = np.asarray(u, dtype=np.float64)
+    v = np.asarray(v, dtype=np.float64)
+    return float(np.clip(1.0 - np.dot(u, v) / np.sqrt(np.dot(u, u) * np.dot(v, v)), 0.0, 2.0))
+
+
+def test_running_stats_matches_numpy():
+    """Chunked Welford accumulation reproduces np.mean/np.var/np.min/np.max"""
+    values = np.random.default_rng(7).random(1003)
+    stats = RunningStats()
+    for start in range(0, len(values), 97):
+        stats.update(values[start:start + 97])
+
+    assert stats.count == len(values)
+    assert np.isclose(stats.mean, np.mean(values))
+    assert np.isclose(stats.variance, np.var(values))
+    assert np.isclose(stats.std, np.std(values))
+    assert stats.min == np.min(values) and stats.max == np.max(values)
+
+
+def test_stream_matches_pairwise_evaluation():
+    """Streaming evaluation matches the pair-by-pair computation for any chunk size"""
+    pairs = [(f"original {i}", f"final {i % 13}") for i in range(500)]
+    reference = np.array([_reference_cosine(_fake_encoder([o])[0], _fake_encoder([f])[0]) for o, f in pairs])
+
+    batched = cosine_distances(_fake_encoder([p[0] for p in pairs]), _fake_encoder([p[1] for p in pairs]))
+    assert np.allclose(batched, reference, atol=1e-12)
+
+    collected = []
+    for chunk_size in (1, 64, 1000):
+        collected.clear()
+        metrics = evaluate_translation_stream(iter(pairs), chunk_size=chunk_size, encoder=_fake_encoder,
+                                              on_distances=lambda start, d: collected.append((start, d)))
+        assert metrics['count'] == len(pairs)
+        assert np.isclose(metrics['mean'], np.mean(reference))
+        assert np.isclose(metrics['variance'], np.var(reference))
+        assert np.isclose(metrics['min'], np.min(reference))
+        assert np.isclose(metrics['max'], np.max(reference))
+        assert np.allclose(np.concatenate([d for _, d in collected]), reference)
+        assert [start for start, _ in collected] == list(range(0, len(pairs), chunk_size))
+
+
+def test_incremental_evaluator_matches_stream():
+    """Pairs submitted out of order in the background give the same metrics, keyed by index"""
+    pairs = [(f"original {i}", f"final {i % 7}") for i in range(150)]
+    expected = evaluate_translation_stream(pairs, encoder=_fake_encoder)
+
+    evaluator = IncrementalEvaluator(micro_batch_size=16, flush_interval=0.01,
+                                     encoder=_fake_encoder, use_cache=False)
+    for index in reversed(range(len(pairs))):
+        evaluator.submit(index, *pairs[index])
+    metrics = evaluator.close()
+
+    for key in ('count', 'mean', 'variance', 'min', 'max'):
+        assert np.isclose(metrics[key], expected[key])
+    reference = cosine_distances(_fake_encoder([p[0] for p in pairs]), _fake_encoder([p[1] for p in pairs]))
+    assert np.allclose(evaluator.ordered_distances(), reference)
+
+
+def test_nothing_evaluated_gives_finite_metrics(monkeypatch, capsys):
+    """With no pairs (all sentences failed, or nothing new on resume) the metrics stay valid JSON"""
+    monkeypatch.setenv("TURINGCHAIN_EMBEDDING_CACHE", "off")
+    assert evaluate_translation_stream([], encoder=_fake_encoder)['min'] == 0.0
+
+    evaluator = IncrementalEvaluator(encoder=_fake_encoder, use_cache=False)
+    metrics = finish_incremental_evaluation(evaluator, plot=False)
+
+    values = {key: metrics[key] for key in ('mean', 'variance', 'std', 'min', 'max')}
+    assert values == dict.fromkeys(values, 0.0)
+    json.dumps(values, allow_nan=False)
+    assert "inf" not in capsys.readouterr().out
+
+
+if __name__ == "__main__":
+    test_running_stats_matches_numpy()
+    test_stream_matches_pairwise_evaluation()
+    test_incremental_evaluator_matches_stream()
+    print("✓ All streaming evaluation tests passed")
@@ -0,0 +1,112 @@
+import itertools
+
+import pytest
+
+import translation_cache
+from translation_cache import TranslationCache, cache_disabled, configure_cache, get_translation_cache
+
+
+def _put(cache, prompt, response=None):
+    cache.put("model", "system", 100, prompt, response or f"reply to {prompt}")
+
+
+def _get(cache, prompt):
+    return cache.get("model", "system", 100, prompt)
+
+
+def _clock():
+    ticks = itertools.count()
+    return lambda: float(next(ticks))
+
+
+def test_lru_evicts_the_least_recently_used_entry(tmp_path):
+    cache = TranslationCache(tmp_path / "cache.sqlite3", max_entries=3, clock=_clock())
+    for prompt in ("a", "b", "c"):
+        _put(cache, prompt)
+    # The hit on "a" is only queued, but is written before the eviction
+    assert _get(cache, "a") == "reply to a"
+    _put(cache, "d")
+
+    assert _get(cache, "b") is None
+    assert [_get(cache, prompt) for prompt in ("a", "c", "d")] == ["reply to a", "reply to c", "reply to d"]
+    stats = cache.stats()
+    assert (stats['entries'], stats['evictions'], stats['writes']) == (3, 1, 4)
+    assert (stats['hits'], stats['misses']) == (4, 1)
+    assert stats['hit_rate'] == pytest.approx(0.8)
+
+    _put(cache, "a", "new reply")
+    assert _get(cache, "a") == "new reply" and cache.stats()['entries'] == 3
+    cache.close()
+
+
+def test_eviction_counts_entries_written_by_other_processes(tmp_path):
+    first = TranslationCache(tmp_path / "cache.sqlite3", max_entries=3)
+    second = TranslationCache(tmp_path / "cache.sqlite3", max_entries=3)
+    _put(first, "a")
+    _put(first, "b")
+    _put(second, "c")
+    _put(second, "d")
+
+    assert first.stats()['entries'] == second.stats()['entries'] == 3
+    assert second.stats()['evictions'] == 1 and _get(first, "a") is None
+    first.close()
+    second.close()
+
+
+def test_hits_are_written_in_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(translation_cache, "TOUCH_BATCH", 2)
+    cache = TranslationCache(tmp_path / "cache.sqlite3", clock=_clock())
+    _put(cache, "a")
+    _put(cache, "b")
+
+    def last_access(prompt):
+        key = translation_cache.make_cache_key("model", "system", 100, prompt)
+        return cache._conn.execute("SELECT last_access FROM responses WHERE key = ?", (key,)).fetchone()[0]
+
+    _get(cache, "a")
+    assert last_access("a") == 0.0
+    _get(cache, "b")
+    assert (last_access("a"), last_access("b")) == (2.0, 3.0)
+    cache.close()
+
+
+@pytest.mark.parametrize("mode, reads, writes", [("on", True, True), ("refresh", False, True),
+                                                 ("bypass", False, False)])
+def test_cache_modes(tmp_path, mode, reads, writes):
+    path = tmp_path / "cache.sqlite3"
+    seeded = TranslationCache(path)
+    _put(seeded, "seeded")
+    seeded.close()
+
+    cache = configure_cache(path=path, mode=mode)
+    try:
+        assert get_translation_cache() is cache and cache.mode == mode
+        assert (_get(cache, "seeded") == "reply to seeded") is reads
+        _put(cache, "new")
+        assert (cache.stats()['entries'] == 2) is writes
+        assert cache.stats()['hits'] == int(reads)
+    finally:
+        configure_cache(mode="off")
+
+
+def test_off_mode_disables_the_cache(tmp_path):
+    assert configure_cache(path=tmp_path / "cache.sqlite3", mode="off") is None
+    assert get_translation_cache() is None
+    with pytest.raises(ValueError):
+        TranslationCache(tmp_path / "cache.sqlite3", mode="sometimes")
+
+
+def test_cache_disabled_restores_the_previous_cache(tmp_path):
+    cache = configure_cache(path=tmp_path / "cache.sqlite3", mode="on")
+    try:
+        with cache_disabled():
+            assert get_translation_cache() is None
+        assert get_translation_cache() is cache
+        _put(cache, "still open")
+        assert _get(cache, "still open") == "reply to still open"
+    finally:
+        configure_cache(mode="off")
+
+    with cache_disabled():
+        pass
+    assert get_translation_cache() is None
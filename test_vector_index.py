@@ -0,0 +1,97 @@
+import sqlite3
+
+import numpy as np
+import pytest
+
+from vector_index import VectorIndex, default_run_name, normalize_rows
+
+
+def clustered_vectors(count, dim=32, centers=40, seed=0):
+    """Unit vectors scattered around random centers, like sentence embeddings of a few topics."""
+    rng = np.random.default_rng(seed)
+    means = rng.normal(size=(centers, dim))
+    return normalize_rows(means[rng.integers(0, centers, count)] + rng.normal(scale=0.3, size=(count, dim)))
+
+
+def add_synthetic_run(index, name, count, seed):
+    originals = clustered_vectors(count, seed=seed)
+    finals = normalize_rows(originals + np.random.default_rng(seed + 1).normal(scale=0.2, size=originals.shape))
+    drift = 1.0 - np.sum(originals * finals, axis=1)
+    index.add_run(name, [f"{name} original {i}" for i in range(count)], [f"{name} final {i}" for i in range(count)],
+                  originals, finals, drift)
+    return originals, drift
+
+
+def test_exact_search_persistence_and_similar_to(tmp_path):
+    index = VectorIndex(tmp_path, "fake-model")
+    originals, _ = add_synthetic_run(index, "first", 300, seed=1)
+    add_synthetic_run(index, "second", 200, seed=2)
+    assert len(index) == 1000 and index.stats()['ivf_lists'] == 0
+
+    hits = index.search(originals[7], k=5)
+    assert hits[0]['text'] == "first original 7" and hits[0]['similarity'] == pytest.approx(1.0, abs=1e-5)
+    assert all(hit['kind'] == "original" for hit in hits)
+    assert [hit['similarity'] for hit in hits] == sorted((hit['similarity'] for hit in hits), reverse=True)
+
+    reopened = VectorIndex(tmp_path, "fake-model")
+    assert [run['name'] for run in reopened.runs()] == ["first", "second"]
+    similar = reopened.similar_to("first", 7, k=5)
+    assert "first original 7" not in [hit['text'] for hit in similar]
+    assert similar[0]['similarity'] == pytest.approx(hits[1]['similarity'], abs=1e-5)
+
+    with pytest.raises(ValueError):
+        VectorIndex(tmp_path, "other-model")
+    with pytest.raises(Exception):
+        index.add_run("first", [], [], np.empty((0, 32)), np.empty((0, 32)), [])
+
+
+def test_ivf_search_matches_exact_search(tmp_path):
+    index = VectorIndex(tmp_path, "fake-model")
+    add_synthetic_run(index, "big", 6000, seed=3)
+    lists = index.build_ivf()
+    assert lists == int(np.sqrt(12000))
+    # Rows added after the build are scanned exactly
+    tail, _ = add_synthetic_run(index, "tail", 50, seed=4)
+    assert index.stats()['ivf_rows'] == 12000
+
+    queries = clustered_vectors(20, seed=5)
+    recall = []
+    for query in queries:
+        exact = {hit['row'] for hit in index.search(query, k=10, exact=True)}
+        approximate = {hit['row'] for hit in index.search(query, k=10, nprobe=16)}
+        recall.append(len(exact & approximate) / 10)
+    assert np.mean(recall) > 0.9
+    assert index.search(tail[3], k=1)[0]['text'] == "tail original 3"
+
+
+def test_cluster_worst_groups_highest_drift_sentences(tmp_path):
+    index = VectorIndex(tmp_path, "fake-model")
+    _, drift = add_synthetic_run(index, "run", 400, seed=6)
+
+    worst = index.worst_rows(0.05)
+    assert len(worst) == 20
+    assert np.isclose(index.describe_rows(worst[:1])[0]['drift'], drift.max())
+
+    clusters = index.cluster_worst(fraction=0.05, clusters=4, examples=2)
+    assert sum(cluster['size'] for cluster in clusters) == 20
+    assert [c['mean_drift'] for c in clusters] == sorted((c['mean_drift'] for c in clusters), reverse=True)
+    example = clusters[0]['examples'][0]
+    assert example['final'] == example['text'].replace("original", "final")
+    assert min(c['mean_drift'] for c in clusters) >= np.quantile(drift, 0.9)
+
+
+def test_failed_add_leaves_no_trace_and_sentence_ids_are_kept(tmp_path):
+    index = VectorIndex(tmp_path, "fake-model")
+    vectors = clustered_vectors(4, seed=7)
+    with pytest.raises(sqlite3.Error):
+        # The texts insert fails after the vectors were written
+        index.add_run("broken", ["a", "b", "c", "d"], ["a", "b", "c", object()], vectors, vectors, [0.1] * 4)
+    assert len(index) == 0 and index.runs() == []
+
+    index.add_run("resumed", ["a", "b"], ["x", "y"], vectors[:2], vectors[2:], [0.1, 0.2], sentences=[5, 2])
+    reopened = VectorIndex(tmp_path, "fake-model")
+    assert len(reopened) == 4 and [run['name'] for run in reopened.runs()] == ["resumed"]
+    assert reopened.describe_rows([reopened.sentence_row("resumed", 5, "final")])[0]['text'] == "x"
+    assert reopened.search(vectors[1], k=1)[0]['sentence'] == 2
+
+    assert default_run_name() != default_run_name()
@@ -0,0 +1,69 @@
+import os
+import sys
+import json
+from pathlib import Path
+
+from claude_client import set_backend
+from fake_backend import FakeBackend
+from translation_cache import configure_cache
+from work_queue import WorkQueue, run_coordinator
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_expired_leases_are_retried_then_failed(tmp_path):
+    clock = FakeClock()
+    queue = WorkQueue(tmp_path / "queue.sqlite3", lease_seconds=10, max_attempts=2, clock=clock)
+    assert queue.enqueue(["a", "b", "c"]) == 3
+    assert queue.enqueue(["a", "b"]) == 2  # idempotent
+    queue.close_enqueue()
+
+    first = queue.lease("w1", limit=2)
+    assert [job.index for job in first] == [0, 1]
+    assert [job.index for job in queue.lease("w2", limit=5)] == [2]
+    assert queue.lease("w3") == []
+
+    # w1 dies; its leases expire and go to w3 on their second attempt
+    clock.now += 11
+    queue.complete(2, "C")
+    retried = queue.lease("w3", limit=5)
+    assert [(job.index, job.attempts) for job in retried] == [(0, 2), (1, 2)]
+
+    assert queue.complete(0, "A")
+    assert not queue.complete(0, "A late")  # first result wins
+    queue.fail(1, "w1", "stale worker")     # not w1's lease any more: ignored
+    queue.fail(1, "w3", "boom")             # out of attempts
+    assert queue.counts() == {'pending': 0, 'leased': 0, 'done': 2, 'failed': 1}
+    assert queue.is_drained()
+    assert list(queue.results()) == [(0, "a", "A"), (2, "c", "C")]
+    assert queue.failures() == [(1, "boom")]
+    queue.close()
+
+
+def test_local_worker_processes_drain_the_queue(tmp_path, monkeypatch):
+    # Workers are separate processes; they pick the fake backend up from the environment
+    monkeypatch.setenv("TURINGCHAIN_BACKEND", "fake")
+    monkeypatch.setenv("TURINGCHAIN_CACHE_MODE", "off")
+    monkeypatch.setenv("TURINGCHAIN_FAKE_LATENCY", "0.001")
+    monkeypatch.setenv("PYTHONPATH", os.pathsep.join([str(Path(__file__).resolve().parent)] + sys.path))
+    configure_cache(mode="off")
+    set_backend(FakeBackend(latency_median=0.001))
+    try:
+        results, metrics = run_coordinator("offline", num_sentences=30, queue_path=tmp_path / "queue.sqlite3",
+                                           workers=3, output_dir=tmp_path, evaluate=False, poll_interval=0.1)
+    finally:
+        set_backend(None)
+
+    assert metrics is None
+    assert len(results) == 30
+    assert all(original == final for original, final in results)
+    document = json.loads((tmp_path / "translation_results.json").read_text(encoding="utf-8"))
+    assert document['total_sentences'] == 30
+    assert [entry['index'] for entry in document['results']] == list(range(1, 31))
+
@@ -0,0 +1,265 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional
+
+
+DEFAULT_CACHE_PATH = Path(".turingchain_cache") / "translations.sqlite3"
+DEFAULT_MAX_ENTRIES = 200_000
+TOUCH_BATCH = 256
+
+# Cache modes:
+#   on      - read cached responses and store new ones (default)
+#   refresh - ignore cached responses but store the fresh ones
+#   bypass  - neither read nor write the cache
+CACHE_MODES = ("on", "refresh", "bypass")
+
+
+def make_cache_key(model: str, system_prompt: str, max_tokens: int, prompt: str) -> str:
+    """
+    Content-addressed key for one agent request.
+
+    Args:
+        model: Claude model identifier
+        system_prompt: The agent's system prompt
+        max_tokens: Maximum number of tokens in the response
+        prompt: The user message sent to the agent
+
+    Returns:
+        Hex SHA-256 digest identifying the request
+    """
+    payload = json.dumps([model, system_prompt, max_tokens, prompt], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TranslationCache:
+    """
+    Persistent SQLite (WAL) cache of agent responses with size-bounded LRU eviction.
+
+    Safe to share between threads; every access goes through one connection
+    guarded by a lock. Several processes may share the file: the entry count
+    lives in the database (kept by triggers) and eviction reads it inside the
+    same transaction as the write. Hits only queue their last-access time;
+    the queue is written in batches of TOUCH_BATCH, and before any eviction.
+    Hit/miss counters are kept per process.
+
+    Args:
+        path: SQLite database file
+        max_entries: LRU capacity
+        mode: One of CACHE_MODES
+        clock: Source of last-access times, replaceable in tests
+    """
+
+    def __init__(self, path: Path = DEFAULT_CACHE_PATH, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 mode: str = "on", clock: Callable[[], float] = time.time):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode '{mode}'. Expected one of: {', '.join(CACHE_MODES)}")
+
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._clock = clock
+        self._touched: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " response TEXT NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses(last_access)")
+        self._conn.execute("BEGIN IMMEDIATE")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS entry_count (entries INTEGER NOT NULL)")
+        if self._conn.execute("SELECT 1 FROM entry_count").fetchone() is None:
+            self._conn.execute("INSERT INTO entry_count SELECT COUNT(*) FROM responses")
+        self._conn.execute("CREATE TRIGGER IF NOT EXISTS responses_inserted AFTER INSERT ON responses "
+                           "BEGIN UPDATE entry_count SET entries = entries + 1; END")
+        self._conn.execute("CREATE TRIGGER IF NOT EXISTS responses_deleted AFTER DELETE ON responses "
+                           "BEGIN UPDATE entry_count SET entries = entries - 1; END")
+        self._conn.execute("COMMIT")
+
+    def _entries(self) -> int:
+        return self._conn.execute("SELECT entries FROM entry_count").fetchone()[0]
+
+    def get(self, model: str, system_prompt: str, max_tokens: int, prompt: str) -> Optional[str]:
+        """Return the cached response for a request, or None on a miss (or when not reading)."""
+        if self.mode != "on":
+            return None
+
+        key = make_cache_key(model, system_prompt, max_tokens, prompt)
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touched[key] = self._clock()
+            if len(self._touched) >= TOUCH_BATCH:
+                self._conn.execute("BEGIN IMMEDIATE")
+                self._flush_touched()
+                self._conn.execute("COMMIT")
+        return row[0]
+
+    def _flush_touched(self) -> None:
+        """Write the queued last-access times (inside the caller's transaction)."""
+        if self._touched:
+            self._conn.executemany("UPDATE responses SET last_access = ? WHERE key = ?",
+                                   [(accessed, key) for key, accessed in self._touched.items()])
+            self._touched.clear()
+
+    def put(self, model: str, system_prompt: str, max_tokens: int, prompt: str, response: str) -> None:
+        """Store a response, evicting the least recently used entries beyond max_entries."""
+        if self.mode == "bypass":
+            return
+
+        key = make_cache_key(model, system_prompt, max_tokens, prompt)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._touched.pop(key, None)
+                self._conn.execute(
+                    "INSERT INTO responses (key, response, last_access) VALUES (?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET response = excluded.response, last_access = excluded.last_access",
+                    (key, response, self._clock()),
+                )
+                # Counted in the database, so writes from other processes are included
+                excess = self._entries() - self.max_entries
+                if excess > 0:
+                    self._flush_touched()
+                    self._evict(excess)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            self.writes += 1
+
+    def _evict(self, count: int) -> None:
+        self._conn.execute(
+            "DELETE FROM responses WHERE key IN "
+            "(SELECT key FROM responses ORDER BY last_access ASC LIMIT ?)",
+            (count,),
+        )
+        self.evictions += count
+
+    def stats(self) -> Dict[str, float]:
+        """Counters for this process plus the number of stored entries."""
+        lookups = self.hits + self.misses
+        with self._lock:
+            entries = self._entries()
+        return {
+            'mode': self.mode,
+            'entries': entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'writes': self.writes,
+            'evictions': self.evictions,
+        }
+
+    def report(self) -> None:
+        """Print the cache counters."""
+        stats = self.stats()
+        print(f"Translation cache ({stats['mode']}): {stats['hits']} hits, {stats['misses']} misses "
+              f"({stats['hit_rate']:.1%} hit rate), {stats['entries']} entries, "
+              f"{stats['evictions']} evicted")
+
+    def clear(self) -> None:
+        """Delete every cached response."""
+        with self._lock:
+            self._touched.clear()
+            self._conn.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        """Write the queued last-access times and close the underlying database connection."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._flush_touched()
+            self._conn.execute("COMMIT")
+            self._conn.close()
+
+
+_default_cache: Optional[TranslationCache] = None
+_default_cache_disabled = False
+_default_lock = threading.RLock()
+
+
+def configure_cache(path: Optional[Path] = None, mode: Optional[str] = None,
+                    max_entries: Optional[int] = None) -> Optional[TranslationCache]:
+    """
+    (Re)build the process-wide translation cache.
+
+    Unset arguments fall back to TURINGCHAIN_CACHE_PATH, TURINGCHAIN_CACHE_MODE
+    and TURINGCHAIN_CACHE_MAX_ENTRIES, then to the module defaults. Mode "off"
+    disables caching entirely.
+
+    Args:
+        path: SQLite database file
+        mode: One of "on", "refresh", "bypass" or "off"
+        max_entries: LRU capacity
+
+    Returns:
+        The new cache, or None when caching is off
+    """
+    global _default_cache, _default_cache_disabled
+
+    path = path or Path(os.getenv("TURINGCHAIN_CACHE_PATH", str(DEFAULT_CACHE_PATH)))
+    mode = mode or os.getenv("TURINGCHAIN_CACHE_MODE", "on")
+    max_entries = max_entries or int(os.getenv("TURINGCHAIN_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+
+    with _default_lock:
+        if _default_cache is not None:
+            _default_cache.close()
+        if mode == "off":
+            _default_cache, _default_cache_disabled = None, True
+        else:
+            _default_cache, _default_cache_disabled = TranslationCache(path, max_entries, mode), False
+        return _default_cache
+
+
+def get_translation_cache() -> Optional[TranslationCache]:
+    """Return the process-wide translation cache, creating it from the environment on first use."""
+    if _default_cache is None and not _default_cache_disabled:
+        with _default_lock:
+            if _default_cache is None and not _default_cache_disabled:
+                configure_cache()
+    return _default_cache
+
+
+@contextmanager
+def cache_disabled() -> Iterator[None]:
+    """
+    Turn the process-wide cache off inside the block, then restore the previous one.
+
+    The previous cache (or its absence) is put back as it was, still open, so
+    a caller's own configure_cache() survives the block.
+    """
+    global _default_cache, _default_cache_disabled
+    with _default_lock:
+        previous = (_default_cache, _default_cache_disabled)
+        _default_cache, _default_cache_disabled = None, True
+    try:
+        yield
+    finally:
+        with _default_lock:
+            _default_cache, _default_cache_disabled = previous
+
+
+def report_translation_cache() -> None:
+    """Print the process-wide cache counters, if caching is enabled."""
+    cache = get_translation_cache()
+    if cache is not None:
+        cache.report()
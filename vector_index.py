@@ -0,0 +1,602 @@
+import os
+import json
+import time
+import sqlite3
+import argparse
+import threading
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+DEFAULT_INDEX_DIR = Path(".turingchain_cache") / "vector_index"
+INITIAL_CAPACITY = 4096
+BLOCK_ROWS = 65536
+IVF_MIN_ROWS = 20000
+IVF_SAMPLE = 100000
+DEFAULT_NPROBE = 8
+KINDS = ("original", "final")
+
+ROW_DTYPE = np.dtype([('run', '<i4'), ('sentence', '<i4'), ('kind', 'i1'), ('drift', '<f4')])
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows (zero rows stay zero), so dot products are cosine similarities."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def spherical_kmeans(vectors: np.ndarray, clusters: int, iterations: int = 10,
+                     seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    K-means on unit vectors with cosine similarity.
+
+    Args:
+        vectors: Normalized float32 rows
+        clusters: Number of centroids (at most len(vectors))
+        iterations: Lloyd iterations
+        seed: Seed of the initial centroid choice
+
+    Returns:
+        (centroids, assignment of each row)
+    """
+    rng = np.random.default_rng(seed)
+    clusters = max(1, min(clusters, len(vectors)))
+    centroids = vectors[rng.choice(len(vectors), clusters, replace=False)].copy()
+    assignment = np.zeros(len(vectors), dtype=np.int64)
+    for _ in range(iterations):
+        assignment = assign_to_centroids(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        empty = ~sums.any(axis=1)
+        # Re-seed empty clusters with random rows so every centroid stays in use
+        sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()))]
+        centroids = normalize_rows(sums)
+    return centroids, assign_to_centroids(vectors, centroids)
+
+
+def assign_to_centroids(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the most similar centroid for each row, computed block by block."""
+    assignment = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), BLOCK_ROWS):
+        assignment[start:start + BLOCK_ROWS] = np.argmax(vectors[start:start + BLOCK_ROWS] @ centroids.T, axis=1)
+    return assignment
+
+
+def _top_k(scores: np.ndarray, ids: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    if len(scores) > k:
+        keep = np.argpartition(-scores, k - 1)[:k]
+        scores, ids = scores[keep], ids[keep]
+    return scores, ids
+
+
+class VectorIndex:
+    """
+    Persisted nearest-neighbour index of original and round-trip embeddings across runs.
+
+    Layout of `directory`:
+    - vectors.npy: normalized float32 rows (capacity x dim), memory-mapped
+    - rows.npy:    run id, sentence index, kind (0 original / 1 final) and drift per row
+    - texts.sqlite3: sentence text of every row, plus the list of runs
+    - meta.json:   model, dimension and IVF state
+    - ivf_*.npy:   IVF centroids and the indexed rows regrouped by list
+
+    Queries scan the IVF lists closest to the query (`nprobe` of them) plus,
+    exactly, every row added since the IVF was built; below IVF_MIN_ROWS rows
+    everything is scanned exactly in blocks. The IVF is rebuilt automatically
+    once the unindexed tail grows past a quarter of the indexed rows.
+    One writer at a time; any number of readers.
+
+    A run's vectors are written past the committed rows first; the run and its
+    texts are then inserted in one SQLite transaction, and the row count is
+    read back from the committed texts. A run is therefore either fully
+    present or absent, even if the process dies halfway through add_run.
+
+    Args:
+        directory: Folder holding the index (one folder per embedding model)
+        model_name: Embedding model the vectors belong to
+    """
+
+    def __init__(self, directory: Path, model_name: str):
+        self.directory = Path(directory)
+        self.model_name = model_name
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._vectors: Optional[np.memmap] = None
+        self._rows: Optional[np.memmap] = None
+        self._count = 0
+        self._ivf_count = 0
+        self._ivf: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = None
+
+        self._conn = sqlite3.connect(str(self.directory / "texts.sqlite3"), check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS runs (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL, "
+                           "created REAL NOT NULL, sentences INTEGER NOT NULL)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS texts (row INTEGER PRIMARY KEY, run INTEGER NOT NULL, "
+                           "sentence INTEGER NOT NULL, kind INTEGER NOT NULL, text TEXT NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS texts_sentence ON texts(run, sentence, kind)")
+        self._load()
+
+    @property
+    def _meta_path(self) -> Path:
+        return self.directory / "meta.json"
+
+    def _load(self) -> None:
+        if not self._meta_path.exists():
+            return
+        with open(self._meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('model') != self.model_name:
+            raise ValueError(f"Vector index {self.directory} belongs to model '{meta.get('model')}', "
+                             f"not '{self.model_name}'")
+        self._count = self._conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM texts").fetchone()[0]
+        self._ivf_count = meta.get('ivf_count', 0)
+        self._vectors = np.load(self.directory / "vectors.npy", mmap_mode='r+')
+        self._rows = np.load(self.directory / "rows.npy", mmap_mode='r+')
+        if self._ivf_count:
+            self._ivf = tuple(np.load(self.directory / f"ivf_{name}.npy", mmap_mode='r')
+                              for name in ("centroids", "vectors", "rows", "offsets"))
+
+    def _write_meta(self) -> None:
+        tmp_path = self._meta_path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'model': self.model_name, 'dim': int(self._vectors.shape[1]), 'ivf_count': self._ivf_count}, f)
+        os.replace(tmp_path, self._meta_path)
+
+    def _ensure_capacity(self, needed: int, dim: int) -> None:
+        capacity = 0 if self._vectors is None else self._vectors.shape[0]
+        if needed <= capacity:
+            return
+        new_capacity = max(INITIAL_CAPACITY, capacity)
+        while new_capacity < needed:
+            new_capacity *= 2
+
+        vectors = np.lib.format.open_memmap(self.directory / "vectors.tmp.npy", mode='w+',
+                                            dtype=np.float32, shape=(new_capacity, dim))
+        rows = np.lib.format.open_memmap(self.directory / "rows.tmp.npy", mode='w+',
+                                         dtype=ROW_DTYPE, shape=(new_capacity,))
+        for start in range(0, self._count, BLOCK_ROWS):
+            end = min(self._count, start + BLOCK_ROWS)
+            vectors[start:end] = self._vectors[start:end]
+            rows[start:end] = self._rows[start:end]
+        vectors.flush()
+        rows.flush()
+        del vectors, rows
+        self._vectors = self._rows = None
+
+        os.replace(self.directory / "vectors.tmp.npy", self.directory / "vectors.npy")
+        os.replace(self.directory / "rows.tmp.npy", self.directory / "rows.npy")
+        self._vectors = np.load(self.directory / "vectors.npy", mmap_mode='r+')
+        self._rows = np.load(self.directory / "rows.npy", mmap_mode='r+')
+        self._write_meta()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def runs(self) -> List[Dict]:
+        """Every indexed run: id, name, creation time and sentence count."""
+        rows = self._conn.execute("SELECT id, name, created, sentences FROM runs ORDER BY id").fetchall()
+        return [{'id': row[0], 'name': row[1], 'created': row[2], 'sentences': row[3]} for row in rows]
+
+    def _run_id(self, name: str) -> int:
+        row = self._conn.execute("SELECT id FROM runs WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            raise KeyError(f"No run named '{name}' in the vector index")
+        return row[0]
+
+    def add_run(self, name: str, originals: Sequence[str], finals: Sequence[str],
+                original_vectors: np.ndarray, final_vectors: np.ndarray, distances: Sequence[float],
+                sentences: Optional[Sequence[int]] = None) -> int:
+        """
+        Append one run: every sentence's original and round-trip embedding with its drift.
+
+        Args:
+            name: Unique run name
+            originals: Original sentences
+            finals: Round-trip sentences, aligned with originals
+            original_vectors: Embeddings of originals
+            final_vectors: Embeddings of finals
+            distances: Cosine distance (drift) per sentence
+            sentences: Sentence index of each pair within the run (default: 0, 1, 2, ...)
+
+        Returns:
+            The run's id
+        """
+        n = len(originals)
+        sentences = np.arange(n) if sentences is None else np.asarray(sentences, dtype=np.int64)
+        if not (len(finals) == len(original_vectors) == len(final_vectors) == len(distances) == len(sentences) == n):
+            raise ValueError("originals, finals, embeddings, distances and sentences must have the same length")
+
+        with self._lock:
+            start = self._count
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                cursor = self._conn.execute("INSERT INTO runs (name, created, sentences) VALUES (?, ?, ?)",
+                                            (name, time.time(), n))
+                run_id = cursor.lastrowid
+                if n:
+                    # Rows past the committed count are invisible until the texts below commit
+                    vectors = normalize_rows(np.concatenate([original_vectors, final_vectors]))
+                    self._ensure_capacity(start + 2 * n, vectors.shape[1])
+                    rows = np.empty(2 * n, dtype=ROW_DTYPE)
+                    rows['run'] = run_id
+                    rows['sentence'] = np.tile(sentences, 2)
+                    rows['kind'] = np.repeat([0, 1], n)
+                    rows['drift'] = np.tile(np.asarray(distances, dtype=np.float32), 2)
+                    self._vectors[start:start + 2 * n] = vectors
+                    self._rows[start:start + 2 * n] = rows
+                    self._vectors.flush()
+                    self._rows.flush()
+
+                    texts = [(start + offset, run_id, int(sentences[offset % n]), offset // n, text)
+                             for offset, text in enumerate(list(originals) + list(finals))]
+                    self._conn.executemany("INSERT INTO texts (row, run, sentence, kind, text) VALUES (?, ?, ?, ?, ?)",
+                                           texts)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            self._count = start + 2 * n
+
+        if self._count >= IVF_MIN_ROWS and self._count - self._ivf_count > max(self._ivf_count // 4, 1):
+            self.build_ivf()
+        return run_id
+
+    def build_ivf(self, lists: Optional[int] = None, iterations: int = 10, seed: int = 0) -> int:
+        """
+        (Re)build the IVF over every stored row.
+
+        Centroids are trained with spherical k-means on a sample of at most
+        IVF_SAMPLE rows; all rows are then assigned and copied, grouped by list,
+        so a probed list is one contiguous read.
+
+        Args:
+            lists: Number of IVF lists (default: about sqrt of the row count)
+            iterations: k-means iterations
+            seed: Sampling and initialization seed
+
+        Returns:
+            Number of lists
+        """
+        with self._lock:
+            count = self._count
+            if count == 0:
+                return 0
+            lists = lists or max(1, int(np.sqrt(count)))
+            rng = np.random.default_rng(seed)
+            sample = np.sort(rng.choice(count, min(count, IVF_SAMPLE), replace=False))
+            centroids, _ = spherical_kmeans(np.asarray(self._vectors[sample]), lists, iterations, seed)
+            assignment = assign_to_centroids(self._vectors[:count], centroids)
+            order = np.argsort(assignment, kind="stable")
+            offsets = np.searchsorted(assignment[order], np.arange(len(centroids) + 1))
+
+            grouped = np.lib.format.open_memmap(self.directory / "ivf_vectors.tmp.npy", mode='w+',
+                                                dtype=np.float32, shape=(count, self._vectors.shape[1]))
+            for start in range(0, count, BLOCK_ROWS):
+                grouped[start:start + BLOCK_ROWS] = self._vectors[order[start:start + BLOCK_ROWS]]
+            grouped.flush()
+            del grouped
+            self._ivf = None
+            os.replace(self.directory / "ivf_vectors.tmp.npy", self.directory / "ivf_vectors.npy")
+            np.save(self.directory / "ivf_centroids.npy", centroids)
+            np.save(self.directory / "ivf_rows.npy", order.astype(np.int64))
+            np.save(self.directory / "ivf_offsets.npy", offsets.astype(np.int64))
+            self._ivf_count = count
+            self._write_meta()
+            self._ivf = tuple(np.load(self.directory / f"ivf_{name}.npy", mmap_mode='r')
+                              for name in ("centroids", "vectors", "rows", "offsets"))
+            return len(centroids)
+
+    def _scan_exact(self, query: np.ndarray, start: int, end: int, k: int,
+                    allowed) -> Tuple[np.ndarray, np.ndarray]:
+        best_scores, best_ids = np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+        for block_start in range(start, end, BLOCK_ROWS):
+            block_end = min(end, block_start + BLOCK_ROWS)
+            ids = np.arange(block_start, block_end)
+            scores = self._vectors[block_start:block_end] @ query
+            mask = allowed(self._rows[block_start:block_end])
+            scores, ids = _top_k(scores[mask], ids[mask], k)
+            best_scores, best_ids = _top_k(np.concatenate([best_scores, scores]),
+                                           np.concatenate([best_ids, ids]), k)
+        return best_scores, best_ids
+
+    def _scan_ivf(self, query: np.ndarray, k: int, nprobe: int, allowed) -> Tuple[np.ndarray, np.ndarray]:
+        centroids, grouped, row_ids, offsets = self._ivf
+        probes = np.argsort(-(centroids @ query))[:nprobe]
+        best_scores, best_ids = np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+        for probe in probes:
+            start, end = offsets[probe], offsets[probe + 1]
+            if start == end:
+                continue
+            ids = np.asarray(row_ids[start:end])
+            scores = grouped[start:end] @ query
+            mask = allowed(self._rows[ids])
+            scores, ids = _top_k(scores[mask], ids[mask], k)
+            best_scores, best_ids = _top_k(np.concatenate([best_scores, scores]),
+                                           np.concatenate([best_ids, ids]), k)
+        return best_scores, best_ids
+
+    def search(self, query: np.ndarray, k: int = 10, kind: Optional[str] = "original",
+               exclude_rows: Sequence[int] = (), nprobe: int = DEFAULT_NPROBE, exact: bool = False) -> List[Dict]:
+        """
+        The k stored sentences most similar to an embedding.
+
+        Args:
+            query: Embedding vector (normalized internally)
+            k: Number of hits
+            kind: "original", "final" or None for both
+            exclude_rows: Row ids to leave out (e.g. the query sentence itself)
+            nprobe: IVF lists scanned (more = higher recall, slower)
+            exact: Scan every row even when an IVF exists
+
+        Returns:
+            Hits sorted by decreasing similarity (see describe_rows)
+        """
+        query = normalize_rows(np.asarray(query, dtype=np.float32)[None, :])[0]
+        excluded = np.asarray(list(exclude_rows), dtype=np.int64)
+        wanted = None if kind is None else KINDS.index(kind)
+
+        def allowed(rows: np.ndarray) -> np.ndarray:
+            return np.ones(len(rows), dtype=bool) if wanted is None else rows['kind'] == wanted
+
+        fetch = k + len(excluded)
+        with self._lock:
+            if self._ivf is not None and not exact:
+                ivf_scores, ivf_ids = self._scan_ivf(query, fetch, nprobe, allowed)
+                tail_scores, tail_ids = self._scan_exact(query, self._ivf_count, self._count, fetch, allowed)
+                scores, ids = np.concatenate([ivf_scores, tail_scores]), np.concatenate([ivf_ids, tail_ids])
+            else:
+                scores, ids = self._scan_exact(query, 0, self._count, fetch, allowed)
+
+        keep = ~np.isin(ids, excluded)
+        scores, ids = scores[keep], ids[keep]
+        order = np.argsort(-scores)[:k]
+        hits = self.describe_rows(ids[order])
+        for hit, score in zip(hits, scores[order]):
+            hit['similarity'] = float(score)
+        return hits
+
+    def describe_rows(self, row_ids: Sequence[int]) -> List[Dict]:
+        """Run name, sentence index, kind, drift and text of stored rows."""
+        row_ids = [int(row) for row in row_ids]
+        if not row_ids:
+            return []
+        names = {run['id']: run['name'] for run in self.runs()}
+        placeholders = ",".join("?" * len(row_ids))
+        texts = dict(self._conn.execute(f"SELECT row, text FROM texts WHERE row IN ({placeholders})", row_ids))
+        rows = self._rows[np.asarray(row_ids)]
+        return [{'row': row_id, 'run': names.get(int(row['run'])), 'sentence': int(row['sentence']),
+                 'kind': KINDS[int(row['kind'])], 'drift': float(row['drift']), 'text': texts.get(row_id)}
+                for row_id, row in zip(row_ids, rows)]
+
+    def sentence_row(self, run: str, sentence: int, kind: str = "original") -> int:
+        """Row id of one sentence of a run."""
+        row = self._conn.execute("SELECT row FROM texts WHERE run = ? AND sentence = ? AND kind = ?",
+                                 (self._run_id(run), sentence, KINDS.index(kind))).fetchone()
+        if row is None:
+            raise KeyError(f"Run '{run}' has no sentence {sentence}")
+        return row[0]
+
+    def similar_to(self, run: str, sentence: int, k: int = 10, kind: Optional[str] = "original",
+                   **search_options) -> List[Dict]:
+        """
+        The k sentences across all runs most similar to one stored sentence (itself excluded).
+
+        Args:
+            run: Run name of the query sentence
+            sentence: Its 0-based index within the run
+            k: Number of hits
+            kind: Kind of rows searched ("original", "final" or None)
+            **search_options: nprobe / exact, as for search()
+        """
+        row = self.sentence_row(run, sentence)
+        return self.search(np.asarray(self._vectors[row]), k, kind, exclude_rows=[row], **search_options)
+
+    def worst_rows(self, fraction: float = 0.05, run: Optional[str] = None) -> np.ndarray:
+        """Row ids of the originals in the top `fraction` of drift (of one run, or of all runs)."""
+        run_id = self._run_id(run) if run is not None else None
+        chunks = []
+        for start in range(0, self._count, BLOCK_ROWS):
+            rows = self._rows[start:min(self._count, start + BLOCK_ROWS)]
+            mask = rows['kind'] == 0
+            if run_id is not None:
+                mask &= rows['run'] == run_id
+            chunks.append((np.nonzero(mask)[0] + start, rows['drift'][mask]))
+        if not chunks:
+            return np.empty(0, dtype=np.int64)
+        ids = np.concatenate([ids for ids, _ in chunks])
+        drifts = np.concatenate([drifts for _, drifts in chunks])
+        if len(ids) == 0:
+            return ids
+        keep = max(1, int(round(fraction * len(ids))))
+        worst = np.argpartition(-drifts, keep - 1)[:keep]
+        return ids[worst[np.argsort(-drifts[worst])]]
+
+    def cluster_worst(self, fraction: float = 0.05, clusters: int = 8, run: Optional[str] = None,
+                      examples: int = 3, seed: int = 0) -> List[Dict]:
+        """
+        Group the highest-drift sentences by meaning to see which kinds of sentences drift.
+
+        Args:
+            fraction: Share of originals (by drift) to cluster
+            clusters: Number of clusters
+            run: Restrict to one run (default: all runs)
+            examples: Sentences shown per cluster (closest to its centroid)
+            seed: k-means seed
+
+        Returns:
+            Clusters sorted by mean drift, each with size, mean/max drift and
+            example sentences (original and round-trip text)
+        """
+        row_ids = self.worst_rows(fraction, run)
+        if len(row_ids) == 0:
+            return []
+        row_ids = np.sort(row_ids)
+        vectors = np.asarray(self._vectors[row_ids])
+        centroids, assignment = spherical_kmeans(vectors, clusters, seed=seed)
+        drifts = self._rows['drift'][row_ids]
+
+        result = []
+        for cluster in range(len(centroids)):
+            members = np.nonzero(assignment == cluster)[0]
+            if len(members) == 0:
+                continue
+            closest = members[np.argsort(-(vectors[members] @ centroids[cluster]))[:examples]]
+            shown = self.describe_rows(row_ids[closest])
+            for hit in shown:
+                final = self._conn.execute("SELECT text FROM texts WHERE run = (SELECT run FROM texts WHERE row = ?) "
+                                           "AND sentence = ? AND kind = 1", (hit['row'], hit['sentence'])).fetchone()
+                hit['final'] = final[0] if final else None
+            result.append({'size': int(len(members)), 'mean_drift': float(drifts[members].mean()),
+                           'max_drift': float(drifts[members].max()), 'examples': shown})
+        return sorted(result, key=lambda cluster: -cluster['mean_drift'])
+
+    def stats(self) -> Dict:
+        """Rows, runs and IVF coverage."""
+        return {
+            'model': self.model_name,
+            'rows': self._count,
+            'runs': len(self.runs()),
+            'ivf_rows': self._ivf_count,
+            'ivf_lists': 0 if self._ivf is None else int(len(self._ivf[0])),
+        }
+
+    def close(self) -> None:
+        """Close the text database."""
+        self._conn.close()
+
+
+_index: Optional[VectorIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_vector_index() -> VectorIndex:
+    """
+    Return the process-wide vector index of the current embedding model and backend.
+
+    TURINGCHAIN_VECTOR_INDEX sets the parent directory.
+    """
+    from embedding_store import embedding_model_id
+
+    global _index
+    model = embedding_model_id()
+    if _index is None or _index.model_name != model:
+        with _index_lock:
+            if _index is None or _index.model_name != model:
+                location = Path(os.getenv("TURINGCHAIN_VECTOR_INDEX", str(DEFAULT_INDEX_DIR)))
+                _index = VectorIndex(location / model, model)
+    return _index
+
+
+def default_run_name() -> str:
+    """Timestamped run name with a random suffix, e.g. 'run-20240501-142233-3f9a1c2b'."""
+    return f"{time.strftime('run-%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+
+def index_run(translation_results: Sequence[Tuple[str, str]], distances: Sequence[float],
+              run_name: Optional[str] = None, index: Optional[VectorIndex] = None,
+              sentences: Optional[Sequence[int]] = None) -> str:
+    """
+    Add a finished run to the vector index.
+
+    Embeddings come from encode_sentences, so sentences the evaluation just
+    embedded are served from the embedding cache rather than re-encoded.
+
+    Args:
+        translation_results: (original, final) pairs
+        distances: Cosine distance per pair
+        run_name: Unique name (default: timestamp plus random suffix)
+        index: Target index (default: get_vector_index())
+        sentences: Sentence index of each pair in the run (default: position)
+
+    Returns:
+        The run name
+    """
+    from embedding_store import encode_sentences
+
+    index = index or get_vector_index()
+    run_name = run_name or default_run_name()
+    originals = [original for original, _ in translation_results]
+    finals = [final for _, final in translation_results]
+    index.add_run(run_name, originals, finals, encode_sentences(originals), encode_sentences(finals), distances,
+                  sentences)
+    print(f"✓ Run '{run_name}' added to the vector index ({len(index)} vectors)")
+    return run_name
+
+
+def _print_hits(hits: List[Dict]) -> None:
+    for hit in hits:
+        print(f"  {hit['similarity']:.3f}  drift {hit['drift']:.3f}  [{hit['run']} #{hit['sentence']}] {hit['text']}")
+
+
+def main(argv: Optional[List[str]] = None):
+    """Command-line entry point: add runs and query the drift index."""
+    parser = argparse.ArgumentParser(description="Nearest-neighbour drift analytics over past runs")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    add = subparsers.add_parser("add", help="Index a translation_results.json file")
+    add.add_argument("results", type=Path)
+    add.add_argument("--name", default=None, help="Run name (default: timestamp)")
+
+    similar = subparsers.add_parser("similar", help="Top-k sentences most similar to a stored sentence")
+    similar.add_argument("--run", required=True)
+    similar.add_argument("--sentence", type=int, required=True, help="0-based sentence index in the run")
+    similar.add_argument("-k", type=int, default=10)
+
+    query = subparsers.add_parser("query", help="Top-k stored sentences most similar to a text")
+    query.add_argument("text")
+    query.add_argument("-k", type=int, default=10)
+
+    worst = subparsers.add_parser("worst", help="Cluster the highest-drift sentences")
+    worst.add_argument("--fraction", type=float, default=0.05)
+    worst.add_argument("--clusters", type=int, default=8)
+    worst.add_argument("--run", default=None, help="Restrict to one run")
+
+    subparsers.add_parser("build", help="Rebuild the IVF index")
+    subparsers.add_parser("stats", help="Rows, runs and IVF coverage")
+    args = parser.parse_args(argv)
+
+    index = get_vector_index()
+    if args.command == "add":
+        with open(args.results, 'r', encoding='utf-8') as f:
+            results = json.load(f)['results']
+        pairs = [(result['original'], result['final_translated']) for result in results]
+        distances = [result.get('cosine_distance') for result in results]
+        if any(distance is None for distance in distances):
+            from streaming_evaluation import cosine_distances
+            from embedding_store import encode_sentences
+            distances = cosine_distances(encode_sentences([p[0] for p in pairs]), encode_sentences([p[1] for p in pairs]))
+        return index_run(pairs, distances, args.name, index)
+    if args.command == "similar":
+        hits = index.similar_to(args.run, args.sentence, args.k)
+        _print_hits(hits)
+        return hits
+    if args.command == "query":
+        from embedding_store import encode_sentences
+        hits = index.search(encode_sentences([args.text])[0], args.k)
+        _print_hits(hits)
+        return hits
+    if args.command == "worst":
+        clusters = index.cluster_worst(args.fraction, args.clusters, args.run)
+        for number, cluster in enumerate(clusters, start=1):
+            print(f"Cluster {number}: {cluster['size']} sentences, mean drift {cluster['mean_drift']:.3f}, "
+                  f"max {cluster['max_drift']:.3f}")
+            for example in cluster['examples']:
+                print(f"  {example['text']}  →  {example['final']}")
+        return clusters
+    if args.command == "build":
+        lists = index.build_ivf()
+        print(f"✓ IVF rebuilt: {lists} lists over {len(index)} vectors")
+        return lists
+    stats = index.stats()
+    print(json.dumps(stats, indent=2))
+    return stats
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,419 @@
+import os
+import sys
+import time
+import uuid
+import socket
+import sqlite3
+import argparse
+import threading
+import subprocess
+from pathlib import Path
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+
+DEFAULT_QUEUE_PATH = Path(".turingchain_cache") / "work_queue.sqlite3"
+DEFAULT_LEASE_SECONDS = 120.0
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_LEASE_BATCH = 4
+DEFAULT_POLL_INTERVAL = 0.2
+
+
+@dataclass
+class Job:
+    """
+    One leased sentence.
+
+    Attributes:
+        index: Position of the sentence in the corpus (0-based); also the job id
+        original: Original English sentence
+        attempts: Leases taken on this job so far, including the current one
+    """
+    index: int
+    original: str
+    attempts: int
+
+
+class WorkQueue:
+    """
+    Durable SQLite queue of sentences to translate, shared by any number of worker processes.
+
+    Workers lease jobs for `lease_seconds`; a job whose lease expires (its
+    worker crashed or hung) becomes available again, up to `max_attempts`
+    leases, after which it is marked failed. The first result written for a
+    job wins, so a slow worker finishing after its lease expired does no harm.
+
+    By default the database uses WAL, which is safe for processes on one host.
+    For workers on several hosts sharing the file, pass wal=False (rollback
+    journal) and keep it on a filesystem with working POSIX locks.
+
+    Args:
+        path: Database file
+        lease_seconds: How long a lease is held before the job can be retried
+        max_attempts: Leases per job before it is marked failed
+        wal: Use write-ahead logging (single host only)
+        clock: Wall-clock function (shared across hosts), replaceable in tests
+    """
+
+    def __init__(self, path: Path = DEFAULT_QUEUE_PATH, lease_seconds: float = DEFAULT_LEASE_SECONDS,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS, wal: bool = True,
+                 clock: Callable[[], float] = time.time):
+        self.path = Path(path)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=30.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute(f"PRAGMA journal_mode={'WAL' if wal else 'DELETE'}")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id INTEGER PRIMARY KEY,"
+            " original TEXT NOT NULL,"
+            " status TEXT NOT NULL DEFAULT 'pending',"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " lease_owner TEXT,"
+            " lease_expires REAL,"
+            " result TEXT,"
+            " error TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status, lease_expires)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    def _transaction(self, work: Callable[[sqlite3.Connection], object]):
+        # BEGIN IMMEDIATE takes the write lock up front, so two workers can
+        # never select and lease the same job
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = work(self._conn)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    def enqueue(self, sentences: Iterable[str], start_index: int = 0, chunk_size: int = 100) -> int:
+        """
+        Add sentences as pending jobs, committing every `chunk_size` so workers can start early.
+
+        Indices already in the queue are left untouched, so re-enqueueing is idempotent.
+
+        Args:
+            sentences: Sentences in corpus order
+            start_index: Index of the first sentence
+            chunk_size: Sentences per transaction
+
+        Returns:
+            Number of sentences consumed from the iterable
+        """
+        chunk: List[Tuple[int, str]] = []
+        count = 0
+
+        def flush(conn: sqlite3.Connection) -> None:
+            conn.executemany("INSERT OR IGNORE INTO jobs (id, original) VALUES (?, ?)", chunk)
+
+        for count, sentence in enumerate(sentences, start=1):
+            chunk.append((start_index + count - 1, sentence))
+            if len(chunk) >= chunk_size:
+                self._transaction(flush)
+                chunk = []
+        if chunk:
+            self._transaction(flush)
+        return count
+
+    def close_enqueue(self) -> None:
+        """Declare that no more jobs will be added; idle workers then exit once the queue drains."""
+        self._transaction(lambda conn: conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('closed', '1')"))
+
+    def is_closed(self) -> bool:
+        """True once close_enqueue() was called."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'closed'").fetchone()
+        return row is not None
+
+    def lease(self, worker_id: str, limit: int = 1) -> List[Job]:
+        """
+        Lease up to `limit` pending or expired jobs, lowest index first.
+
+        Expired jobs that already used all their attempts are marked failed instead.
+
+        Args:
+            worker_id: Identifier of the leasing worker
+            limit: Maximum number of jobs to lease
+
+        Returns:
+            The leased jobs (empty if none is available right now)
+        """
+        def work(conn: sqlite3.Connection) -> List[Job]:
+            now = self._clock()
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = COALESCE(error, 'lease expired') "
+                "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?", (now, self.max_attempts))
+            rows = conn.execute(
+                "SELECT id, original, attempts FROM jobs "
+                "WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?) "
+                "ORDER BY id LIMIT ?", (now, limit)).fetchall()
+            conn.executemany(
+                "UPDATE jobs SET status = 'leased', attempts = attempts + 1, lease_owner = ?, lease_expires = ? "
+                "WHERE id = ?", [(worker_id, now + self.lease_seconds, row[0]) for row in rows])
+            return [Job(row[0], row[1], row[2] + 1) for row in rows]
+
+        return self._transaction(work)
+
+    def complete(self, index: int, result: str) -> bool:
+        """
+        Store a job's final translation.
+
+        Returns:
+            True if this was the first result for the job, False if it was already done
+        """
+        cursor = self._transaction(lambda conn: conn.execute(
+            "UPDATE jobs SET status = 'done', result = ?, error = NULL, lease_owner = NULL, lease_expires = NULL "
+            "WHERE id = ? AND status != 'done'", (result, index)))
+        return cursor.rowcount == 1
+
+    def fail(self, index: int, worker_id: str, error: str) -> None:
+        """
+        Give a leased job back after an error: pending again, or failed once out of attempts.
+
+        Ignored if the lease has meanwhile passed to another worker.
+        """
+        self._transaction(lambda conn: conn.execute(
+            "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "error = ?, lease_owner = NULL, lease_expires = NULL "
+            "WHERE id = ? AND status = 'leased' AND lease_owner = ?", (self.max_attempts, error, index, worker_id)))
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per status (pending, leased, done, failed)."""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {'pending': 0, 'leased': 0, 'done': 0, 'failed': 0}
+        counts.update(dict(rows))
+        return counts
+
+    def is_drained(self) -> bool:
+        """True when enqueueing is closed and every job is done or failed."""
+        counts = self.counts()
+        return self.is_closed() and counts['pending'] == 0 and counts['leased'] == 0
+
+    def results(self) -> Iterator[Tuple[int, str, str]]:
+        """(index, original, final) of every completed job, in corpus order."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, original, result FROM jobs WHERE status = 'done' ORDER BY id").fetchall()
+        return iter(rows)
+
+    def failures(self) -> List[Tuple[int, str]]:
+        """(index, last error) of every job that ran out of attempts."""
+        with self._lock:
+            return self._conn.execute("SELECT id, error FROM jobs WHERE status = 'failed' ORDER BY id").fetchall()
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+def run_worker(queue_path: Path, api_key: str, worker_id: Optional[str] = None,
+               batch: int = DEFAULT_LEASE_BATCH, lease_seconds: float = DEFAULT_LEASE_SECONDS,
+               poll_interval: float = DEFAULT_POLL_INTERVAL, wal: bool = True) -> Dict[str, int]:
+    """
+    Lease sentences, run them through the three translator agents and store the results.
+
+    Runs until the queue is closed and drained. Failed sentences are handed
+    back for another worker (or a later attempt) to retry.
+
+    Args:
+        queue_path: Queue database shared with the coordinator
+        api_key: Claude API key
+        worker_id: Identifier used for leases (default: host:pid:random)
+        batch: Jobs leased at a time
+        lease_seconds: Lease duration; keep it well above a round trip's latency
+        poll_interval: Sleep between polls when no job is available
+        wal: Must match the coordinator's setting
+
+    Returns:
+        Counters: completed, duplicates (results that lost the race), errors
+    """
+    from orchestrator import chained_round_trip
+
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+    queue = WorkQueue(queue_path, lease_seconds=lease_seconds, wal=wal)
+    stats = {'completed': 0, 'duplicates': 0, 'errors': 0}
+
+    try:
+        while True:
+            jobs = queue.lease(worker_id, batch)
+            if not jobs:
+                if queue.is_drained():
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            for job in jobs:
+                try:
+                    final = chained_round_trip(job.original, api_key)
+                except Exception as e:
+                    print(f"[{worker_id}] ERROR on sentence {job.index + 1} (attempt {job.attempts}): {str(e)}")
+                    queue.fail(job.index, worker_id, str(e))
+                    stats['errors'] += 1
+                    continue
+                if queue.complete(job.index, final):
+                    stats['completed'] += 1
+                else:
+                    stats['duplicates'] += 1
+    finally:
+        queue.close()
+
+    print(f"[{worker_id}] Worker finished: {stats['completed']} completed, "
+          f"{stats['errors']} errors, {stats['duplicates']} duplicates")
+    return stats
+
+
+def spawn_local_workers(queue_path: Path, count: int, api_key: str, lease_seconds: float = DEFAULT_LEASE_SECONDS,
+                        wal: bool = True) -> List[subprocess.Popen]:
+    """Start `count` worker processes on this host (they inherit the environment plus the API key)."""
+    command = [sys.executable, str(Path(__file__).resolve()), "worker", "--queue", str(queue_path),
+               "--lease-seconds", str(lease_seconds)]
+    if not wal:
+        command.append("--no-wal")
+    env = {**os.environ, "ANTHROPIC_API_KEY": api_key}
+    return [subprocess.Popen(command, env=env) for _ in range(count)]
+
+
+def run_coordinator(api_key: str, num_sentences: int = 100, queue_path: Path = DEFAULT_QUEUE_PATH,
+                    workers: int = 4, output_dir: Path = Path("Insights"), evaluate: bool = True,
+                    lease_seconds: float = DEFAULT_LEASE_SECONDS, wal: bool = True,
+                    poll_interval: float = 1.0):
+    """
+    Generate the corpus into the queue, wait for the workers, then merge and evaluate.
+
+    Sentences are enqueued as they are generated, so workers start translating
+    before generation ends. `workers` local worker processes are started; more
+    can join from other hosts by running `python work_queue.py worker --queue PATH`.
+    An existing queue at `queue_path` is resumed: sentences already enqueued are kept.
+
+    Args:
+        api_key: Claude API key
+        num_sentences: Corpus size
+        queue_path: Queue database shared with the workers
+        workers: Local worker processes to start (0 = rely on external workers)
+        output_dir: Where the merged results are written
+        evaluate: Run evaluate_translation_quality on the merged results
+        lease_seconds: Lease duration passed to the local workers
+        wal: Use write-ahead logging (single host only)
+        poll_interval: Seconds between progress checks
+
+    Returns:
+        (translation_results, evaluation_metrics or None)
+    """
+    from agent_sentences_creator import sentences_creator
+    from orchestrator import report_throughput
+    from result_stream import ResultStreamWriter, build_artifacts_from_stream, read_results
+    from columnar_results import COLUMNS_DIR_NAME, build_columns_from_stream
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    queue = WorkQueue(queue_path, lease_seconds=lease_seconds, wal=wal)
+
+    print("=" * 70)
+    print("DISTRIBUTED TRANSLATION PIPELINE (coordinator)")
+    print("=" * 70)
+    print(f"Queue: {Path(queue_path).absolute()}")
+    print(f"Local workers: {workers}\n")
+
+    start_time = time.perf_counter()
+    processes = spawn_local_workers(queue_path, workers, api_key, lease_seconds, wal)
+    try:
+        already = sum(queue.counts().values())
+        if already < num_sentences:
+            queue.enqueue(sentences_creator(api_key, count=num_sentences - already), start_index=already)
+        queue.close_enqueue()
+        print(f"✓ {num_sentences} sentences enqueued")
+
+        while not queue.is_drained():
+            counts = queue.counts()
+            print(f"Progress: {counts['done']} done, {counts['leased']} leased, "
+                  f"{counts['pending']} pending, {counts['failed']} failed")
+            if processes and all(process.poll() is not None for process in processes):
+                codes = ", ".join(str(process.returncode) for process in processes)
+                raise RuntimeError(f"All local workers exited (codes {codes}) before the queue drained; "
+                                   f"rerun the coordinator to resume")
+            time.sleep(poll_interval)
+    finally:
+        for process in processes:
+            process.wait()
+
+    counts = queue.counts()
+    print(f"\n✓ Queue drained: {counts['done']} done, {counts['failed']} failed")
+    for index, error in queue.failures():
+        print(f"  Sentence {index + 1} failed: {error}")
+    report_throughput(counts['done'], time.perf_counter() - start_time)
+
+    # Merge into the same artifacts the single-process pipeline writes; failed
+    # sentences are left out, so results are renumbered to line up with the distances
+    stream_file = output_dir / 'translation_results.jsonl'
+    with ResultStreamWriter(stream_file, fresh=True) as writer:
+        for position, (_, original, final) in enumerate(queue.results()):
+            writer.write(position, original, final)
+    queue.close()
+
+    translation_results = read_results(stream_file)
+    evaluation_metrics = None
+    distances = None
+    if evaluate and translation_results:
+        from agent_evaluation import evaluate_translation_quality
+        evaluation_metrics = evaluate_translation_quality(translation_results)
+        distances = dict(enumerate(evaluation_metrics['distances']))
+        evaluation_metrics['figure'].savefig(output_dir / 'evaluation_plot.png', dpi=300,
+                                             bbox_inches='tight', facecolor='white')
+    build_artifacts_from_stream(stream_file, output_dir / 'translation_results.json',
+                                output_dir / 'translation_results.csv', distances)
+    print(f"✓ Merged results saved: {output_dir / 'translation_results.json'}")
+    build_columns_from_stream(stream_file, output_dir / COLUMNS_DIR_NAME, distances)
+
+    return translation_results, evaluation_metrics
+
+
+def main(argv: Optional[List[str]] = None):
+    """Command-line entry point: `coordinator` or `worker`."""
+    parser = argparse.ArgumentParser(description="Distributed translation over a shared SQLite work queue")
+    subparsers = parser.add_subparsers(dest="role", required=True)
+
+    coordinator = subparsers.add_parser("coordinator", help="Generate, enqueue, wait, merge and evaluate")
+    coordinator.add_argument("-n", "--sentences", type=int, default=100)
+    coordinator.add_argument("--workers", type=int, default=4, help="Local worker processes to start")
+    coordinator.add_argument("-o", "--output-dir", type=Path, default=Path("Insights"))
+    coordinator.add_argument("--no-eval", action="store_true", help="Skip embedding evaluation")
+
+    worker = subparsers.add_parser("worker", help="Lease and translate sentences until the queue drains")
+    worker.add_argument("--batch", type=int, default=DEFAULT_LEASE_BATCH, help="Jobs leased at a time")
+
+    for sub in (coordinator, worker):
+        sub.add_argument("--queue", type=Path, default=DEFAULT_QUEUE_PATH, help="Shared queue database")
+        sub.add_argument("--lease-seconds", type=float, default=DEFAULT_LEASE_SECONDS)
+        sub.add_argument("--no-wal", action="store_true",
+                         help="Rollback journal instead of WAL (required when hosts share the file)")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    api_key = os.getenv("ANTHROPIC_API_KEY")
+    if not api_key:
+        print("Error: ANTHROPIC_API_KEY not found in environment variables")
+        return
+
+    if args.role == "worker":
+        return run_worker(args.queue, api_key, batch=args.batch, lease_seconds=args.lease_seconds,
+                          wal=not args.no_wal)
+    return run_coordinator(api_key, args.sentences, args.queue, args.workers, args.output_dir,
+                           evaluate=not args.no_eval, lease_seconds=args.lease_seconds, wal=not args.no_wal)
+
+
+if __name__ == "__main__":
+    main()